@@ -2,16 +2,15 @@ import os
 import re
 import json
 from collections import defaultdict
+from pathlib import Path
+
+from common import FileWalk
 
 ROOT = os.getcwd()
 
 IGNORE_DIRS = {"node_modules", "dist", "build", ".git", ".next", ".vite", "coverage"}
 EXTS = {".ts", ".tsx", ".js", ".jsx", ".mts", ".cts", ".mjs", ".cjs"}
 
-def should_ignore(path: str) -> bool:
-    parts = set(path.replace("\\", "/").split("/"))
-    return any(d in parts for d in IGNORE_DIRS)
-
 def read_text(path: str) -> str:
     with open(path, "r", encoding="utf-8", errors="ignore") as f:
         return f.read()
@@ -23,14 +22,11 @@ def find_file_rel(candidates):
             return p
     return None
 
-def walk_files():
-    for root, dirs, files in os.walk(ROOT):
-        if should_ignore(root):
-            continue
-        for name in files:
-            ext = os.path.splitext(name)[1].lower()
-            if ext in EXTS:
-                yield os.path.join(root, name)
+def walk_files(globs=("**/*",)):
+    # uma travessia scandir; IGNORE_DIRS são podados antes de descer
+    for p in FileWalk(Path(ROOT), {"": list(globs)}, IGNORE_DIRS).files(""):
+        if p.suffix.lower() in EXTS:
+            yield str(p)
 
 # ---------------------------
 # 1) Localizar arquivos-chave
@@ -106,7 +102,7 @@ def extract_permission_keywords(ts: str):
 def list_admin_pages():
     pages = []
     # padrão comum: client/src/pages/Admin*.tsx e client/src/pages/admin/*.tsx
-    for p in walk_files():
+    for p in walk_files(["client/src/pages/**/*.tsx"]):
         p_norm = p.replace("\\", "/")
         if "/client/src/pages/" in p_norm and p_norm.endswith(".tsx"):
             base = os.path.basename(p_norm)
@@ -9,9 +9,14 @@ import json
 import re
 from dataclasses import dataclass, asdict, field
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
+from common import (
+    FixPlan, LineIndex, RouteTable, ScanCache, TrpcMount, parse_trpc_routers,
+    tool_salt, trpc_mounted_namespace, trpc_prefixes,
+)
+
 # ─────────────────────────── CONFIG ─────────────────────────────────────────
 
 SKIP_DIRS: Set[str] = {
@@ -86,14 +91,14 @@ REPLACE_RE       = re.compile(r"""\.replace\(\s*["']([^"']+)["']\s*\)""", re.MUL
 HREF_ASSIGN_RE   = re.compile(r"""(?:location\.href|window\.location)\s*=\s*["']([^"']+)["']""", re.MULTILINE)
 
 # --- tRPC USO NO FRONTEND ---
-# trpc.namespace.procedure.useQuery / useMutation / useSubscription / mutate / query
+# trpc.namespace[.sub].procedure.useQuery / useMutation / useSubscription / mutate / query
 TRPC_USE_RE = re.compile(
-    r"""trpc\.([A-Za-z_][A-Za-z0-9_]*)\.([A-Za-z_][A-Za-z0-9_]*)\.(?:useQuery|useMutation|useSubscription|useSuspenseQuery|useInfiniteQuery|mutate(?:Async)?|query)""",
+    r"""trpc\.((?:[A-Za-z_][A-Za-z0-9_]*\.)+?)([A-Za-z_][A-Za-z0-9_]*)\.(?:useQuery|useMutation|useSubscription|useSuspenseQuery|useInfiniteQuery|mutate(?:Async)?|query)""",
     re.MULTILINE,
 )
 # trpc.useUtils() / trpc.xxx.yyy.invalidate()
 TRPC_UTILS_RE = re.compile(
-    r"""trpc\.([A-Za-z_][A-Za-z0-9_]*)\.([A-Za-z_][A-Za-z0-9_]*)\.(?:invalidate|refetch|setData|cancel)""",
+    r"""trpc\.((?:[A-Za-z_][A-Za-z0-9_]*\.)+?)([A-Za-z_][A-Za-z0-9_]*)\.(?:invalidate|refetch|setData|cancel)""",
     re.MULTILINE,
 )
 
@@ -103,11 +108,6 @@ TRPC_ROUTER_NS_RE = re.compile(
     r"""([A-Za-z_][A-Za-z0-9_]*)\s*:\s*(?:router|createRouter)\s*\(\s*\{""",
     re.MULTILINE,
 )
-# procedure: publicProcedure / protectedProcedure / adminProcedure
-TRPC_PROC_RE = re.compile(
-    r"""([A-Za-z_][A-Za-z0-9_]*)\s*:\s*(publicProcedure|protectedProcedure|adminProcedure|procedure)\b""",
-    re.MULTILINE,
-)
 # appRouter: t.router({ ... })
 TRPC_APP_ROUTER_RE = re.compile(
     r"""(?:appRouter|router)\s*=\s*(?:t\.)?(?:router|createRouter)\s*\(\s*\{""",
@@ -163,11 +163,14 @@ class LinkFinding:
 
 @dataclass
 class TrpcProcedure:
-    namespace: str
+    namespace: str   # caminho completo: "auth", "videos.admin", "__root__"
     name: str
     kind: str   # public | protected | admin | unknown
     file: str
     line: int
+    end_line: int = 0
+    has_input: bool = False
+    router: Optional[str] = None   # variável do router de topo (ex.: profileRouter)
 
 @dataclass
 class TrpcUsage:
@@ -185,26 +188,12 @@ class DbTable:
 
 # ─────────────────────── HELPERS ─────────────────────────────────────────────
 
-def iter_files(root: Path, globs: List[str]) -> List[Path]:
-    seen: Set[Path] = set()
-    for gp in globs:
-        for p in root.glob(gp):
-            if not p.is_file():
-                continue
-            if any(part in SKIP_DIRS for part in p.parts):
-                continue
-            seen.add(p)
-    return sorted(seen)
-
 def read_text(p: Path) -> str:
     return p.read_text(encoding="utf-8", errors="ignore")
 
 def rel(p: Path, root: Path) -> str:
     return str(p.relative_to(root)).replace("\\", "/")
 
-def lineno(text: str, idx: int) -> int:
-    return text.count("\n", 0, idx) + 1
-
 def normalize_path(p: str) -> str:
     if not p:
         return ""
@@ -231,26 +220,13 @@ def guess_zone(file_path: str) -> str:
         return "ADMIN"
     return "PUBLIC"
 
-def path_matches_route(href: str, routes: Set[str]) -> bool:
-    """Verifica se href corresponde a alguma rota definida (aceita parâmetros dinâmicos)."""
-    norm = normalize_path(href)
-    if not norm or norm == "/":
-        return True
-    if norm in routes:
-        return True
-    # Checar rotas dinâmicas: /course/:id  vs  /course/123
-    for r in routes:
-        if ":" in r or "*" in r:
-            rparts = r.split("/")
-            hparts = norm.split("/")
-            if len(rparts) == len(hparts):
-                if all(rp.startswith(":") or rp == hp for rp, hp in zip(rparts, hparts)):
-                    return True
-    return False
+def path_matches_route(href: str, routes: RouteTable) -> bool:
+    """Verifica se href corresponde a alguma rota definida (aceita :param e *)."""
+    return routes.match(normalize_path(href)) is not None
 
 # ─────────────────────── SCANNERS ─────────────────────────────────────────────
 
-def scan_routes(files: List[Path], root: Path) -> List[RouteFinding]:
+def scan_routes(files: List[Path], root: Path, text: Callable[[Path], str] = read_text) -> List[RouteFinding]:
     routes: List[RouteFinding] = []
     seen: Set[Tuple] = set()
 
@@ -266,7 +242,7 @@ def scan_routes(files: List[Path], root: Path) -> List[RouteFinding]:
         routes.append(RouteFinding(file_rel, path, comp or None, classify_route(path), source))
 
     for f in files:
-        txt = read_text(f)
+        txt = text(f)
         fr  = rel(f, root)
 
         for m in ROUTE_COMPONENT_RE.finditer(txt):
@@ -283,14 +259,17 @@ def scan_routes(files: List[Path], root: Path) -> List[RouteFinding]:
     return routes
 
 
-def scan_links(files: List[Path], root: Path, route_paths: Set[str]) -> Tuple[List[LinkFinding], List[LinkFinding], List[LinkFinding]]:
+def scan_links(files: List[Path], root: Path, route_paths: Set[str], text: Callable[[Path], str] = read_text
+               ) -> Tuple[List[LinkFinding], List[LinkFinding], List[LinkFinding]]:
     internal: List[LinkFinding] = []
     external: List[LinkFinding] = []
     broken:   List[LinkFinding] = []
+    table = RouteTable(route_paths)
 
     for f in files:
-        txt = read_text(f)
+        txt = text(f)
         fr  = rel(f, root)
+        idx = LineIndex(txt)
         zg  = guess_zone(fr)
 
         patterns = [
@@ -306,7 +285,7 @@ def scan_links(files: List[Path], root: Path, route_paths: Set[str]) -> Tuple[Li
                 href = m.group(1).strip()
                 if not href or href.startswith("#") or href.startswith("data:"):
                     continue
-                ln = lineno(txt, m.start())
+                ln = idx.line(m.start())
                 lf = LinkFinding(fr, href, kind, ln, zg)
                 if is_external(href):
                     external.append(lf)
@@ -314,71 +293,55 @@ def scan_links(files: List[Path], root: Path, route_paths: Set[str]) -> Tuple[Li
                     if href.startswith(("/api", "/assets", "/favicon", "/public", "/static")):
                         continue
                     internal.append(lf)
-                    if not path_matches_route(href, route_paths):
+                    if not path_matches_route(href, table):
                         lf.is_broken = True
                         broken.append(lf)
 
     return internal, external, broken
 
 
-def scan_trpc_backend(files: List[Path], root: Path) -> List[TrpcProcedure]:
-    """Extrai procedures tRPC definidas no backend."""
+def scan_trpc_procs(files: List[Path], root: Path, text: Callable[[Path], str] = read_text) -> List[TrpcProcedure]:
+    """Procedures por arquivo, com namespace relativo ao router de topo em que aparecem."""
     procedures: List[TrpcProcedure] = []
-
     for f in files:
-        txt   = read_text(f)
-        fr    = rel(f, root)
-        lines = txt.split("\n")
-
-        # Estratégia: encontrar namespaces e procedures no mesmo arquivo
-        # Construir mapa de contexto via indentação aproximada
-        current_ns = "__root__"
-        ns_stack: List[str] = []
-
-        for i, line in enumerate(lines, 1):
-            # Detectar abertura de namespace
-            nm = re.search(r"""([A-Za-z_][A-Za-z0-9_]*)\s*:\s*(?:router|createRouter)\s*\(""", line)
-            if nm:
-                current_ns = nm.group(1)
-                ns_stack.append(current_ns)
-
-            # Detectar procedure
-            pm = TRPC_PROC_RE.search(line)
-            if pm:
-                proc_name  = pm.group(1)
-                proc_type  = pm.group(2)
-                kind_map   = {
-                    "publicProcedure":    "public",
-                    "protectedProcedure": "protected",
-                    "adminProcedure":     "admin",
-                    "procedure":          "unknown",
-                }
-                kind = kind_map.get(proc_type, "unknown")
-                ns   = ns_stack[-1] if ns_stack else "__root__"
-                procedures.append(TrpcProcedure(ns, proc_name, kind, fr, i))
-
-            # Detectar fechamento de namespace (heurística: linha com apenas "}")
-            stripped = line.strip()
-            if stripped in ("}),", "})", "},") and ns_stack:
-                ns_stack.pop()
-                current_ns = ns_stack[-1] if ns_stack else "__root__"
-
+        fr = rel(f, root)
+        for n in parse_trpc_routers(text(f))[0]:
+            procedures.append(TrpcProcedure(".".join(n.path) or "__root__", n.name, n.kind, fr,
+                                            n.line, n.end_line, n.has_input, n.router))
     return procedures
 
 
-def scan_trpc_frontend(files: List[Path], root: Path) -> List[TrpcUsage]:
+def scan_trpc_mounts(files: List[Path], root: Path, text: Callable[[Path], str] = read_text) -> List[TrpcMount]:
+    return [m for f in files for m in parse_trpc_routers(text(f))[1]]
+
+
+def link_trpc_procs(procs: List[TrpcProcedure], mounts: List[TrpcMount]) -> List[TrpcProcedure]:
+    """Prefixa o namespace das procedures de routers montados (`profile: profileRouter`)."""
+    prefixes = trpc_prefixes(mounts)
+    for p in procs:
+        p.namespace = trpc_mounted_namespace(p.namespace, p.router, prefixes)
+    return procs
+
+
+def scan_trpc_backend(files: List[Path], root: Path) -> List[TrpcProcedure]:
+    """Extrai procedures tRPC definidas no backend."""
+    return link_trpc_procs(scan_trpc_procs(files, root), scan_trpc_mounts(files, root))
+
+
+def scan_trpc_frontend(files: List[Path], root: Path, text: Callable[[Path], str] = read_text) -> List[TrpcUsage]:
     """Extrai usos de tRPC no frontend."""
     usages: List[TrpcUsage] = []
     seen: Set[Tuple] = set()
 
     for f in files:
-        txt = read_text(f)
+        txt = text(f)
         fr  = rel(f, root)
+        idx = LineIndex(txt)
         for rx in (TRPC_USE_RE, TRPC_UTILS_RE):
             for m in rx.finditer(txt):
-                ns   = m.group(1)
+                ns   = m.group(1).rstrip(".")
                 name = m.group(2)
-                ln   = lineno(txt, m.start())
+                ln   = idx.line(m.start())
                 method = m.group(0).split(".")[-1]
                 key  = (ns, name, fr)
                 if key not in seen:
@@ -388,38 +351,39 @@ def scan_trpc_frontend(files: List[Path], root: Path) -> List[TrpcUsage]:
     return usages
 
 
-def scan_db_schema(files: List[Path], root: Path) -> List[DbTable]:
+def scan_db_schema(files: List[Path], root: Path, text: Callable[[Path], str] = read_text) -> List[DbTable]:
     tables: List[DbTable] = []
     for f in files:
-        txt = read_text(f)
+        txt = text(f)
         fr  = rel(f, root)
         for m in DRIZZLE_TABLE_RE.finditer(txt):
             tables.append(DbTable(m.group(1), m.group(2), fr))
     return tables
 
 
-def scan_security(files: List[Path], root: Path) -> List[Issue]:
+def scan_security(files: List[Path], root: Path, text: Callable[[Path], str] = read_text) -> List[Issue]:
     issues: List[Issue] = []
     for f in files:
-        txt = read_text(f)
+        txt = text(f)
         fr  = rel(f, root)
+        idx = LineIndex(txt)
 
         for m in LOCALHOST_RE.finditer(txt):
-            ln = lineno(txt, m.start())
+            ln = idx.line(m.start())
             snippet = txt[max(0, m.start()-60):m.start()+80].replace("\n", " ").strip()
             issues.append(Issue("WARNING", "Security", fr, ln,
                                 "Hardcoded localhost/port",
                                 f"Detectado: `{snippet[:120]}`"))
 
         for m in OPEN_REDIRECT_RE.finditer(txt):
-            ln = lineno(txt, m.start())
+            ln = idx.line(m.start())
             snippet = txt[max(0, m.start()-40):m.start()+100].replace("\n", " ").strip()
             issues.append(Issue("CRITICAL", "Security", fr, ln,
                                 "Possível Open Redirect via `next`",
                                 f"`{snippet[:120]}`"))
 
         for m in HARDCODE_KEY_RE.finditer(txt):
-            ln = lineno(txt, m.start())
+            ln = idx.line(m.start())
             # mascara o valor
             raw = m.group(0)
             masked = re.sub(r'["\']\S+["\']', '"***"', raw)
@@ -428,7 +392,7 @@ def scan_security(files: List[Path], root: Path) -> List[Issue]:
                                 f"`{masked}`"))
 
         for m in HARDCODE_URL_RE.finditer(txt):
-            ln = lineno(txt, m.start())
+            ln = idx.line(m.start())
             issues.append(Issue("WARNING", "Security", fr, ln,
                                 "URL de API hardcoded",
                                 f"URL: `{m.group(1)[:80]}`"))
@@ -436,13 +400,14 @@ def scan_security(files: List[Path], root: Path) -> List[Issue]:
     return issues
 
 
-def scan_code_quality(files: List[Path], root: Path) -> List[Issue]:
+def scan_code_quality(files: List[Path], root: Path, text: Callable[[Path], str] = read_text) -> List[Issue]:
     issues: List[Issue] = []
     for f in files:
-        txt = read_text(f)
+        txt = text(f)
         fr  = rel(f, root)
+        idx = LineIndex(txt)
         for m in TODO_FIXME_RE.finditer(txt):
-            ln = lineno(txt, m.start())
+            ln = idx.line(m.start())
             snippet = txt[m.start():m.start()+80].replace("\n", " ").strip()
             issues.append(Issue("INFO", "CodeQuality", fr, ln,
                                 "TODO/FIXME pendente", f"`{snippet}`"))
@@ -463,6 +428,68 @@ def scan_page_components(files: List[Path], root: Path) -> Dict[str, str]:
         pages[stem] = rel(f, root)
     return pages
 
+# ─────────────────────── CACHE INCREMENTAL ────────────────────────────────────
+
+def per_file(files: List[Path], root: Path, kind: str, scan, cls,
+             cache: Optional[ScanCache], plan: FixPlan) -> List[List]:
+    """
+    Roda `scan([arquivo], root)` arquivo a arquivo sobre o texto do plano,
+    memoizado no plano (e no ScanCache quando houver). Guarda dicts e recria os
+    objetos a cada chamada: link_trpc_procs/classify_links alteram os objetos.
+    """
+    def scanned(f: Path) -> List[Dict]:
+        return [asdict(x) for x in scan([f], root, plan.text)]
+
+    out: List[List] = []
+    for f in files:
+        if cache is None:
+            raw = plan.result(kind, f, lambda: scanned(f))
+        else:
+            raw = plan.result(kind, f, lambda: cache.fetch(rel(f, root), f, kind,
+                                                           lambda: plan.text(f), lambda: scanned(f)))
+        out.append([cls(**d) for d in raw])
+    return out
+
+
+def merge_routes(chunks: List[List[RouteFinding]]) -> List[RouteFinding]:
+    routes: List[RouteFinding] = []
+    seen: Set[Tuple] = set()
+    for chunk in chunks:
+        for r in chunk:
+            key = (r.path, r.component or "")
+            if key not in seen:
+                seen.add(key)
+                routes.append(r)
+    return routes
+
+
+def _file_links(files: List[Path], root: Path, text: Callable[[Path], str] = read_text) -> List[LinkFinding]:
+    internal, external, _ = scan_links(files, root, set(), text)
+    return internal + external
+
+
+def classify_links(chunks: List[List[LinkFinding]], route_paths: Set[str]
+                   ) -> Tuple[List[LinkFinding], List[LinkFinding], List[LinkFinding]]:
+    internal: List[LinkFinding] = []
+    external: List[LinkFinding] = []
+    broken:   List[LinkFinding] = []
+    table = RouteTable(route_paths)
+    for chunk in chunks:
+        for lf in chunk:
+            if is_external(lf.href):
+                external.append(lf)
+                continue
+            internal.append(lf)
+            lf.is_broken = not path_matches_route(lf.href, table)
+            if lf.is_broken:
+                broken.append(lf)
+    return internal, external, broken
+
+
+def flatten(chunks: List[List]) -> List:
+    return [x for chunk in chunks for x in chunk]
+
+
 # ─────────────────────── ANÁLISE E SCORING ────────────────────────────────────
 
 def analyze_trpc_alignment(
@@ -583,64 +610,80 @@ def compute_scores(
 
 # ─────────────────────── MASTER AUDIT ────────────────────────────────────────
 
-def run_audit(root: Path) -> Dict:
-    print(f"🔍 Auditando: {root}")
+def make_plan(root: Path) -> FixPlan:
+    """Uma varredura da árvore; o nav_autofix_20x10 reaproveita o mesmo plano nos fixers."""
+    return FixPlan(root, {"pages": PAGE_GLOBS, "frontend": FRONTEND_GLOBS,
+                          "backend": BACKEND_GLOBS, "schema": SCHEMA_GLOBS}, SKIP_DIRS, gitignore=False)
+
+
+def run_audit(root: Path, cache: Optional[ScanCache] = None, plan: Optional[FixPlan] = None,
+              verbose: bool = True) -> Dict:
+    """
+    Audita pelo plano: auditar de novo o mesmo plano (após plan.rescan()) só
+    re-varre os arquivos alterados pelos fixers.
+    """
+    say = print if verbose else (lambda *a, **k: None)
+    plan = plan or make_plan(root)
+    say(f"🔍 Auditando: {root}")
 
-    page_files    = iter_files(root, PAGE_GLOBS)
-    frontend_files = iter_files(root, FRONTEND_GLOBS)
-    backend_files  = iter_files(root, BACKEND_GLOBS)
-    schema_files   = iter_files(root, SCHEMA_GLOBS)
+    page_files    = plan.files("pages")
+    frontend_files = plan.files("frontend")
+    backend_files  = plan.files("backend")
+    schema_files   = plan.files("schema")
 
     # Todos os arquivos TS/TSX para scan de links e segurança
     all_ts_files  = sorted(set(frontend_files + backend_files))
 
-    print(f"   📄 Páginas encontradas:    {len(page_files)}")
-    print(f"   🖥️  Arquivos frontend:      {len(frontend_files)}")
-    print(f"   ⚙️  Arquivos backend:       {len(backend_files)}")
-    print(f"   🗄️  Arquivos de schema:     {len(schema_files)}")
+    say(f"   📄 Páginas encontradas:    {len(page_files)}")
+    say(f"   🖥️  Arquivos frontend:      {len(frontend_files)}")
+    say(f"   ⚙️  Arquivos backend:       {len(backend_files)}")
+    say(f"   🗄️  Arquivos de schema:     {len(schema_files)}")
 
     # 1. PÁGINAS
     pages_by_stem = scan_page_components(page_files, root)
 
     # 2. ROTAS (escanear TODOS os arquivos frontend + backend)
-    routes = scan_routes(all_ts_files, root)
+    routes = merge_routes(per_file(all_ts_files, root, "routes", scan_routes, RouteFinding, cache, plan))
     route_paths: Set[str] = {r.path for r in routes if r.path}
-    print(f"   🗺️  Rotas detectadas:       {len(routes)}")
+    say(f"   🗺️  Rotas detectadas:       {len(routes)}")
 
     # Se ainda 0 rotas, buscar App.tsx explicitamente em qualquer subpasta
     if not routes:
-        print("   ⚠️  Buscando App.tsx em qualquer subpasta...")
+        say("   ⚠️  Buscando App.tsx em qualquer subpasta...")
         for pattern in APP_FILES_PATTERNS:
             for app_file in root.rglob(pattern):
                 if any(part in SKIP_DIRS for part in app_file.parts):
                     continue
-                extra = scan_routes([app_file], root)
+                extra = scan_routes([app_file], root, plan.text)
                 routes.extend(extra)
                 route_paths.update(r.path for r in extra if r.path)
-        print(f"   🗺️  Rotas (pós-busca extra): {len(routes)}")
+        say(f"   🗺️  Rotas (pós-busca extra): {len(routes)}")
 
     # 3. LINKS
-    internal_links, external_links, broken_links = scan_links(frontend_files, root, route_paths)
-    print(f"   🔗 Links internos:         {len(internal_links)}")
-    print(f"   🔗 Links quebrados:        {len(broken_links)}")
+    internal_links, external_links, broken_links = classify_links(
+        per_file(frontend_files, root, "links", _file_links, LinkFinding, cache, plan), route_paths)
+    say(f"   🔗 Links internos:         {len(internal_links)}")
+    say(f"   🔗 Links quebrados:        {len(broken_links)}")
 
     # 4. tRPC BACKEND
-    backend_procs = scan_trpc_backend(backend_files, root)
-    print(f"   ⚙️  Procedures backend:     {len(backend_procs)}")
+    backend_procs = link_trpc_procs(
+        flatten(per_file(backend_files, root, "procs", scan_trpc_procs, TrpcProcedure, cache, plan)),
+        flatten(per_file(backend_files, root, "mounts", scan_trpc_mounts, TrpcMount, cache, plan)))
+    say(f"   ⚙️  Procedures backend:     {len(backend_procs)}")
 
     # 5. tRPC FRONTEND
-    frontend_usages = scan_trpc_frontend(frontend_files, root)
-    print(f"   🖥️  Usos tRPC frontend:     {len(frontend_usages)}")
+    frontend_usages = flatten(per_file(frontend_files, root, "usages", scan_trpc_frontend, TrpcUsage, cache, plan))
+    say(f"   🖥️  Usos tRPC frontend:     {len(frontend_usages)}")
 
     # 6. SCHEMA
-    db_tables = scan_db_schema(schema_files, root)
-    print(f"   🗄️  Tabelas no schema:      {len(db_tables)}")
+    db_tables = flatten(per_file(schema_files, root, "tables", scan_db_schema, DbTable, cache, plan))
+    say(f"   🗄️  Tabelas no schema:      {len(db_tables)}")
 
     # 7. SEGURANÇA
-    security_issues = scan_security(all_ts_files, root)
+    security_issues = flatten(per_file(all_ts_files, root, "security", scan_security, Issue, cache, plan))
 
     # 8. QUALIDADE
-    quality_issues = scan_code_quality(all_ts_files, root)
+    quality_issues = flatten(per_file(all_ts_files, root, "quality", scan_code_quality, Issue, cache, plan))
 
     # 9. ANÁLISE tRPC ALIGNMENT
     trpc_align_issues, trpc_stats = analyze_trpc_alignment(backend_procs, frontend_usages)
@@ -1088,13 +1131,19 @@ def main():
     ap.add_argument("--root", default=".", help="Raiz do projeto (default: .)")
     ap.add_argument("--out",  default="super_audit", help="Pasta de saída (default: super_audit)")
     ap.add_argument("--no-html", action="store_true", help="Não gerar HTML (apenas JSON)")
+    ap.add_argument("--no-cache", action="store_true", help="Ignorar o cache incremental (<out>/.cache)")
     args = ap.parse_args()
 
     root    = Path(args.root).resolve()
     out_dir = root / args.out
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    report = run_audit(root)
+    cache = None if args.no_cache else ScanCache(
+        out_dir / ".cache" / "audit_nav_best.json", tool_salt(Path(__file__)))
+    report = run_audit(root, cache)
+    if cache is not None:
+        cache.save()
+        print(f"   Cache: {cache.hits} hits / {cache.misses} misses")
 
     json_path = out_dir / "super_audit.json"
     html_path = out_dir / "super_audit.html"
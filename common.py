@@ -5,13 +5,18 @@ common.py - shared helpers for the local→github→render toolkit.
 
 from __future__ import annotations
 
+import bisect
+import difflib
+import hashlib
 import json
 import os
+import re
 import sys
+import zlib
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Set, Tuple
 
 DEFAULT_REPORTS_DIR = Path("reports")
 
@@ -53,6 +58,1335 @@ def write_text(path: Path, text: str) -> None:
 def read_text(path: Path) -> str:
     return path.read_text(encoding="utf-8", errors="ignore")
 
+_NEWLINE = re.compile("\n")
+
+class LineIndex:
+    """Newline offsets of a text, built once; maps a char offset to its 1-based line."""
+
+    __slots__ = ("offsets",)
+
+    def __init__(self, text: str) -> None:
+        self.offsets = [m.start() for m in _NEWLINE.finditer(text)]
+
+    def line(self, pos: int) -> int:
+        return bisect.bisect_left(self.offsets, pos) + 1
+
+class RouteTable:
+    """Route patterns compiled once into a segment trie.
+
+    Segments are matched statically first, then ``:param`` (exactly one
+    segment, any value), then ``*`` / ``:name*`` (the rest of the path,
+    possibly empty). ``match`` returns the pattern that accepted the path,
+    so callers can report *which* route a link resolves to. Paths are
+    expected already normalised by the calling tool; the empty path and
+    ``/`` always match.
+    """
+
+    __slots__ = ("patterns", "_root")
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns = set(patterns)
+        self._root: Dict[str, Any] = {}
+        for pat in sorted(self.patterns):
+            node = self._root
+            for seg in pat.split("/"):
+                if seg == "*" or (seg.startswith(":") and seg.endswith("*")):
+                    node = node.setdefault("*", {})
+                    break
+                key = ":" if seg.startswith(":") else "/" + seg
+                node = node.setdefault(key, {})
+            node.setdefault("$", pat)
+
+    def match(self, path: str) -> Optional[str]:
+        if not path or path == "/":
+            return "/"
+        if path in self.patterns:
+            return path
+        return self._walk(self._root, path.split("/"), 0)
+
+    def _walk(self, node: Dict[str, Any], segs: List[str], i: int) -> Optional[str]:
+        if i == len(segs):
+            if "$" in node:
+                return node["$"]
+            star = node.get("*")
+            return star["$"] if star else None
+        for key in ("/" + segs[i], ":"):
+            child = node.get(key)
+            if child is not None:
+                hit = self._walk(child, segs, i + 1)
+                if hit is not None:
+                    return hit
+        star = node.get("*")
+        return star["$"] if star else None
+
+    def __contains__(self, path: str) -> bool:
+        return self.match(path) is not None
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+class AnchoredScan:
+    """Several regexes over one text, each gated by literal anchors it cannot match without.
+
+    A pattern only runs when one of its anchors occurs in the text (checked
+    against the lowercased text for re.IGNORECASE patterns), so files with
+    no anchor at all cost a handful of substring checks instead of a full
+    regex pass per pattern. Matches come out pattern by pattern, in
+    declaration order, exactly as separate finditer loops would yield them.
+    """
+
+    def __init__(self, *patterns: Tuple[Pattern[str], Tuple[str, ...], Any]) -> None:
+        self.patterns: List[Tuple[Pattern[str], Tuple[str, ...], Any, bool]] = []
+        for rx, anchors, tag in patterns:
+            fold = bool(rx.flags & re.IGNORECASE)
+            self.patterns.append((rx, tuple(a.lower() for a in anchors) if fold else anchors, tag, fold))
+
+    def active(self, text: str) -> List[Tuple[Pattern[str], Any]]:
+        lowered: Optional[str] = None
+        out = []
+        for rx, anchors, tag, fold in self.patterns:
+            if fold and lowered is None:
+                lowered = text.lower()
+            hay = lowered if fold else text
+            if any(a in hay for a in anchors):
+                out.append((rx, tag))
+        return out
+
+    def finditer(self, text: str) -> Iterator[Tuple[Any, "re.Match[str]"]]:
+        for rx, tag in self.active(text):
+            for m in rx.finditer(text):
+                yield tag, m
+
+class ScanCache:
+    """
+    On-disk cache of per-file scanner results.
+
+    Entries are keyed by relative path and validated by mtime + size; when those
+    changed the content sha1 is compared before the stored results are dropped.
+    `salt` (usually a hash of the tool's own source) invalidates everything when
+    the scanners themselves change. Entries not touched during a run are pruned
+    on save().
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path, salt: str = "") -> None:
+        self.path = path
+        self.salt = salt
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._checked: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            if raw.get("version") == self.VERSION and raw.get("salt") == salt:
+                self._entries = raw.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def digest(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8", "ignore")).hexdigest()
+
+    def _entry(self, rel: str, path: Path, text: Callable[[], str]) -> Dict[str, Any]:
+        entry = self._checked.get(rel)
+        if entry is not None:
+            return entry
+        st = path.stat()
+        entry = self._entries.get(rel)
+        if entry is None or entry["mtime"] != st.st_mtime_ns or entry["size"] != st.st_size:
+            sha = self.digest(text())
+            if entry is None or entry["sha1"] != sha:
+                entry = {"sha1": sha, "data": {}}
+            entry["mtime"], entry["size"] = st.st_mtime_ns, st.st_size
+            self._entries[rel] = entry
+            self._dirty = True
+        self._checked[rel] = entry
+        return entry
+
+    def has(self, rel: str, path: Path, kind: str, text: Callable[[], str]) -> bool:
+        return kind in self._entry(rel, path, text)["data"]
+
+    def fetch(self, rel: str, path: Path, kind: str,
+              text: Callable[[], str], compute: Callable[[], Any]) -> Any:
+        """Return the cached `kind` result for a file, computing (and storing) it on a miss."""
+        entry = self._entry(rel, path, text)
+        data = entry["data"]
+        if kind in data:
+            self.hits += 1
+            return data[kind]
+        self.misses += 1
+        data[kind] = compute()
+        self._dirty = True
+        return data[kind]
+
+    def save(self) -> None:
+        if not self._dirty and len(self._checked) == len(self._entries):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": self.VERSION, "salt": self.salt, "files": self._checked}
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+def tool_salt(path: Path) -> str:
+    """Hash of a tool's source (plus this module) — invalidates caches when either changes."""
+    h = hashlib.sha1()
+    for src in (path, Path(__file__)):
+        try:
+            h.update(src.read_bytes())
+        except OSError:
+            pass
+    return h.hexdigest()[:16]
+
+# ── File walking ─────────────────────────────────────────────────────────────
+
+SKIP_DIRS = frozenset({
+    "node_modules", ".git", "dist", "build", ".next", ".turbo", ".cache", ".vite",
+    ".output", ".vercel", ".pnpm", ".pnpm-store", "coverage", "__pycache__",
+})
+
+_GLOB_CHUNK = re.compile(r"\*|\?|\[!?[^\]/]+\]|[^*?\[]+|\[")
+
+def _glob_segment(seg: str) -> str:
+    out = []
+    for tok in _GLOB_CHUNK.findall(seg):
+        if tok == "*":
+            out.append("[^/]*")
+        elif tok == "?":
+            out.append("[^/]")
+        elif tok.startswith("[") and len(tok) > 1:
+            body = tok[1:-1]
+            out.append("[^" + body[1:] + "]" if body.startswith("!") else "[" + body + "]")
+        else:
+            out.append(re.escape(tok))
+    return "".join(out)
+
+def glob_regex(pattern: str) -> Pattern[str]:
+    """Path.glob-style pattern ("client/src/**/*.tsx") as a regex over root-relative posix paths."""
+    segs = [s for s in pattern.strip("/").split("/") if s]
+    out = []
+    for i, seg in enumerate(segs):
+        last = i == len(segs) - 1
+        if seg == "**":
+            out.append(".*" if last else "(?:[^/]+/)*")
+        else:
+            out.append(_glob_segment(seg) + ("" if last else "/"))
+    return re.compile("".join(out))
+
+def _is_literal(seg: str) -> bool:
+    return not any(c in seg for c in "*?[")
+
+class GitIgnore:
+    """
+    The part of .gitignore the scripts care about: globs, "**", anchored "/x" or
+    "a/b" patterns, directory-only "x/" and "!" negation (last matching rule wins).
+    Rules from nested .gitignore files apply below their own directory.
+    """
+
+    def __init__(self) -> None:
+        self._rules: List[Tuple[str, Pattern[str], bool, bool]] = []
+        self._prefilter: List[str] = []
+        self._any: Optional[Pattern[str]] = None
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def add(self, base: str, text: str) -> None:
+        for raw in text.splitlines():
+            line = raw.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            neg = line.startswith("!")
+            line = line[1:] if neg else line
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            # a slash at the start or in the middle anchors; a trailing one only means dir_only
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if not line:
+                continue
+            if not anchored:
+                line = "**/" + line
+            rx = glob_regex(line)
+            self._rules.append((base, rx, neg, dir_only))
+            self._prefilter.append((re.escape(base) + "/" if base else "") + rx.pattern)
+            self._any = None
+
+    def ignored(self, rel: str, is_dir: bool) -> bool:
+        # most paths match no rule at all: one alternation rejects them up front
+        if self._any is None:
+            self._any = re.compile("|".join(f"(?:{p})" for p in self._prefilter))
+        if not self._any.fullmatch(rel):
+            return False
+        hit = False
+        for base, rx, neg, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel.startswith(base + "/"):
+                    continue
+                sub = rel[len(base) + 1:]
+            else:
+                sub = rel
+            if rx.fullmatch(sub):
+                hit = not neg
+        return hit
+
+def walk_files(root: Path, skip_dirs: Iterable[str] = SKIP_DIRS, gitignore: bool = True,
+               descend: Optional[Callable[[str], bool]] = None) -> Iterator[Tuple[str, str]]:
+    """
+    (root-relative posix path, absolute path) of every file under root, one
+    os.scandir per directory.
+
+    Directories named in skip_dirs, ignored by .gitignore or rejected by
+    `descend(rel_dir)` are pruned before they are opened, so node_modules and
+    friends cost one directory entry each. Files of a directory come before its
+    subdirectories, names in sorted order — the same pre-order rglob uses, but
+    deterministic across filesystems.
+    """
+    skip = frozenset(skip_dirs)
+    rules = GitIgnore()
+    stack: List[Tuple[str, str]] = [("", str(root))]
+    while stack:
+        rel_dir, abs_dir = stack.pop()
+        try:
+            with os.scandir(abs_dir) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        if gitignore:
+            for e in entries:
+                if e.name == ".gitignore" and e.is_file():
+                    try:
+                        rules.add(rel_dir, read_text(Path(e.path)))
+                    except OSError:
+                        pass
+                    break
+        subdirs = []
+        for e in entries:
+            rel = rel_dir + "/" + e.name if rel_dir else e.name
+            try:
+                is_dir = e.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if e.name in skip or (rules and rules.ignored(rel, True)):
+                    continue
+                if descend is None or descend(rel):
+                    subdirs.append((rel, e.path))
+            elif e.is_file() and not (rules and rules.ignored(rel, False)):
+                yield rel, e.path
+        stack.extend(reversed(subdirs))
+
+class FileWalk:
+    """
+    One traversal of root shared by every glob group of a run.
+
+    `groups` maps a name to Path.glob-style patterns; files(name) gives the sorted
+    matches, like the per-script iter_files(root, globs) did with one glob() per
+    pattern. When every pattern starts with literal directories ("client/src/**")
+    only the directories leading to them are entered. With no groups the whole
+    (pruned) tree is walked and available through all().
+    """
+
+    def __init__(self, root: Path, groups: Optional[Dict[str, Iterable[str]]] = None,
+                 skip_dirs: Iterable[str] = SKIP_DIRS, gitignore: bool = True) -> None:
+        self.root = root
+        self._groups = {name: re.compile("|".join(f"(?:{glob_regex(g).pattern})" for g in globs))
+                        for name, globs in (groups or {}).items() if globs}
+        self._matches: Dict[str, List[str]] = {name: [] for name in groups or {}}
+        self._files: List[str] = []
+        prefixes = self._prefixes(groups) if groups else None
+        descend = None
+        if prefixes is not None:
+            descend = lambda d: any(p == d or p.startswith(d + "/") or d.startswith(p + "/")
+                                    for p in prefixes)
+        for rel, _ in walk_files(root, skip_dirs, gitignore, descend):
+            self._files.append(rel)
+            for name, rx in self._groups.items():
+                if rx.fullmatch(rel):
+                    self._matches[name].append(rel)
+
+    @staticmethod
+    def _prefixes(groups: Dict[str, Iterable[str]]) -> Optional[Set[str]]:
+        out: Set[str] = set()
+        for globs in groups.values():
+            for g in globs:
+                segs = g.strip("/").split("/")[:-1]
+                lit = []
+                for s in segs:
+                    if not _is_literal(s):
+                        break
+                    lit.append(s)
+                if not lit:
+                    return None
+                out.add("/".join(lit))
+        return out
+
+    def files(self, name: str) -> List[Path]:
+        return sorted(self.root / rel for rel in self._matches[name])
+
+    def all(self) -> List[Path]:
+        return [self.root / rel for rel in self._files]
+
+    def named(self, pattern: str) -> List[Path]:
+        """Files whose basename matches a glob ("App.tsx", "*.config.ts"), in walk order."""
+        rx = re.compile(_glob_segment(pattern))
+        return [self.root / rel for rel in self._files if rx.fullmatch(rel.rsplit("/", 1)[-1])]
+
+# ── tRPC router parsing ──────────────────────────────────────────────────────
+
+@dataclass
+class TrpcNode:
+    """A procedure declared inside a ``router({...})`` literal."""
+    router: Optional[str]   # variable holding the enclosing top-level router, if any
+    path: List[str]         # namespace keys from that router down to this procedure
+    name: str
+    kind: str               # public | protected | admin | unknown
+    has_input: bool
+    line: int
+    end_line: int
+
+@dataclass
+class TrpcMount:
+    """``key: someRouter`` inside a router literal — a router defined elsewhere."""
+    router: Optional[str]
+    path: List[str]
+    key: str
+    target: str
+    line: int
+
+TRPC_ROUTER_FNS = {"router", "createRouter", "createTRPCRouter"}
+
+_JS_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<com>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<str>"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?)
+  | (?P<id>[A-Za-z_$][\w$]*)
+  | (?P<num>\d[\w.]*)
+  | (?P<p>\.\.\.|[{}()\[\],:.=;`/])
+  | (?P<op>.)
+""", re.S | re.X)
+_JS_REGEX = re.compile(r"/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+_JS_TPL_CHUNK = re.compile(r"(?:[^`\\$]|\\.|\$(?!\{))*")
+# After these tokens a "/" starts a regex literal, not a division.
+_REGEX_PREV = {None, "(", ",", "=", ":", "[", "!", "&", "|", "?", "{", "}", ";",
+               "+", "-", "*", "%", "<", ">", "~", "^", "return", "typeof", "case"}
+
+def js_tokens(text: str) -> List[Tuple[str, int]]:
+    """Identifiers, punctuation and string literals of a JS/TS source, in one pass.
+
+    Comments, regex literals and template-literal text are skipped; the code
+    inside ``${...}`` is tokenized like any other code. Strings are returned
+    with their quotes so they cannot be mistaken for identifiers.
+    """
+    out: List[Tuple[str, int]] = []
+    tpl: List[int] = []          # brace depth at which each open ${ started
+    depth = 0
+    prev: Optional[str] = None
+    pos, n = 0, len(text)
+    while pos < n:
+        m = _JS_TOKEN.match(text, pos)
+        kind, tok = m.lastgroup, m.group()
+        if kind in ("ws", "com"):
+            pos = m.end()
+            continue
+        if tok == "/" and prev in _REGEX_PREV:
+            rm = _JS_REGEX.match(text, pos)
+            if rm:
+                pos, prev = rm.end(), "/re/"
+                continue
+        if tok == "`" or (tok == "}" and tpl and tpl[-1] == depth):
+            if tok == "}":
+                tpl.pop()
+            pos = _JS_TPL_CHUNK.match(text, m.end()).end()
+            if text.startswith("${", pos):
+                tpl.append(depth)
+                pos += 2
+            else:
+                pos += 1
+            prev = "`"
+            continue
+        if tok == "{":
+            depth += 1
+        elif tok == "}":
+            depth -= 1
+        out.append((tok, pos))
+        prev = tok
+        pos = m.end()
+    return out
+
+def _trpc_kind(ident: str) -> Optional[str]:
+    if ident != "procedure" and not ident.endswith("Procedure"):
+        return None
+    low = ident.lower()
+    for kind in ("admin", "protected", "public"):
+        if kind in low:
+            return kind
+    return "unknown"
+
+def _is_ident(tok: str) -> bool:
+    return tok[:1].isalpha() or tok[:1] in "_$"
+
+class _RouterLiteral:
+    __slots__ = ("var", "path", "key", "key_pos", "state", "proc")
+
+    def __init__(self, var: Optional[str], path: List[str]) -> None:
+        self.var, self.path = var, path
+        self.key: Optional[str] = None
+        self.key_pos = 0
+        self.state = "key"       # key → value → expr → (',') key
+        self.proc: Optional[List[Any]] = None   # [kind, has_input] while inside a procedure
+
+def parse_trpc_routers(text: str) -> Tuple[List[TrpcNode], List[TrpcMount]]:
+    """Procedure tree of every ``router({...})`` literal in a file.
+
+    Brace-, string- and comment-aware, linear in the file size. Nested
+    ``key: router({...})`` literals extend the namespace path; ``key: fooRouter``
+    entries are returned as mounts so callers can stitch routers declared in
+    other files under their key (see ``trpc_prefixes``).
+    """
+    if "outer(" not in text:     # router( / createRouter( / createTRPCRouter(
+        return [], []
+    toks = js_tokens(text)
+    lines = LineIndex(text)
+    nodes: List[TrpcNode] = []
+    mounts: List[TrpcMount] = []
+    stack: List[Optional[_RouterLiteral]] = []   # one entry per open bracket
+    closers = {"}": "{", ")": "(", "]": "["}
+
+    def finish(r: _RouterLiteral, end_pos: int) -> None:
+        if r.proc is not None and r.key is not None:
+            nodes.append(TrpcNode(r.var, list(r.path), r.key, r.proc[0], r.proc[1],
+                                  lines.line(r.key_pos), lines.line(end_pos)))
+        r.key, r.proc, r.state = None, None, "key"
+
+    i, n = 0, len(toks)
+    while i < n:
+        tok, pos = toks[i]
+        top = stack[-1] if stack else None
+
+        # router( {  /  t.router( {
+        if tok in TRPC_ROUTER_FNS and i + 2 < n and toks[i + 1][0] == "(" and toks[i + 2][0] == "{":
+            j = i - 2 if i >= 2 and toks[i - 1][0] == "." else i
+            if top is not None and top.state == "value" and top.key is not None:
+                lit = _RouterLiteral(top.var, top.path + [top.key])
+                top.state = "expr"
+            elif j >= 2 and toks[j - 1][0] == "=" and _is_ident(toks[j - 2][0]):
+                lit = _RouterLiteral(toks[j - 2][0], [])
+            else:
+                lit = _RouterLiteral(None, [])
+            stack.extend([None, lit])
+            i += 3
+            continue
+
+        if tok in "{([" and len(tok) == 1:
+            if top is not None and top.state == "value":
+                top.state = "expr"
+            stack.append(None)
+        elif tok in closers:
+            if top is not None and tok == "}":
+                finish(top, pos)
+            if stack:
+                stack.pop()
+        elif top is not None:
+            if top.state == "key":
+                if tok == "...":
+                    top.state = "expr"
+                elif _is_ident(tok) or tok[:1] in "\"'":
+                    key = tok.strip("\"'")
+                    nxt = toks[i + 1][0] if i + 1 < n else ""
+                    if nxt == ":":
+                        top.key, top.key_pos, top.state = key, pos, "value"
+                        i += 1
+                    elif nxt in (",", "}") and _is_ident(tok):   # { fooRouter, ... }
+                        mounts.append(TrpcMount(top.var, list(top.path), key, key, lines.line(pos)))
+                    else:
+                        top.state = "expr"
+            elif top.state == "value":
+                # primeiro token do valor: procedure builder, router montado ou outra coisa
+                chain, j = [tok], i + 1
+                while j + 1 < n and toks[j][0] == "." and _is_ident(toks[j + 1][0]):
+                    chain.append(toks[j + 1][0])
+                    j += 2
+                kinds = [k for k in map(_trpc_kind, chain) if k]
+                if kinds and _is_ident(tok):
+                    top.proc = [kinds[0], "input" in chain]
+                elif len(chain) == 1 and _is_ident(tok) and j < n and toks[j][0] in (",", "}"):
+                    mounts.append(TrpcMount(top.var, list(top.path), top.key, tok, lines.line(top.key_pos)))
+                top.state = "expr"
+                i = j
+                continue
+            elif tok == ",":
+                finish(top, pos)
+            elif tok == "." and top.proc is not None and i + 1 < n and toks[i + 1][0] == "input":
+                top.proc[1] = True
+        i += 1
+    return nodes, mounts
+
+def trpc_prefixes(mounts: Iterable[TrpcMount]) -> Dict[str, List[str]]:
+    """Full namespace prefix of each mounted router variable (``profileRouter`` → ``["profile"]``)."""
+    by_target: Dict[str, TrpcMount] = {}
+    for mt in mounts:
+        by_target.setdefault(mt.target, mt)
+    out: Dict[str, List[str]] = {}
+
+    def prefix(var: Optional[str], seen: frozenset) -> List[str]:
+        if var is None or var not in by_target or var in seen:
+            return []
+        if var not in out:
+            mt = by_target[var]
+            out[var] = prefix(mt.router, seen | {var}) + mt.path + [mt.key]
+        return out[var]
+
+    for var in by_target:
+        prefix(var, frozenset())
+    return out
+
+def trpc_mounted_namespace(namespace: str, router: Optional[str],
+                           prefixes: Dict[str, List[str]]) -> str:
+    """Namespace of a procedure once its router is placed where it is mounted."""
+    pre = prefixes.get(router) if router else None
+    if not pre:
+        return namespace
+    return ".".join(pre + ([] if namespace == "__root__" else [namespace]))
+
+# ── Import graph ─────────────────────────────────────────────────────────────
+
+JS_EXTS = (".ts", ".tsx", ".js", ".jsx")
+
+# import x from "y" / export { x } from "y" / import "y" / import("y")
+IMPORT_SPEC_RE = re.compile(r"""
+    ^[ \t]*(?:import|export)\b[^'"`;]*?\bfrom\s*["']([^"'\n]+)["']
+  | ^[ \t]*import\s*["']([^"'\n]+)["']
+  | \bimport\s*\(\s*["']([^"'\n]+)["']\s*\)
+""", re.M | re.X)
+
+def import_specs(text: str) -> Iterator[Tuple[str, int]]:
+    """(specifier, char offset) of every static, re-export and dynamic import in a file."""
+    for m in IMPORT_SPEC_RE.finditer(text):
+        yield m.group(1) or m.group(2) or m.group(3), m.start()
+
+def _strip_jsonc(text: str) -> str:
+    text = re.sub(r'("(?:[^"\\]|\\.)*")|//[^\n]*|/\*.*?\*/', lambda m: m.group(1) or "", text, flags=re.S)
+    return re.sub(r",(\s*[}\]])", r"\1", text)
+
+def load_tsconfig_paths(root: Path) -> Tuple[Path, Dict[str, List[str]]]:
+    """(baseUrl, compilerOptions.paths) of root/tsconfig.json; tolerates comments and trailing commas."""
+    ts = root / "tsconfig.json"
+    try:
+        opts = json.loads(_strip_jsonc(read_text(ts))).get("compilerOptions", {}) or {}
+    except (OSError, ValueError):
+        return root, {}
+    paths = {k: v for k, v in (opts.get("paths") or {}).items() if isinstance(v, list)}
+    return (root / opts.get("baseUrl", ".")), paths
+
+class DirListing:
+    """One os.scandir per directory, kept in memory; replaces repeated exists()/is_file() stats."""
+
+    def __init__(self) -> None:
+        self._dirs: Dict[str, Tuple[frozenset, frozenset]] = {}
+        self.scans = 0
+
+    def entries(self, d: str) -> Tuple[frozenset, frozenset]:
+        e = self._dirs.get(d)
+        if e is None:
+            files, dirs = set(), set()
+            try:
+                with os.scandir(d) as it:
+                    for x in it:
+                        (dirs if x.is_dir() else files).add(x.name)
+            except OSError:
+                pass
+            self.scans += 1
+            e = self._dirs[d] = (frozenset(files), frozenset(dirs))
+        return e
+
+    def is_file(self, p: str) -> bool:
+        d, name = os.path.split(p)
+        return name in self.entries(d)[0]
+
+    def is_dir(self, p: str) -> bool:
+        d, name = os.path.split(p)
+        return name in self.entries(d)[1]
+
+class ModuleResolver:
+    """Resolves import specifiers to files the way a TS bundler would, memoized.
+
+    Relative specifiers are cached per (importer dir, specifier), aliases from
+    tsconfig ``paths`` per specifier. Bare package names are not local and
+    resolve to None without touching the disk; use ``is_local`` to tell a
+    package apart from a broken local import.
+    """
+
+    DEFAULT_PATHS = {"@/*": ["client/src/*"]}
+
+    def __init__(self, root: Path, listing: Optional[DirListing] = None,
+                 paths: Optional[Dict[str, List[str]]] = None, base_url: Optional[Path] = None) -> None:
+        self.root = root
+        self.listing = listing or DirListing()
+        if paths is None:
+            base_url, paths = load_tsconfig_paths(root)
+        self.base = str(base_url or root)
+        # prefixo mais longo primeiro, como o tsc
+        self.paths = sorted((paths or self.DEFAULT_PATHS).items(), key=lambda kv: -len(kv[0].rstrip("*")))
+        self._memo: Dict[Tuple[str, str], Optional[str]] = {}
+        self.lookups = 0
+
+    def _alias(self, spec: str) -> Optional[List[str]]:
+        for pat, targets in self.paths:
+            if pat.endswith("*"):
+                if spec.startswith(pat[:-1]):
+                    tail = spec[len(pat) - 1:]
+                    return [t.replace("*", tail, 1) for t in targets]
+            elif spec == pat:
+                return list(targets)
+        return None
+
+    def is_local(self, spec: str) -> bool:
+        return spec.startswith(".") or self._alias(spec) is not None
+
+    def _file(self, base: str) -> Optional[str]:
+        ls = self.listing
+        if ls.is_file(base):
+            return base
+        for ext in JS_EXTS:
+            if ls.is_file(base + ext):
+                return base + ext
+        stem, suffix = os.path.splitext(base)
+        if suffix:                       # "./x.js" → x.ts (e o antigo with_suffix)
+            for ext in JS_EXTS:
+                if ls.is_file(stem + ext):
+                    return stem + ext
+        if ls.is_dir(base):
+            for ext in JS_EXTS:
+                if ls.is_file(os.path.join(base, "index" + ext)):
+                    return os.path.join(base, "index" + ext)
+        return None
+
+    def resolve(self, importer: Path, spec: str) -> Optional[Path]:
+        spec = spec.split("?", 1)[0]
+        key = (str(importer.parent) if spec.startswith(".") else "", spec)
+        if key in self._memo:
+            hit = self._memo[key]
+        else:
+            self.lookups += 1
+            hit = None
+            if spec.startswith("."):
+                hit = self._file(os.path.normpath(os.path.join(key[0], spec)))
+            else:
+                for target in self._alias(spec) or ():
+                    hit = self._file(os.path.normpath(os.path.join(self.base, target)))
+                    if hit:
+                        break
+            self._memo[key] = hit
+        return Path(hit) if hit else None
+
+@dataclass
+class ImportEdge:
+    importer: str            # relative to the graph root
+    spec: str
+    line: int
+    target: Optional[str]    # relative path of the resolved file; None = broken
+
+class ImportGraph:
+    """Local import graph of a project: one resolver, every query answered from the edges."""
+
+    def __init__(self, root: Path, resolver: Optional[ModuleResolver] = None) -> None:
+        self.root = root
+        self.resolver = resolver or ModuleResolver(root)
+        self.modules: List[str] = []
+        self.edges: List[ImportEdge] = []
+        self._importers: Dict[str, List[str]] = {}
+        self._imports: Dict[str, List[str]] = {}
+
+    def _rel(self, p: Path) -> str:
+        try:
+            return p.relative_to(self.root).as_posix()
+        except ValueError:
+            return p.as_posix()
+
+    def add_file(self, path: Path, text: str) -> List[ImportEdge]:
+        rel = self._rel(path)
+        self.modules.append(rel)
+        lines = LineIndex(text)
+        added: List[ImportEdge] = []
+        for spec, pos in import_specs(text):
+            if not self.resolver.is_local(spec):
+                continue
+            hit = self.resolver.resolve(path, spec)
+            target = self._rel(hit) if hit else None
+            edge = ImportEdge(rel, spec, lines.line(pos), target)
+            added.append(edge)
+            if target:
+                self._importers.setdefault(target, []).append(rel)
+                self._imports.setdefault(rel, []).append(target)
+        self.edges.extend(added)
+        return added
+
+    def broken(self) -> List[ImportEdge]:
+        return [e for e in self.edges if e.target is None]
+
+    def dependents(self, module: str, transitive: bool = False) -> List[str]:
+        """Who imports ``module`` (directly, or through any chain if transitive)."""
+        seen: Set[str] = set()
+        todo = [module]
+        while todo:
+            for imp in self._importers.get(todo.pop(), ()):
+                if imp not in seen:
+                    seen.add(imp)
+                    if transitive:
+                        todo.append(imp)
+        seen.discard(module)
+        return sorted(seen)
+
+    def reachable(self, entries: Iterable[str]) -> Set[str]:
+        seen = set(e for e in entries if e in self._imports or e in self.modules)
+        todo = list(seen)
+        while todo:
+            for t in self._imports.get(todo.pop(), ()):
+                if t not in seen:
+                    seen.add(t)
+                    todo.append(t)
+        return seen
+
+    def orphans(self, entries: Iterable[str], within: str = "") -> List[str]:
+        """Modules under ``within`` not reachable from any entry point."""
+        live = self.reachable(entries)
+        return sorted(m for m in self.modules
+                      if m.startswith(within) and m not in live and not m.endswith(".d.ts"))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "modules": sorted(self.modules),
+            "edges": [{"from": e.importer, "to": e.target, "spec": e.spec, "line": e.line}
+                      for e in self.edges],
+        }
+
+# ── Batched file edits ───────────────────────────────────────────────────────
+
+class EditConflict(ValueError):
+    """Two edits staged for the same file overlap."""
+
+@dataclass(frozen=True)
+class Edit:
+    """Replace ``text[start:end]`` with ``text`` (``start == end`` inserts)."""
+    start: int
+    end: int
+    text: str
+
+def apply_edits(text: str, edits: Iterable[Edit]) -> str:
+    """Splice non-overlapping edits into ``text`` in one pass, ordered by offset.
+
+    Edits at the same insertion point keep the order they were given in.
+    """
+    ordered = sorted(edits, key=lambda e: (e.start, e.end))
+    out: List[str] = []
+    pos = 0
+    for e in ordered:
+        if e.start < pos or e.end < e.start or e.end > len(text):
+            raise EditConflict(f"edit [{e.start}:{e.end}] overlaps a previous edit or is out of range")
+        out.append(text[pos:e.start])
+        out.append(e.text)
+        pos = e.end
+    out.append(text[pos:])
+    return "".join(out)
+
+def split_conflicts(edits: Iterable[Edit]) -> Tuple[List[Edit], List[Tuple[Edit, Edit]]]:
+    """Keep every edit that does not overlap one kept before it, in submission order.
+
+    Returns the kept edits sorted by offset and the ``(kept, dropped)`` pairs for
+    the rest. An exact duplicate of a kept edit is dropped silently.
+    """
+    kept: List[Edit] = []
+    clashes: List[Tuple[Edit, Edit]] = []
+    for e in edits:
+        if e.end < e.start:
+            raise EditConflict(f"edit [{e.start}:{e.end}] has a negative length")
+        i = bisect.bisect_right(kept, (e.start, e.end), key=lambda k: (k.start, k.end))
+        prev = kept[i - 1] if i else None
+        nxt = kept[i] if i < len(kept) else None
+        if prev == e:
+            continue
+        if prev is not None and prev.end > e.start:
+            clashes.append((prev, e))
+        elif nxt is not None and e.end > nxt.start:
+            clashes.append((nxt, e))
+        else:
+            kept.insert(i, e)
+    return kept, clashes
+
+@dataclass
+class TextChange:
+    """One changed line range: ``old`` (lines starting at ``line``) became ``new``.
+
+    Offsets are into the text before the change. Keeping both sides makes a
+    change list small, replayable in either direction and renderable as a
+    diff later, without storing the files or a precomputed diff.
+    """
+    start: int
+    end: int
+    line: int
+    old: str
+    new: str
+
+def text_changes(old: str, new: str) -> List[TextChange]:
+    """Line-granular changes turning ``old`` into ``new``."""
+    if old == new:
+        return []
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    # common head/tail are trimmed first; SequenceMatcher only sees the middle
+    p = 0
+    while p < len(a) and p < len(b) and a[p] == b[p]:
+        p += 1
+    q = 0
+    while q < len(a) - p and q < len(b) - p and a[-1 - q] == b[-1 - q]:
+        q += 1
+    offsets = [0]
+    for line in a:
+        offsets.append(offsets[-1] + len(line))
+    out: List[TextChange] = []
+    sm = difflib.SequenceMatcher(None, a[p:len(a) - q], b[p:len(b) - q])
+    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+        if tag != "equal":
+            start, end = offsets[p + i1], offsets[p + i2]
+            out.append(TextChange(start, end, p + i1 + 1, old[start:end], "".join(b[p + j1:p + j2])))
+    return out
+
+def apply_changes(text: str, changes: Iterable[TextChange]) -> str:
+    """Replay ``changes`` on the text they were computed from."""
+    edits = []
+    for c in changes:
+        if text[c.start:c.end] != c.old:
+            raise EditConflict(f"text at line {c.line} no longer matches the recorded change")
+        edits.append(Edit(c.start, c.end, c.new))
+    return apply_edits(text, edits)
+
+def revert_changes(text: str, changes: Iterable[TextChange]) -> str:
+    """Undo ``changes`` on the text they produced."""
+    edits = []
+    shift = 0
+    for c in sorted(changes, key=lambda c: c.start):
+        start = c.start + shift
+        if text[start:start + len(c.new)] != c.new:
+            raise EditConflict(f"text at line {c.line} no longer matches the recorded change")
+        edits.append(Edit(start, start + len(c.new), c.old))
+        shift += len(c.new) - (c.end - c.start)
+    return apply_edits(text, edits)
+
+def render_changes(name: str, current: Optional[str], groups: List[List[TextChange]],
+                   applied: bool, context: int = 3) -> str:
+    """Unified diff of a file changed by ``groups`` (in order), rebuilt on demand.
+
+    ``current`` is the file's text now (None if missing) and ``applied`` says
+    whether the changes are already in it. When the file has moved on since,
+    the changes are shown without context lines instead.
+    """
+    try:
+        before = current or ""
+        if applied:
+            for g in reversed(groups):
+                before = revert_changes(before, g)
+        after = before
+        for g in groups:
+            after = apply_changes(after, g)
+    except EditConflict:
+        out = [f"# {name} changed since the report; showing the recorded changes without context\n"]
+        for g in groups:
+            for c in g:
+                out.append(f"@@ line {c.line} @@\n")
+                out.extend("-" + ln for ln in c.old.splitlines(keepends=True))
+                out.extend("+" + ln for ln in c.new.splitlines(keepends=True))
+        return "".join(ln if ln.endswith("\n") else ln + "\n" for ln in out)
+    return "".join(difflib.unified_diff(before.splitlines(keepends=True), after.splitlines(keepends=True),
+                                        f"a/{name}", f"b/{name}", n=context))
+
+def atomic_write(path: Path, text: str) -> None:
+    """Write via a temp file in the same directory + rename (keeps the file mode)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="\n") as fh:
+            fh.write(text)
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o7777)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+class _Staged:
+    __slots__ = ("original", "text", "pending")
+
+    def __init__(self, original: Optional[str]) -> None:
+        self.original = original            # None = file does not exist yet
+        self.text = original or ""
+        self.pending: List[Edit] = []
+
+class EditBatch:
+    """All the file changes of one fixer run, written once per file at commit.
+
+    Each file is read from disk once. Fixers either stage span edits with
+    ``edit`` (offsets into the text last returned by ``text``) or a whole
+    new content with ``write``; later fixers see earlier ones' changes
+    through ``text``. An edit overlapping one already staged for the same
+    file is not applied: ``edit`` returns it and it is recorded in
+    ``conflicts`` as ``(path, kept, dropped)``. ``commit`` backs up and atomically rewrites every
+    changed file once and, if any write fails, restores the ones already
+    written, so a run is applied entirely or not at all.
+    """
+
+    def __init__(self) -> None:
+        self._files: Dict[Path, _Staged] = {}
+        self.conflicts: List[Tuple[Path, Edit, Edit]] = []
+
+    def _staged(self, path: Path) -> _Staged:
+        st = self._files.get(path)
+        if st is None:
+            try:
+                original: Optional[str] = path.read_text(encoding="utf-8", errors="ignore")
+            except FileNotFoundError:
+                original = None
+            st = self._files[path] = _Staged(original)
+        return st
+
+    def text(self, path: Path) -> str:
+        st = self._staged(path)
+        if st.pending:
+            st.text = apply_edits(st.text, st.pending)
+            st.pending = []
+        return st.text
+
+    def exists(self, path: Path) -> bool:
+        st = self._files.get(path)
+        return path.exists() if st is None else (st.original is not None or bool(st.text))
+
+    def edit(self, path: Path, edits: Iterable[Edit]) -> List[Edit]:
+        """Stage span edits for ``path``; returns the ones dropped as conflicting."""
+        st = self._staged(path)
+        st.pending, clashes = split_conflicts([*st.pending, *edits])
+        self.conflicts.extend((path, kept, dropped) for kept, dropped in clashes)
+        return [dropped for _, dropped in clashes]
+
+    def write(self, path: Path, content: str) -> None:
+        st = self._staged(path)
+        st.pending = []
+        st.text = content
+
+    def original(self, path: Path) -> Optional[str]:
+        return self._staged(path).original
+
+    def changes(self, path: Path) -> List[TextChange]:
+        """What this batch changes in ``path``, relative to the file on disk."""
+        return text_changes(self._staged(path).original or "", self.text(path))
+
+    def changed(self) -> List[Path]:
+        out = []
+        for p, st in self._files.items():
+            text = self.text(p)
+            if (text != st.original) if st.original is not None else bool(text):
+                out.append(p)
+        return sorted(out)
+
+    def commit(self, backup: Optional[Callable[[Path], None]] = None) -> List[Path]:
+        """Write every changed file once; all-or-nothing. Returns the files written."""
+        paths = self.changed()                    # flushes pending edits (may raise EditConflict)
+        if backup:
+            for p in paths:                       # also files about to be created
+                backup(p)
+        done: List[Path] = []
+        try:
+            for p in paths:
+                atomic_write(p, self._files[p].text)
+                done.append(p)
+        except BaseException:
+            for p in done:
+                original = self._files[p].original
+                if original is None:
+                    p.unlink(missing_ok=True)
+                else:
+                    atomic_write(p, original)
+            raise
+        return done
+
+# ── Fix planning ─────────────────────────────────────────────────────────────
+
+class FixPlan:
+    """
+    One audit shared by every fixer of a run, and the re-scan after them.
+
+    The tree is walked once (a FileWalk over `groups`) and every file is read
+    through `batch`, so the audit, the fixers and the verification pass all
+    see the same in-memory corpus, including what earlier fixers staged.
+    Per-file scanner results are memoised by (kind, path): after the fixers
+    ran, rescan() forgets the entries of the files the batch changed, so
+    auditing again through the plan only re-scans those. Files created by
+    a fixer join every group whose patterns they match.
+    """
+
+    def __init__(self, root: Path, groups: Dict[str, Iterable[str]],
+                 skip_dirs: Iterable[str] = SKIP_DIRS, gitignore: bool = True) -> None:
+        self.root = root
+        self.batch = EditBatch()
+        self.scans = 0                      # per-file scanner runs (memo misses)
+        groups = {name: list(globs) for name, globs in groups.items()}
+        self._skip = frozenset(skip_dirs)
+        self._walk = FileWalk(root, groups, self._skip, gitignore)
+        self._groups = {name: [glob_regex(g) for g in globs] for name, globs in groups.items()}
+        self._results: Dict[Tuple[str, Path], Any] = {}
+
+    def text(self, path: Path) -> str:
+        try:
+            return self.batch.text(path)
+        except OSError:
+            return ""
+
+    def files(self, group: str) -> List[Path]:
+        """The group's files as walked, plus the ones fixers created that match it."""
+        out = self._walk.files(group)
+        for p in self.batch.changed():
+            if self.batch.original(p) is not None:
+                continue
+            try:
+                rel = p.relative_to(self.root).as_posix()
+            except ValueError:
+                continue
+            if self._skip.isdisjoint(rel.split("/")[:-1]) and \
+                    any(rx.fullmatch(rel) for rx in self._groups.get(group, ())):
+                out.append(p)
+        return sorted(set(out))
+
+    def result(self, kind: str, path: Path, compute: Callable[[], Any]) -> Any:
+        key = (kind, path)
+        if key not in self._results:
+            self.scans += 1
+            self._results[key] = compute()
+        return self._results[key]
+
+    def rescan(self) -> List[Path]:
+        """Drop the results of the files the batch changed; returns those files."""
+        changed = self.batch.changed()
+        dirty = set(changed)
+        self._results = {k: v for k, v in self._results.items() if k[1] not in dirty}
+        self.scans = 0
+        return changed
+
+# ── Backup store ─────────────────────────────────────────────────────────────
+
+def _write_bytes(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+class BackupStore:
+    """Content-addressed backups shared by every run of a tool.
+
+    Layout under ``dir``::
+
+        objects/ab/cdef...   loose blobs, named by the sha1 of their content
+        pack/<sha1>.pack     zlib-compressed blobs, written by ``gc``
+        pack/objects.idx     {"pack": name, "objects": {sha1: [offset, length]}}
+        runs/<run id>.json   one manifest per run: {path: {sha, mode}}
+        runs/<run id>.pending  reserves the id until the first save()
+
+    A content backed up by many runs is stored once. ``sha: null`` marks a
+    file the run created, so restoring that run deletes it. Restore touches
+    only the files listed in the manifest. ``gc`` writes each pack under a new
+    name and switches to it by replacing the idx, so a crash leaves either the
+    old or the new pack in use, never a half-written one.
+    """
+
+    def __init__(self, dir: Path, root: Path) -> None:
+        self.dir = dir
+        self.root = root.resolve()
+        self._index: Optional[Dict[str, List[int]]] = None
+        self._pack = "objects.pack"
+
+    # blobs
+    def _loose(self, digest: str) -> Path:
+        return self.dir / "objects" / digest[:2] / digest[2:]
+
+    def _pack_index(self) -> Dict[str, List[int]]:
+        if self._index is None:
+            try:
+                data = json.loads((self.dir / "pack" / "objects.idx").read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if "objects" in data:
+                self._pack, self._index = data["pack"], data["objects"]
+            else:                                 # idx from before packs were versioned
+                self._pack, self._index = "objects.pack", data
+        return self._index
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha1(data).hexdigest()
+        loose = self._loose(digest)
+        if not loose.exists() and digest not in self._pack_index():
+            _write_bytes(loose, data)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        loose = self._loose(digest)
+        if loose.exists():
+            data = loose.read_bytes()
+        else:
+            entry = self._pack_index().get(digest)
+            if entry is None:
+                raise KeyError(f"backup blob {digest} not found in {self.dir}")
+            with open(self.dir / "pack" / self._pack, "rb") as fh:
+                fh.seek(entry[0])
+                data = zlib.decompress(fh.read(entry[1]))
+        if hashlib.sha1(data).hexdigest() != digest:
+            raise ValueError(f"backup blob {digest} is corrupt")
+        return data
+
+    # runs
+    def start(self, tool: str) -> "BackupRun":
+        """New run; its id is reserved on disk so runs started in the same second don't collide."""
+        runs = self.dir / "runs"
+        runs.mkdir(parents=True, exist_ok=True)
+        base = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_id, n = base, 1
+        while True:
+            if not (runs / f"{run_id}.json").exists():
+                try:
+                    os.close(os.open(runs / f"{run_id}.pending", os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                    return BackupRun(self, run_id, tool)
+                except FileExistsError:
+                    pass
+            n += 1
+            run_id = f"{base}-{n}"
+
+    @staticmethod
+    def _run_key(run_id: str) -> Tuple[str, int]:
+        base, _, n = run_id.partition("-")
+        return base, int(n) if n.isdigit() else 1
+
+    def runs(self) -> List[str]:
+        """Run ids, oldest first."""
+        return sorted((p.stem for p in (self.dir / "runs").glob("*.json")), key=self._run_key)
+
+    def manifest(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Manifest of ``run_id`` (default: the latest run)."""
+        if run_id is None:
+            ids = self.runs()
+            if not ids:
+                raise KeyError(f"no backup runs in {self.dir}")
+            run_id = ids[-1]
+        path = self.dir / "runs" / f"{run_id}.json"
+        if not path.exists():
+            raise KeyError(f"backup run {run_id!r} not found in {self.dir}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def restore(self, run_id: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Put every file of the run back; returns [(path, "restored" | "removed")]."""
+        done: List[Tuple[str, str]] = []
+        for rel, entry in sorted(self.manifest(run_id)["files"].items()):
+            path = self.root / rel
+            if entry["sha"] is None:
+                if path.exists():
+                    path.unlink()
+                    done.append((rel, "removed"))
+                continue
+            _write_bytes(path, self.get(entry["sha"]))
+            os.chmod(path, entry["mode"])
+            done.append((rel, "restored"))
+        return done
+
+    def gc(self, keep: int) -> Tuple[int, int]:
+        """Drop all but the ``keep`` latest runs and repack the blobs they still use.
+
+        While a run is still pending its blobs are not in any manifest yet, so
+        every stored blob is kept. Returns (runs removed, blobs dropped).
+        """
+        if keep < 0:
+            raise ValueError(f"keep must be >= 0, got {keep}")
+        ids = self.runs()
+        old = ids[:max(0, len(ids) - keep)]
+        for run_id in old:
+            (self.dir / "runs" / f"{run_id}.json").unlink()
+        live = {e["sha"] for run_id in ids[len(old):]
+                for e in self.manifest(run_id)["files"].values() if e["sha"]}
+        objects = self.dir / "objects"
+        loose = {p.parent.name + p.name: p for p in objects.glob("??/*") if p.is_file()}
+        stored = set(loose) | set(self._pack_index())
+        if any((self.dir / "runs").glob("*.pending")):
+            live = stored
+
+        pack: List[bytes] = []
+        index: Dict[str, List[int]] = {}
+        offset = 0
+        for digest in sorted(live & stored):
+            blob = zlib.compress(self.get(digest), 9)
+            index[digest] = [offset, len(blob)]
+            pack.append(blob)
+            offset += len(blob)
+        data = b"".join(pack)
+        name = hashlib.sha1(data).hexdigest() + ".pack"
+        _write_bytes(self.dir / "pack" / name, data)
+        _write_bytes(self.dir / "pack" / "objects.idx",
+                     json.dumps({"pack": name, "objects": index}).encode("utf-8"))
+        self._pack, self._index = name, index
+        for p in (self.dir / "pack").glob("*.pack"):
+            if p.name != name:
+                p.unlink()
+        for p in loose.values():
+            p.unlink()
+        for d in objects.glob("??"):
+            if d.is_dir() and not any(d.iterdir()):
+                d.rmdir()
+        return len(old), len(stored - live)
+
+class BackupRun:
+    """The files one run is about to overwrite; callable as ``EditBatch.commit``'s backup hook."""
+
+    def __init__(self, store: BackupStore, run_id: str, tool: str) -> None:
+        self.store = store
+        self.id = run_id
+        self.tool = tool
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    def __call__(self, path: Path) -> None:
+        self.add(path)
+
+    def add(self, path: Path) -> None:
+        """Record the current content of ``path`` (first call per file wins)."""
+        try:
+            rel = path.resolve().relative_to(self.store.root).as_posix()
+        except ValueError:
+            rel = path.resolve().as_posix()
+        if rel in self.files:
+            return
+        if path.exists():
+            self.files[rel] = {"sha": self.store.put(path.read_bytes()),
+                               "mode": path.stat().st_mode & 0o7777}
+        else:
+            self.files[rel] = {"sha": None, "mode": None}
+
+    def save(self) -> Optional[Path]:
+        """Write the manifest; returns its path, or None when nothing was backed up.
+
+        May be called again after more add()s; each call rewrites the manifest.
+        """
+        pending = self.store.dir / "runs" / f"{self.id}.pending"
+        if not self.files:
+            pending.unlink(missing_ok=True)
+            return None
+        path = self.store.dir / "runs" / f"{self.id}.json"
+        payload = {"id": self.id, "tool": self.tool, "created": datetime.now().isoformat(),
+                   "files": self.files}
+        _write_bytes(path, json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8"))
+        pending.unlink(missing_ok=True)
+        return path
+
 def is_truthy_env(value: Optional[str]) -> bool:
     if value is None:
         return False
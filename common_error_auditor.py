@@ -13,6 +13,8 @@ from dataclasses import dataclass, asdict
 from pathlib import Path
 from typing import Iterable, List, Dict, Optional, Tuple
 
+from common import ImportGraph, LineIndex
+
 
 @dataclass
 class Finding:
@@ -46,11 +48,6 @@ EMPTY_HANDLER_RE = re.compile(
     re.S
 )
 
-IMPORT_RE = re.compile(
-    r"^\s*import\s+(?:type\s+)?(?:[\w*\s{},]+from\s+)?['\"]([^'\"]+)['\"];?\s*$",
-    re.M
-)
-
 # Captura uso de identificadores em rotas comuns (element/component)
 ROUTE_COMPONENT_RE = re.compile(
     r"(?:component\s*=\s*\{([A-Z][A-Za-z0-9_]*)\})|(?:element\s*=\s*\{<([A-Z][A-Za-z0-9_]*)\s*/?>\})"
@@ -87,10 +84,6 @@ def iter_files(root: Path, sub: Optional[str] = None, exts: Optional[set] = None
                     yield p
 
 
-def line_for_pos(text: str, pos: int) -> int:
-    return text.count("\n", 0, pos) + 1
-
-
 def excerpt_at_line(text: str, line: int, radius: int = 2) -> str:
     lines = text.splitlines()
     if not lines:
@@ -108,6 +101,7 @@ def check_placeholders(root: Path) -> List[Finding]:
     findings: List[Finding] = []
     for p in iter_files(root, "client/src/pages", {".tsx"}):
         t = read_text(p)
+        lines = LineIndex(t)
         # export default ausente
         if "export default" not in t:
             findings.append(Finding(
@@ -133,7 +127,7 @@ def check_placeholders(root: Path) -> List[Finding]:
         for rx, msg in PLACEHOLDER_PATTERNS:
             m = rx.search(t)
             if m:
-                ln = line_for_pos(t, m.start())
+                ln = lines.line(m.start())
                 findings.append(Finding(
                     kind="placeholder",
                     severity="warn",
@@ -156,62 +150,24 @@ def check_placeholders(root: Path) -> List[Finding]:
     return findings
 
 
-def resolve_import(from_file: Path, spec: str, root: Path) -> Optional[Path]:
-    """
-    Resolve imports locais simples:
-    - ./foo, ../bar, @/x (alias para client/src)
-    """
-    if spec.startswith("http") or spec.startswith("https"):
-        return None
-    if spec.startswith("@/"):
-        # alias para client/src
-        cand = root / "client/src" / spec[2:]
-        # tenta extensões
-        for ext in [".ts", ".tsx", ".js", ".jsx"]:
-            if cand.with_suffix(ext).exists():
-                return cand.with_suffix(ext)
-        # index
-        for ext in [".ts", ".tsx", ".js", ".jsx"]:
-            if (cand / f"index{ext}").exists():
-                return cand / f"index{ext}"
-        return cand if cand.exists() else None
-
-    if spec.startswith("."):
-        cand = (from_file.parent / spec).resolve()
-        # se já tem extensão
-        if cand.exists():
-            return cand
-        for ext in [".ts", ".tsx", ".js", ".jsx", ".json"]:
-            if cand.with_suffix(ext).exists():
-                return cand.with_suffix(ext)
-        # pasta com index
-        for ext in [".ts", ".tsx", ".js", ".jsx"]:
-            if (cand / f"index{ext}").exists():
-                return cand / f"index{ext}"
-        return None
-
-    # pacote npm (não validamos aqui)
-    return None
-
-
 def check_imports(root: Path) -> List[Finding]:
+    """Imports locais quebrados em client/src, a partir do grafo de imports compartilhado (common.ImportGraph)."""
     findings: List[Finding] = []
+    graph = ImportGraph(root)
     for p in iter_files(root, "client/src", TSX_EXTS):
         t = read_text(p)
-        for m in IMPORT_RE.finditer(t):
-            spec = m.group(1)
-            resolved = resolve_import(p, spec, root)
-            if resolved is None and (spec.startswith(".") or spec.startswith("@/")):
-                ln = line_for_pos(t, m.start())
-                findings.append(Finding(
-                    kind="broken_import",
-                    severity="error",
-                    file=relpath(root, p),
-                    line=ln,
-                    message=f"Import local não resolvido: '{spec}'",
-                    hint="Verifique caminho/alias e se o arquivo existe.",
-                    excerpt=excerpt_at_line(t, ln),
-                ))
+        for e in graph.add_file(p, t):
+            if e.target is not None:
+                continue
+            findings.append(Finding(
+                kind="broken_import",
+                severity="error",
+                file=relpath(root, p),
+                line=e.line,
+                message=f"Import local não resolvido: '{e.spec}'",
+                hint="Verifique caminho/alias e se o arquivo existe.",
+                excerpt=excerpt_at_line(t, e.line),
+            ))
     return findings
 
 
@@ -227,12 +183,13 @@ def check_app_routes_undefined(root: Path) -> List[Finding]:
     declared = set(re.findall(r"\b(?:const|function)\s+([A-Z][A-Za-z0-9_]*)\b", t))
 
     findings: List[Finding] = []
+    lines = LineIndex(t)
     for m in ROUTE_COMPONENT_RE.finditer(t):
         comp = m.group(1) or m.group(2)
         if not comp:
             continue
         if comp not in imported and comp not in declared:
-            ln = line_for_pos(t, m.start())
+            ln = lines.line(m.start())
             findings.append(Finding(
                 kind="route_component_not_defined",
                 severity="error",
@@ -325,7 +282,7 @@ def check_index_html_umami(root: Path) -> List[Finding]:
         ln = 1
         idx = t.find('<script src="/umami"')
         if idx != -1:
-            ln = line_for_pos(t, idx)
+            ln = LineIndex(t).line(idx)
         return [Finding(
             kind="umami_script_module",
             severity="info",
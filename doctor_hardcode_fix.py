@@ -5,6 +5,8 @@ import argparse
 import re
 from pathlib import Path
 
+from common import BackupRun, BackupStore
+
 TARGETS = [
     "client/src/const.ts",
     "client/src/lib/api.ts",
@@ -19,13 +21,7 @@ def write(p: Path, s: str) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(s, encoding="utf-8", newline="\n")
 
-def backup(p: Path, backups: Path) -> None:
-    backups.mkdir(parents=True, exist_ok=True)
-    dst = backups / (p.as_posix().replace("/", "__") + ".bak")
-    if not dst.exists():
-        dst.write_text(read(p), encoding="utf-8")
-
-def ensure_runtime_ts(root: Path, apply: bool, logs: list[str]) -> None:
+def ensure_runtime_ts(root: Path, apply: bool, logs: list[str], run: BackupRun | None) -> None:
     runtime = root / "client/src/config/runtime.ts"
     if runtime.exists():
         return
@@ -39,6 +35,8 @@ export const API_BASE_URL =
   import.meta.env.VITE_API_URL || "/api";
 """
     if apply:
+        run.add(runtime)
+        run.save()                     # manifesto no disco antes de qualquer escrita
         write(runtime, content)
         logs.append("[create] client/src/config/runtime.ts")
     else:
@@ -173,17 +171,38 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--root", default=".")
     ap.add_argument("--apply", action="store_true")
+    ap.add_argument("--restore", nargs="?", const="", default=None, metavar="RUN",
+                    help="desfaz um --apply (id da execução; padrão: a mais recente)")
+    ap.add_argument("--gc", action="store_true", help="apaga backups antigos (mantém --keep-runs)")
+    ap.add_argument("--keep-runs", type=int, default=10, metavar="N")
     args = ap.parse_args()
+    if args.keep_runs < 0:
+        ap.error("--keep-runs precisa ser >= 0")
 
     root = Path(args.root).resolve()
     if not (root / "package.json").exists():
         print("ERRO: rode na raiz do projeto (onde fica package.json).")
         raise SystemExit(2)
 
-    backups = root / ".doctor_backups"
+    backups = BackupStore(root / ".doctor_backups", root)
+    if args.restore is not None:
+        try:
+            done = backups.restore(args.restore or None)
+        except KeyError as e:
+            print(f"ERRO: {e.args[0]}")
+            raise SystemExit(2)
+        for rel, action in done:
+            print(f"[{'restore' if action == 'restored' else 'remove'}] {rel}")
+        return
+    if args.gc:
+        runs, blobs = backups.gc(args.keep_runs)
+        print(f"[gc] {runs} execução(ões) removida(s), {blobs} blob(s) descartado(s)")
+        return
+
+    run = backups.start("doctor_hardcode_fix") if args.apply else None
     logs: list[str] = []
 
-    ensure_runtime_ts(root, args.apply, logs)
+    ensure_runtime_ts(root, args.apply, logs, run)
 
     for rel in TARGETS:
         p = root / rel
@@ -212,7 +231,8 @@ def main():
         if changed and out != txt:
             print(f"[patch] {rel}: {changed} alteração(ões)")
             if args.apply:
-                backup(p, backups)
+                run.add(p)
+                run.save()
                 write(p, out)
             logs.append(f"[patch] {rel}: {changed}")
         elif changed:
@@ -222,7 +242,8 @@ def main():
         print("\nRodou em DRY-RUN. Para aplicar de verdade:")
         print("  python doctor_hardcode_fix.py --apply")
     else:
-        print(f"\nOK. Backups em: {backups}")
+        manifest = run.save()
+        print(f"\nOK. Backups em: {manifest or backups.dir} (desfazer: --restore)")
         print("Agora rode:")
         print("  pnpm check")
         print("  pnpm dev")
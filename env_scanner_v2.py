@@ -26,8 +26,8 @@ from pathlib import Path
 from typing import Dict, List, Set
 
 from common import (
-    Finding, ensure_reports_dir, findings_summary, log, now_iso, safe_rel,
-    write_json, write_text, read_text, exit_for_strict
+    FileWalk, Finding, ensure_reports_dir, findings_summary, log, now_iso, safe_rel,
+    write_json, write_text, read_text, exit_for_strict, LineIndex
 )
 
 ROOT = Path(".").resolve()
@@ -54,13 +54,9 @@ COMMON_KEY_HINTS = {
     "PORT": "3001",
 }
 
-def iter_files(root: Path, ignore_dirs: Set[str]) -> List[Path]:
+def iter_files(root: Path, ignore_dirs: Set[str], gitignore: bool = True) -> List[Path]:
     out: List[Path] = []
-    for p in root.rglob("*"):
-        if p.is_dir():
-            continue
-        if any(part in ignore_dirs for part in p.parts):
-            continue
+    for p in FileWalk(root, skip_dirs=ignore_dirs, gitignore=gitignore).all():
         if p.suffix.lower() in IGNORE_FILES_SUFFIX:
             continue
         if p.suffix.lower() not in TEXT_EXT and p.name != "package.json":
@@ -84,26 +80,28 @@ def main() -> None:
     ap.add_argument("--fix", action="store_true", help="Write .env.example and .env.production.sample")
     ap.add_argument("--dry-run", action="store_true", help="Don't write files; only report.")
     ap.add_argument("--ignore-dir", action="append", default=[], help="Additional dir names to ignore (repeatable).")
+    ap.add_argument("--no-gitignore", action="store_true", help="Also scan paths listed in .gitignore.")
     args = ap.parse_args()
 
     ignore_dirs = set(DEFAULT_IGNORE_DIRS) | set(args.ignore_dir)
 
-    files = iter_files(ROOT, ignore_dirs)
+    files = iter_files(ROOT, ignore_dirs, not args.no_gitignore)
 
     hits: Dict[str, Dict] = {}
     localhost_hits: List[Dict] = []
 
     for fp in files:
         txt = fp.read_text(encoding="utf-8", errors="ignore")
+        lines = LineIndex(txt)
         # backend
         for m in RE_PROCENV_DOT.finditer(txt):
             key = m.group(1)
-            line = txt.count("\n", 0, m.start()) + 1
+            line = lines.line(m.start())
             add_hit(hits, key, fp, line)
             hits[key]["kind"] = "backend"
         for m in RE_PROCENV_BRACKET.finditer(txt):
             key = m.group(1)
-            line = txt.count("\n", 0, m.start()) + 1
+            line = lines.line(m.start())
             add_hit(hits, key, fp, line)
             hits[key]["kind"] = "backend"
         # frontend
@@ -111,12 +109,12 @@ def main() -> None:
             key = m.group(1)
             if not key.startswith("VITE_"):
                 continue
-            line = txt.count("\n", 0, m.start()) + 1
+            line = lines.line(m.start())
             add_hit(hits, key, fp, line)
             hits[key]["kind"] = "frontend"
         # localhost hints
         for m in RE_LOCALHOST.finditer(txt):
-            line = txt.count("\n", 0, m.start()) + 1
+            line = lines.line(m.start())
             localhost_hits.append({"file": safe_rel(fp), "line": line, "match": m.group(0)})
 
     # sort keys for stable outputs
@@ -20,6 +20,8 @@ import argparse
 from pathlib import Path
 from datetime import datetime
 
+from common import FileWalk
+
 # ─────────────────────────────────────────────
 #  CORES
 # ─────────────────────────────────────────────
@@ -559,13 +561,18 @@ def check_page(filepath, checks):
     return results
 
 
+_WALKS = {}
+
+
 def find_file(root, patterns):
-    """Encontra arquivo por padrões de nome."""
+    """Encontra arquivo por padrões de nome (uma única travessia do repo por execução)."""
+    walk = _WALKS.get(root)
+    if walk is None:
+        walk = _WALKS[root] = FileWalk(root)
     for pattern in patterns:
-        # Busca direta
-        for path in root.rglob(pattern):
-            if "node_modules" not in str(path):
-                return path
+        found = walk.named(pattern)
+        if found:
+            return found[0]
     return None
 
 
@@ -2,11 +2,17 @@
 """
 nav_autofix_20x10.py — Auto-fix de navegação/rotas/páginas (React+Vite+TS + wouter)
 
-DRY-RUN por padrão. Use --apply para aplicar e criar backups.
+DRY-RUN por padrão. Use --apply para aplicar e criar backups (em .navfix_backups/,
+deduplicados por conteúdo; --restore desfaz a última execução, --gc limpa as antigas).
+
+Sem --audit, a auditoria do audit_nav_best roda em memória: o mesmo plano (arquivos
+e textos já lidos) alimenta os fixes, e no fim só os arquivos alterados são
+re-auditados para medir o resultado ("verification" no relatório).
 
 Uso exemplo (20/10):
   python nav_autofix_20x10.py --fix-links --create-pages --add-routes --enforce-login-gateway
   python nav_autofix_20x10.py --apply --fix-links --create-pages --add-routes --enforce-login-gateway
+  python nav_autofix_20x10.py --show-diff client/src/App.tsx   (diff sob demanda do último relatório)
 """
 
 from __future__ import annotations
@@ -16,27 +22,26 @@ import datetime as _dt
 import difflib
 import json
 import re
-import shutil
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
+import audit_nav_best
+from common import BackupStore, Edit, EditBatch, FixPlan, TextChange, render_changes
 
-SKIP_DIRS = {
-    "node_modules", "dist", "build", ".git", ".turbo", ".next",
-    ".vite", ".cache", ".pnpm", ".repo_doctor", ".doctor_backups",
-    "nav_audit", "nav_fix"
-}
 
-DEFAULT_AUDIT_JSON = "nav_audit/nav_audit.json"
+BACKUP_DIR = ".navfix_backups"
 
-WOUTER_LINK_HREF_RE = re.compile(r'(<Link\\b[^>]*\\bhref\\s*=\\s*["\\\'])([^"\\\']+)(["\\\'])', re.IGNORECASE)
-ANCHOR_HREF_RE = re.compile(r'(<a\\b[^>]*\\bhref\\s*=\\s*["\\\'])([^"\\\']+)(["\\\'])', re.IGNORECASE)
-SETLOC_RE = re.compile(r'(setLocation\\(\\s*["\\\'])([^"\\\']+)(["\\\']\\s*\\))', re.IGNORECASE)
+WOUTER_LINK_HREF_RE = re.compile(r'(<Link\b[^>]*\bhref\s*=\s*["\'])([^"\']+)(["\'])', re.IGNORECASE)
+ANCHOR_HREF_RE = re.compile(r'(<a\b[^>]*\bhref\s*=\s*["\'])([^"\']+)(["\'])', re.IGNORECASE)
+SETLOC_RE = re.compile(r'(setLocation\(\s*["\'])([^"\']+)(["\']\s*\))', re.IGNORECASE)
+# regexes cujo grupo 2 é o href reescrito por apply_rewrite_in_file
+LINK_REWRITE_RES = (WOUTER_LINK_HREF_RE, ANCHOR_HREF_RE, SETLOC_RE)
 
-DIRECT_OAUTH_UI_RE = re.compile(r'(["\\\'])(/api/auth/(google|apple)[^"\\\']*)(["\\\'])', re.IGNORECASE)
+DIRECT_OAUTH_UI_RE = re.compile(r'(["\'])(/api/auth/(google|apple)[^"\']*)(["\'])', re.IGNORECASE)
 
-ROUTE_FALLBACK_NO_PATH_RE = re.compile(r"<Route\\b(?![^>]*\\bpath=)[^>]*>", re.IGNORECASE)
+ROUTE_FALLBACK_NO_PATH_RE = re.compile(r"<Route\b(?![^>]*\bpath=)[^>]*>", re.IGNORECASE)
 
 ROUTE_FILE_HINTS = [
     "client/src/App.tsx",
@@ -48,26 +53,10 @@ ROUTE_FILE_HINTS = [
 ]
 
 
-def now_tag() -> str:
-    return _dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-
-
 def read_text(p: Path) -> str:
     return p.read_text(encoding="utf-8", errors="ignore")
 
 
-def write_text(p: Path, s: str) -> None:
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(s, encoding="utf-8", newline="\\n")
-
-
-def backup_file(p: Path, backup_dir: Path) -> None:
-    backup_dir.mkdir(parents=True, exist_ok=True)
-    dst = backup_dir / p.as_posix().replace("/", "__")
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(p, dst)
-
-
 def normalize_path(p: str) -> str:
     if not p:
         return p
@@ -85,9 +74,9 @@ def is_external(href: str) -> bool:
 
 
 def kebab(s: str) -> str:
-    s2 = re.sub(r"([a-z0-9])([A-Z])", r"\\1-\\2", s)
+    s2 = re.sub(r"([a-z0-9])([A-Z])", r"\1-\2", s)
     s2 = s2.replace("_", "-")
-    s2 = re.sub(r"[^a-zA-Z0-9\\-]+", "-", s2)
+    s2 = re.sub(r"[^a-zA-Z0-9\-]+", "-", s2)
     s2 = re.sub(r"-{2,}", "-", s2).strip("-")
     return s2.lower()
 
@@ -120,21 +109,17 @@ def classify_route(path: str) -> str:
     return "PUBLIC"
 
 
-def find_route_file(root: Path) -> Optional[Path]:
+def find_route_file(root: Path, plan: FixPlan) -> Optional[Path]:
     for rel in ROUTE_FILE_HINTS:
         p = root / rel
         if p.exists():
-            txt = read_text(p)
+            txt = plan.text(p)
             if "<Route" in txt and "<Switch" in txt:
                 return p
-    # fallback scan
-    for gp in ["client/src/**/*.tsx", "src/**/*.tsx"]:
-        for p in root.glob(gp):
-            if not p.is_file():
-                continue
-            if any(part in SKIP_DIRS for part in p.parts):
-                continue
-            txt = read_text(p)
+    # fallback: arquivos .tsx do frontend já listados (e lidos) pela auditoria
+    for p in plan.files("frontend"):
+        if p.suffix == ".tsx":
+            txt = plan.text(p)
             if "<Route" in txt and "<Switch" in txt:
                 return p
     return None
@@ -161,30 +146,6 @@ def load_audit_json(root: Path, audit_json: Path) -> Dict:
     return json.loads(p.read_text(encoding="utf-8", errors="ignore"))
 
 
-def iter_code_files(root: Path) -> List[Path]:
-    out: List[Path] = []
-    for gp in ["client/src/**/*.ts", "client/src/**/*.tsx", "src/**/*.ts", "src/**/*.tsx"]:
-        for p in root.glob(gp):
-            if not p.is_file():
-                continue
-            if any(part in SKIP_DIRS for part in p.parts):
-                continue
-            out.append(p)
-    return sorted(set(out))
-
-
-def iter_page_files(root: Path) -> List[Path]:
-    out: List[Path] = []
-    for gp in ["client/src/pages/**/*.tsx", "src/pages/**/*.tsx"]:
-        for p in root.glob(gp):
-            if not p.is_file():
-                continue
-            if any(part in SKIP_DIRS for part in p.parts):
-                continue
-            out.append(p)
-    return sorted(set(out))
-
-
 @dataclass
 class Fix:
     file: str
@@ -232,40 +193,32 @@ def propose_href_fix(href: str, route_paths: Set[str]) -> Optional[Tuple[str, st
     return None
 
 
-def apply_rewrite_in_file(path: Path, replacements: List[Tuple[str, str]], apply: bool, backup_dir: Path) -> List[Fix]:
-    if not replacements:
+def apply_rewrite_in_file(path: Path, replacements: List[Tuple[str, str]], batch: EditBatch) -> List[Fix]:
+    """Troca hrefs old -> new em <Link>, <a> e setLocation: uma varredura por regex e
+    um Edit por ocorrência, nos offsets do href (sem replace global no texto)."""
+    wanted: Dict[str, str] = {}
+    for old, new in replacements:
+        if old != new:
+            wanted.setdefault(old, new)
+    if not wanted:
         return []
-    txt = read_text(path)
-    original = txt
+    txt = batch.text(path)
 
-    def _replace_one(pattern, t: str, old: str, new: str) -> str:
-        def sub(m):
-            a, href, b = m.group(1), m.group(2), m.group(3)
-            if href == old:
-                return a + new + b
-            return m.group(0)
-        return pattern.sub(sub, t)
+    edits: Dict[str, List[Edit]] = {}
+    for pattern in LINK_REWRITE_RES:
+        for m in pattern.finditer(txt):
+            new = wanted.get(m.group(2))
+            if new is not None:
+                edits.setdefault(m.group(2), []).append(Edit(m.start(2), m.end(2), new))
 
-    fixes: List[Fix] = []
-    for old, new in replacements:
-        if old == new:
-            continue
-        new_txt = txt
-        new_txt = _replace_one(WOUTER_LINK_HREF_RE, new_txt, old, new)
-        new_txt = _replace_one(ANCHOR_HREF_RE, new_txt, old, new)
-        new_txt = _replace_one(SETLOC_RE, new_txt, old, new)
-        if new_txt != txt:
-            fixes.append(Fix(path.as_posix(), "fix_link", old, new, "substituição conservadora em href/setLocation"))
-            txt = new_txt
-
-    if txt != original and apply:
-        backup_file(path, backup_dir)
-        write_text(path, txt)
-    return fixes
+    dropped = set(batch.edit(path, [e for es in edits.values() for e in es]))
+    return [Fix(path.as_posix(), "fix_link", old, new, "substituição conservadora em href/setLocation")
+            for old, new in wanted.items()
+            if any(e not in dropped for e in edits.get(old, []))]
 
 
-def enforce_login_gateway_in_file(path: Path, apply: bool, backup_dir: Path) -> List[Fix]:
-    txt = read_text(path)
+def enforce_login_gateway_in_file(path: Path, batch: EditBatch) -> List[Fix]:
+    txt = batch.text(path)
     original = txt
 
     def sub(m):
@@ -278,18 +231,17 @@ def enforce_login_gateway_in_file(path: Path, apply: bool, backup_dir: Path) ->
         fixes.append(Fix(path.as_posix(), "login_gateway", "/api/auth/*", "/login", "bloquear bypass do provedor na UI"))
         txt = new_txt
 
-    if txt != original and apply:
-        backup_file(path, backup_dir)
-        write_text(path, txt)
+    if txt != original:
+        batch.write(path, txt)
     return fixes
 
 
-def create_stub_page(page_path: Path, route: str, apply: bool) -> Optional[Fix]:
-    if page_path.exists():
+def create_stub_page(page_path: Path, route: str, batch: EditBatch) -> Optional[Fix]:
+    if batch.exists(page_path):
         return None
 
     stem = page_path.stem
-    title = re.sub(r"([a-z])([A-Z])", r"\\1 \\2", stem).strip()
+    title = re.sub(r"([a-z])([A-Z])", r"\1 \2", stem).strip()
 
     # usamos format() e dobramos chaves {{ }} para TSX
     content = """import {{ Link, useLocation }} from "wouter";
@@ -347,22 +299,21 @@ export default function {comp}() {{
 }}
 """.format(comp=stem, title=title, route=route)
 
-    if apply:
-        write_text(page_path, content)
+    batch.write(page_path, content)
 
     return Fix(page_path.as_posix(), "create_page", "", route, "stub TSX criado (layout padrão)")
 
 
-def add_routes_to_app(app_file: Path, routes_to_add: List[Tuple[str, str]], apply: bool, backup_dir: Path) -> List[Fix]:
+def add_routes_to_app(app_file: Path, routes_to_add: List[Tuple[str, str]], batch: EditBatch) -> List[Fix]:
     if not routes_to_add:
         return []
-    txt = read_text(app_file)
+    txt = batch.text(app_file)
     original = txt
 
     lines = []
     for path, comp in routes_to_add:
         lines.append(f'      <Route path="{path}" component={{{comp}}} />')
-    insertion = "\\n" + "\\n".join(lines) + "\\n"
+    insertion = "\n" + "\n".join(lines) + "\n"
 
     m_fallback = ROUTE_FALLBACK_NO_PATH_RE.search(txt)
     if m_fallback:
@@ -376,36 +327,92 @@ def add_routes_to_app(app_file: Path, routes_to_add: List[Tuple[str, str]], appl
     fixes: List[Fix] = []
     if txt != original:
         fixes.append(Fix(app_file.as_posix(), "add_routes", "", str(routes_to_add), "inserido no <Switch>"))
-        if apply:
-            backup_file(app_file, backup_dir)
-            write_text(app_file, txt)
+        batch.write(app_file, txt)
     return fixes
 
 
+def show_diff(root: Path, target: str) -> None:
+    """Diff de um arquivo montado a partir das mudanças do último nav_fix_*.json (plano ou aplicado)."""
+    reports = [p for p in (root / "nav_fix" / "nav_fix_plan.json", root / "nav_fix" / "nav_fix_applied.json")
+               if p.exists()]
+    if not reports:
+        print("❌ Nenhum relatório em nav_fix/ — rode o autofix antes (com ou sem --apply).")
+        return
+    data = json.loads(max(reports, key=lambda p: p.stat().st_mtime).read_text(encoding="utf-8"))
+    try:
+        want = str((root / target).resolve().relative_to(root)).replace("\\", "/")
+    except ValueError:
+        print(f"Nenhuma alteração registrada para {target} (fora da raiz {root})")
+        return
+    recorded = (data.get("changes") or {}).get(want)
+    if not recorded:
+        print(f"Nenhuma alteração registrada para {want}")
+        return
+    p = root / want
+    current = read_text(p) if p.exists() else None
+    sys.stdout.write(render_changes(want, current, [[TextChange(**c) for c in recorded]], data.get("mode") == "APPLY"))
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--root", default=".", help="raiz do projeto")
-    ap.add_argument("--audit", default=DEFAULT_AUDIT_JSON, help="caminho do nav_audit.json")
+    ap.add_argument("--audit", default=None,
+                    help="super_audit.json já gerado pelo audit_nav_best (default: auditar em memória)")
     ap.add_argument("--apply", action="store_true", help="aplicar alterações (senão: dry-run)")
     ap.add_argument("--fix-links", action="store_true", help="tentar corrigir links internos quebrados")
     ap.add_argument("--disable-unfixable", action="store_true", help='se não der pra corrigir, substitui href por "#"')
     ap.add_argument("--create-pages", action="store_true", help="criar páginas TSX stub para rotas faltantes")
     ap.add_argument("--add-routes", action="store_true", help="adicionar rotas no App.tsx (wouter <Switch>)")
     ap.add_argument("--enforce-login-gateway", action="store_true", help="trocar links diretos /api/auth/* na UI por /login")
+    ap.add_argument("--show-diff", default=None, metavar="FILE",
+                    help="mostrar o diff de FILE a partir do último relatório em nav_fix/ (sem reprocessar)")
+    ap.add_argument("--restore", nargs="?", const="", default=None, metavar="RUN",
+                    help="desfazer um --apply (id da execução; default: a mais recente)")
+    ap.add_argument("--gc", action="store_true", help="apagar backups antigos (mantém --keep-runs) e compactar o resto")
+    ap.add_argument("--keep-runs", type=int, default=10, metavar="N", help="execuções mantidas pelo --gc")
     args = ap.parse_args()
+    if args.keep_runs < 0:
+        ap.error("--keep-runs precisa ser >= 0")
 
     root = Path(args.root).resolve()
-    audit_json = Path(args.audit)
-    report = load_audit_json(root, audit_json)
-
-    backup_dir = root / ".navfix_backups" / now_tag()
+    store = BackupStore(root / BACKUP_DIR, root)
+
+    if args.show_diff:
+        show_diff(root, args.show_diff)
+        return
+    if args.restore is not None:
+        try:
+            done = store.restore(args.restore or None)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return
+        for rel, action in done:
+            print(f"- {'restaurado' if action == 'restored' else 'removido'}: {rel}")
+        print(f"✅ {len(done)} arquivo(s) revertido(s)")
+        return
+    if args.gc:
+        runs, blobs = store.gc(args.keep_runs)
+        print(f"✅ gc: {runs} execução(ões) removida(s), {blobs} blob(s) descartado(s)")
+        return
+
+    # uma auditoria só: o plano guarda os arquivos e textos lidos e é o lote dos fixes
+    # (cada arquivo é gravado uma vez, no final)
+    plan = audit_nav_best.make_plan(root)
+    if args.audit:
+        audit_json = Path(args.audit)
+        report = load_audit_json(root, audit_json)
+        audit_source = str(audit_json if audit_json.is_absolute() else (root / audit_json))
+    else:
+        report = audit_nav_best.run_audit(root, None, plan)
+        audit_source = "audit_nav_best (em memória)"
+    batch = plan.batch
     planned: List[Fix] = []
     applied: List[Fix] = []
 
     route_paths = extract_routes_from_audit(report)
     broken = report.get("broken_links", []) or []
 
-    app_file = find_route_file(root)
+    app_file = find_route_file(root, plan)
 
     # 1) Fix broken links
     if args.fix_links and broken:
@@ -427,7 +434,7 @@ def main():
         for rel, reps in repl_by_file.items():
             p = root / rel
             if p.exists():
-                fxs = apply_rewrite_in_file(p, reps, args.apply, backup_dir)
+                fxs = apply_rewrite_in_file(p, reps, batch)
                 (applied if args.apply else planned).extend(fxs)
 
         if args.disable_unfixable:
@@ -436,7 +443,7 @@ def main():
                 if not p.exists():
                     continue
                 reps = [(h, "#") for h in sorted(set(hrefs))]
-                fxs = apply_rewrite_in_file(p, reps, args.apply, backup_dir)
+                fxs = apply_rewrite_in_file(p, reps, batch)
                 for fx in fxs:
                     fx.kind = "disable_link"
                     fx.note = "link desabilitado (#) por não haver rota correspondente"
@@ -444,8 +451,8 @@ def main():
 
     # 2) Enforce login gateway
     if args.enforce_login_gateway:
-        for p in iter_code_files(root):
-            fxs = enforce_login_gateway_in_file(p, args.apply, backup_dir)
+        for p in plan.files("frontend"):
+            fxs = enforce_login_gateway_in_file(p, batch)
             (applied if args.apply else planned).extend(fxs)
 
     # 3) Create pages + add routes
@@ -453,12 +460,12 @@ def main():
     routes_to_add: List[Tuple[str, str]] = []
 
     if args.create_pages or args.add_routes:
-        pages = iter_page_files(root)
+        pages = plan.files("pages")
         pages_by_stem = {p.stem: p for p in pages}
 
         # propose routes for orphan pages (existing pages not routed)
         for stem, p in pages_by_stem.items():
-            rel = str(p.relative_to(root)).replace("\\\\", "/")
+            rel = str(p.relative_to(root)).replace("\\", "/")
             if orphan_pages and rel in orphan_pages:
                 path = guess_route_from_page_stem(stem)
                 if path not in route_paths:
@@ -480,7 +487,7 @@ def main():
                 if not comp:
                     continue
                 page_path = base / f"{comp}.tsx"
-                fx = create_stub_page(page_path, href, args.apply)
+                fx = create_stub_page(page_path, href, batch)
                 if fx:
                     (applied if args.apply else planned).append(fx)
                     routes_to_add.append((href, comp))
@@ -499,9 +506,39 @@ def main():
                         continue
                     seen.add(k)
                     deduped.append((path, comp))
-                fxs = add_routes_to_app(app_file, deduped, args.apply, backup_dir)
+                fxs = add_routes_to_app(app_file, deduped, batch)
                 (applied if args.apply else planned).extend(fxs)
 
+    changes = {str(p.relative_to(root)).replace("\\", "/"): [c.__dict__ for c in batch.changes(p)]
+               for p in batch.changed()}
+    conflicts = [{"file": p.as_posix(), "kept": [k.start, k.end, k.text], "dropped": [d.start, d.end, d.text]}
+                 for p, k, d in batch.conflicts]
+    for c in conflicts:
+        print(f"⚠️  edição sobreposta ignorada em {c['file']}: {c['dropped']} x {c['kept']}")
+
+    manifest = None
+    if args.apply:
+        run = store.start("nav_autofix_20x10")
+        batch.commit(backup=run)
+        manifest = run.save()
+
+    # verificação: re-audita o corpus corrigido, re-varrendo só os arquivos alterados
+    # (com --audit não há resultados em memória e a auditoria é refeita inteira)
+    verification = None
+    if changes:
+        rescanned = plan.rescan()
+        after = audit_nav_best.run_audit(root, None, plan, verbose=False)
+        before_counts = report.get("counts") or {}
+        verification = {
+            "predicted": not args.apply,
+            "rescanned": [str(p.relative_to(root)).replace("\\", "/") for p in rescanned],
+            "broken_links": [len(broken), after["counts"]["broken_links"]],
+            "orphan_pages": [len(orphan_pages), after["counts"]["orphan_pages"]],
+            "routes": [before_counts.get("routes_detected", len(report.get("routes") or [])),
+                       after["counts"]["routes_detected"]],
+            "scores": after["scores"],
+        }
+
     out_dir = root / "nav_fix"
     out_dir.mkdir(parents=True, exist_ok=True)
     report_out = out_dir / ("nav_fix_applied.json" if args.apply else "nav_fix_plan.json")
@@ -509,13 +546,16 @@ def main():
     payload = {
         "mode": "APPLY" if args.apply else "DRY_RUN",
         "timestamp": _dt.datetime.now().isoformat(),
-        "backup_dir": str(backup_dir) if args.apply else "",
-        "audit_source": str((audit_json if audit_json.is_absolute() else (root / audit_json))),
+        "backup_dir": str(manifest) if manifest else "",
+        "audit_source": audit_source,
         "route_count": len(route_paths),
         "planned_fixes": [fx.__dict__ for fx in planned],
         "applied_fixes": [fx.__dict__ for fx in applied],
+        "conflicts": conflicts,
+        "changes": changes,
+        "verification": verification,
         "notes": [
-            "Depois de aplicar, rode: python audit_nav_best.py para medir melhoria.",
+            "verification: [antes, depois] medidos pela auditoria do audit_nav_best sobre o código corrigido.",
             "Este script é conservador: não mexe em lógica de TRPC/Auth, só navegação/rotas/páginas/links.",
         ],
     }
@@ -524,9 +564,13 @@ def main():
     print("✅ nav_autofix_20x10 finalizado")
     print(f"- modo: {'APPLY' if args.apply else 'DRY-RUN'}")
     print(f"- relatório: {report_out}")
-    if args.apply:
-        print(f"- backups: {backup_dir}")
+    if manifest:
+        print(f"- backups: {manifest} (desfazer: --restore)")
     print(f"- fixes planejados: {len(planned)} | aplicados: {len(applied)}")
+    if verification:
+        (b0, b1), (o0, o1) = verification["broken_links"], verification["orphan_pages"]
+        print(f"- verificação{' (prevista)' if not args.apply else ''}: links quebrados {b0} → {b1}, "
+              f"páginas órfãs {o0} → {o1} ({len(verification['rescanned'])} arquivo(s) re-auditado(s))")
     if not args.apply:
         print("➡️ Para aplicar de verdade, rode novamente com --apply")
 
@@ -3,6 +3,16 @@
 #
 # Uso:
 #   python nav_sim_auditor_e2e.py --base http://localhost:3001 --max 30
+#   python nav_sim_auditor_e2e.py --concurrency 6     # 6 abas por modo, mesma sessão
+#   python nav_sim_auditor_e2e.py --parallel-modes    # 1 browser, visitor/user/admin ao mesmo tempo
+#   python nav_sim_auditor_e2e.py --lite --http-cache # sem imagem/mídia/fonte/analytics; JS/CSS em cache
+#   python nav_sim_auditor_e2e.py --compare last      # só o que mudou desde a run anterior
+#   python nav_sim_auditor_e2e.py --replay 20250301-020000 --compare 20250301-020000
+#   python nav_sim_auditor_e2e.py --runs              # lista o histórico (.nav_audit_runs.sqlite)
+#   python nav_sim_auditor_e2e.py --load last --load-concurrency 50 --load-duration 60
+#                                                     # carga local (pnpm start) com o que o crawl gravou
+#   python nav_sim_auditor_e2e.py --routes shadia_report/shadia_audit.json --route-param slug=intro
+#                                                     # uma visita por rota declarada + % de cobertura
 #
 # Credenciais via env (opcional):
 #   set AUDIT_USER_EMAIL=user@email.com
@@ -11,14 +21,23 @@
 #   set AUDIT_ADMIN_PASS=senha456
 
 import os
+import re
+import sys
 import json
 import time
+import asyncio
+import hashlib
+import sqlite3
 import datetime
 import argparse
 from dataclasses import dataclass, asdict, field
-from typing import List, Set, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, List, Set, Optional, Tuple
+from pathlib import Path
+from urllib.parse import urlsplit
 
-from playwright.sync_api import sync_playwright, Page, TimeoutError as PWTimeout
+from common import RouteTable
+from playwright.async_api import async_playwright, Page, TimeoutError as PWTimeout
 
 SEVERITY_ICON = {"error": "❌", "warn": "⚠️ ", "info": "ℹ️ "}
 
@@ -37,64 +56,123 @@ class Finding:
     details: dict = field(default_factory=dict)
 
 
+@dataclass
+class RunConfig:
+    base: str
+    seeds: List[str]
+    max_pages: int = 25
+    headless: bool = False
+    concurrency: int = 4
+    parallel_modes: bool = False
+    auth_dir: str = ".nav_audit_auth"   # storage_state por modo/conta ("" desliga)
+    auth_max_age_h: float = 12.0
+    fresh_login: bool = False
+    recycle_heap_mb: float = 256.0      # recicla a aba acima deste heap JS (0 desliga)
+    recycle_every: int = 0              # ...ou a cada N visitas (0 desliga)
+    ready_timeout_ms: int = 5000        # teto para hidratação + rede quieta
+    quiet_ms: int = 150                 # janela sem fetch/xhr pendente = "rede quieta"
+    ready_selector: str = ""            # seletor extra que define "página pronta"
+    budgets: Dict[Tuple[str, str], float] = field(default_factory=dict)   # (rota|"*", métrica) → p75 máx
+    trpc_repeat: int = 3                # mesma procedure ≥ N vezes na página = N+1
+    trpc_waterfall: int = 3             # cadeia de ≥ N chamadas em série = waterfall
+    trpc_max_kb: float = 256.0          # resposta tRPC acima disto = grande demais
+    lite: bool = False                  # aborta imagem/mídia/fonte/analytics via page.route
+    http_cache: bool = False            # cache de JS/CSS em memória compartilhado entre abas e modos
+    seeds_by_mode: Dict[str, List[str]] = field(default_factory=dict)   # seeds próprias por modo
+    follow_links: bool = True           # False = só as seeds (--replay de uma run gravada)
+    routes: Optional[RouteTable] = None # --routes: uma visita por rota declarada
+    link_limit: int = 20                # links coletados por página (0 = todos)
+
+
+@dataclass
+class PageVisit:
+    mode: str
+    url: str
+    ready_ms: float = 0.0               # goto → DOM hidratado + rede quieta
+    ready: bool = True                  # False = estourou ready_timeout_ms
+    route: str = ""                     # path normalizado (/courses/:id) para agregar
+    metrics: Dict[str, float] = field(default_factory=dict)
+    trpc: List[dict] = field(default_factory=list)
+    findings: List[Finding] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+    requested: str = ""                 # URL pedida (antes de redirects)
+
+
 # ------------------------------------------------------------------ #
 # Helpers de UX
 # ------------------------------------------------------------------ #
-def text_visible(page: Page, candidates: List[str]) -> bool:
-    for t in candidates:
-        try:
-            if page.get_by_text(t, exact=False).first.is_visible(timeout=400):
-                return True
-        except Exception:
-            pass
-    return False
+# innerText só inclui texto renderizado: uma ida ao browser para todos os candidatos
+TEXT_VISIBLE_JS = """(cands) => {
+  const t = (document.body && document.body.innerText || "").toLowerCase();
+  return cands.some(c => t.includes(c.toLowerCase()));
+}"""
 
 
-def selector_visible(page: Page, selector: str) -> bool:
+async def text_visible(page: Page, candidates: List[str]) -> bool:
+    try:
+        return bool(await page.evaluate(TEXT_VISIBLE_JS, candidates))
+    except Exception:
+        return False
+
+
+async def selector_visible(page: Page, selector: str) -> bool:
     try:
         loc = page.locator(selector)
-        for i in range(min(loc.count(), 5)):
-            if loc.nth(i).is_visible():
+        for i in range(min(await loc.count(), 5)):
+            if await loc.nth(i).is_visible():
                 return True
     except Exception:
         pass
     return False
 
 
-def has_home_link(page: Page) -> bool:
-    if text_visible(page, ["Home", "Início", "Página inicial"]):
+async def has_home_link(page: Page) -> bool:
+    if await text_visible(page, ["Home", "Início", "Página inicial"]):
         return True
-    if selector_visible(page, 'a[href="/"]'):
+    if await selector_visible(page, 'a[href="/"]'):
         return True
-    if selector_visible(page, '[aria-label*="home" i],[aria-label*="início" i],[aria-label*="logo" i]'):
+    if await selector_visible(page, '[aria-label*="home" i],[aria-label*="início" i],[aria-label*="logo" i]'):
         return True
     return False
 
 
-def has_auth_link(page: Page) -> bool:
-    if text_visible(page, ["Login", "Entrar", "Logout", "Sair", "Sign in", "Sign out"]):
+async def has_auth_link(page: Page) -> bool:
+    if await text_visible(page, ["Login", "Entrar", "Logout", "Sair", "Sign in", "Sign out"]):
         return True
-    if selector_visible(page, 'a[href*="/login"],a[href*="/logout"],a[href*="/signin"]'):
+    if await selector_visible(page, 'a[href*="/login"],a[href*="/logout"],a[href*="/signin"]'):
         return True
     return False
 
 
-def page_has_content(page: Page) -> bool:
+async def page_has_content(page: Page) -> bool:
     try:
         for sel in ("main", "h1", "h2", "[class*='content']", "[class*='container']"):
-            if page.locator(sel).count() > 0:
+            if await page.locator(sel).count() > 0:
                 return True
     except Exception:
         pass
     return False
 
 
-def collect_links(page: Page, base: str, limit: int = 20) -> List[str]:
+def clean_url(u: str, base: str) -> str:
+    """Remove query / hash / barra final — chave de deduplicação do crawl."""
+    return u.split("?")[0].split("#")[0].rstrip("/") or base + "/"
+
+
+def url_path(u: str) -> str:
+    """Path da URL no formato da tabela de rotas ('/' para a raiz, sem barra final)."""
+    return urlsplit(u).path.rstrip("/") or "/"
+
+
+async def collect_links(page: Page, base: str, limit: int = 20) -> List[str]:
+    """Links internos da página; limit=0 = todos os anchors (senão os 150 primeiros)."""
     seen: Set[str] = set()
     result: List[str] = []
     try:
-        for el in page.locator("a[href]").all()[:150]:
-            href = (el.get_attribute("href") or "").strip()
+        # um round-trip só, em vez de um get_attribute por anchor
+        hrefs = await page.eval_on_selector_all("a[href]", "els => els.map(e => e.getAttribute('href'))")
+        for href in (hrefs if limit <= 0 else hrefs[:150]):
+            href = (href or "").strip()
             if not href or href.startswith("#") or href.startswith("mailto:"):
                 continue
             if href.startswith("/"):
@@ -104,11 +182,11 @@ def collect_links(page: Page, base: str, limit: int = 20) -> List[str]:
             else:
                 continue
             # remove query / hash para deduplicar
-            u = u.split("?")[0].split("#")[0].rstrip("/") or base + "/"
+            u = clean_url(u, base)
             if u not in seen:
                 seen.add(u)
                 result.append(u)
-            if len(result) >= limit:
+            if 0 < limit <= len(result):
                 break
     except Exception:
         pass
@@ -118,9 +196,25 @@ def collect_links(page: Page, base: str, limit: int = 20) -> List[str]:
 # ------------------------------------------------------------------ #
 # Login heurístico
 # ------------------------------------------------------------------ #
-def try_login(page: Page, base: str, email: str, password: str) -> Tuple[bool, str]:
+LOGIN_ERROR_WORDS = ["inválid", "invalid", "erro", "credenciais", "incorreta"]
+
+# Saiu de /login, ou apareceu mais texto de erro do que havia antes do submit
+LOGIN_SETTLED_JS = """([words, before]) => {
+  if (!location.pathname.startsWith("/login")) return true;
+  const t = (document.body && document.body.innerText || "").toLowerCase();
+  return words.reduce((n, w) => n + t.split(w).length - 1, 0) > before;
+}"""
+
+LOGIN_ERRORS_JS = """(words) => {
+  const t = (document.body && document.body.innerText || "").toLowerCase();
+  return words.reduce((n, w) => n + t.split(w).length - 1, 0);
+}"""
+
+
+async def try_login(page: Page, base: str, email: str, password: str,
+                    timeout_ms: int = 10000) -> Tuple[bool, str]:
     try:
-        page.goto(base + "/login", wait_until="domcontentloaded", timeout=20000)
+        await page.goto(base + "/login", wait_until="domcontentloaded", timeout=20000)
     except Exception as e:
         return False, f"Não abriu /login: {e}"
 
@@ -132,24 +226,30 @@ def try_login(page: Page, base: str, email: str, password: str) -> Tuple[bool, s
     ).first
 
     try:
-        if email_loc.count() == 0 or pass_loc.count() == 0:
+        if await email_loc.count() == 0 or await pass_loc.count() == 0:
             return False, "Formulário de login não encontrado"
 
-        email_loc.fill(email)
-        pass_loc.fill(password)
+        await email_loc.fill(email)
+        await pass_loc.fill(password)
+        errors_before = await page.evaluate(LOGIN_ERRORS_JS, LOGIN_ERROR_WORDS)
 
         btn = page.locator(
             'button[type="submit"],button:has-text("Entrar"),button:has-text("Login"),button:has-text("Sign in")'
         ).first
-        if btn.count() > 0:
-            btn.click()
+        if await btn.count() > 0:
+            await btn.click()
         else:
-            page.keyboard.press("Enter")
+            await page.keyboard.press("Enter")
 
-        page.wait_for_timeout(2000)
+        # Espera o redirect (ou a mensagem de erro) em vez de um sleep fixo
+        try:
+            await page.wait_for_function(LOGIN_SETTLED_JS, arg=[LOGIN_ERROR_WORDS, errors_before],
+                                         timeout=timeout_ms)
+        except PWTimeout:
+            pass
 
         if "/login" in page.url:
-            if text_visible(page, ["inválid", "invalid", "erro", "credenciais", "incorreta"]):
+            if await text_visible(page, LOGIN_ERROR_WORDS):
                 return False, "Credenciais inválidas"
             return False, "Ficou em /login após submit"
 
@@ -158,70 +258,421 @@ def try_login(page: Page, base: str, email: str, password: str) -> Tuple[bool, s
         return False, f"Exceção: {e}"
 
 
+# ------------------------------------------------------------------ #
+# Cache de sessão (storage_state) — pula o login nas próximas execuções
+# ------------------------------------------------------------------ #
+def auth_state_path(cfg: RunConfig, mode: str, email: str) -> str:
+    key = hashlib.sha1(f"{cfg.base}|{email}".encode()).hexdigest()[:12]
+    return os.path.join(cfg.auth_dir, f"{mode}-{key}.json")
+
+
+def cached_auth_state(cfg: RunConfig, path: str) -> Optional[str]:
+    """Caminho do storage_state salvo, se ainda servir (idade e cookies não expirados)."""
+    if not cfg.auth_dir or cfg.fresh_login or not os.path.isfile(path):
+        return None
+    if time.time() - os.path.getmtime(path) > cfg.auth_max_age_h * 3600:
+        return None
+    try:
+        with open(path, encoding="utf-8") as fh:
+            cookies = json.load(fh).get("cookies", [])
+    except (OSError, ValueError):
+        return None
+    now = time.time()
+    if not cookies or any(0 < c.get("expires", -1) < now for c in cookies):
+        return None
+    return path
+
+
+async def save_auth_state(context, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    await context.storage_state(path=path)
+    try:
+        os.chmod(path, 0o600)   # contém cookies de sessão
+    except OSError:
+        pass
+
+
 # ------------------------------------------------------------------ #
 # Auditoria de uma página
 # ------------------------------------------------------------------ #
-def audit_page(page: Page, base: str, url: str, mode: str) -> Tuple[List[Finding], List[str]]:
-    findings: List[Finding] = []
-    console_errors: List[str] = []
-    page_js_errors: List[str] = []
-    net_errors: List[dict] = []
+STATIC_EXTS = (".js", ".css", ".map", ".png", ".ico", ".woff2")
+
+
+TRPC_PATH = "/api/trpc/"
+
+
+def trpc_procs(url: str) -> List[str]:
+    """Procedures de uma chamada tRPC (em lote: /api/trpc/a.b,c.d?batch=1)."""
+    path = urlsplit(url).path
+    return [p for p in path.split(TRPC_PATH, 1)[-1].split(",") if p]
+
+
+class NavEvents:
+    """
+    Listeners de console/pageerror/response de UMA navegação.
+
+    Registrados ao entrar no `with` e removidos na saída — antes eles se acumulavam
+    na aba a cada visita e cada resposta passava por todos os closures antigos.
+    """
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.console_errors: List[str] = []
+        self.page_js_errors: List[str] = []
+        self.net_errors: List[dict] = []
+        self.inflight = 0                  # fetch/xhr pendentes (para "rede quieta")
+        self.last_net = time.perf_counter()
+        self.trpc: List[dict] = []         # chamadas /api/trpc concluídas
+        self._status: Dict[object, Tuple[int, int]] = {}
+
+    def __enter__(self) -> "NavEvents":
+        self.page.on("console", self.on_console)
+        self.page.on("pageerror", self.on_page_error)
+        self.page.on("response", self.on_response)
+        self.page.on("request", self.on_request)
+        self.page.on("requestfinished", self.on_request_finished)
+        self.page.on("requestfailed", self.on_request_done)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.page.remove_listener("console", self.on_console)
+        self.page.remove_listener("pageerror", self.on_page_error)
+        self.page.remove_listener("response", self.on_response)
+        self.page.remove_listener("request", self.on_request)
+        self.page.remove_listener("requestfinished", self.on_request_finished)
+        self.page.remove_listener("requestfailed", self.on_request_done)
+
+    def on_request(self, req):
+        if req.resource_type in ("fetch", "xhr"):
+            self.inflight += 1
+            self.last_net = time.perf_counter()
+
+    def on_request_done(self, req):
+        if req.resource_type in ("fetch", "xhr"):
+            self.inflight = max(0, self.inflight - 1)
+            self.last_net = time.perf_counter()
+
+    def on_request_finished(self, req):
+        self.on_request_done(req)
+        if TRPC_PATH in req.url:
+            t = req.timing   # startTime (epoch ms) + offsets relativos a ele
+            status, length = self._status.pop(req, (0, 0))
+            procs = trpc_procs(req.url)
+            self.trpc.append({
+                "procs": procs,
+                "method": req.method,
+                "status": status,
+                "batched": len(procs) > 1 or "batch=1" in req.url,
+                "start": t.get("startTime", 0),
+                "ms": round(max(t.get("responseEnd", 0), 0), 1),
+                "bytes": length,     # content-length; trocado pelo Resource Timing se houver
+                "url": req.url,
+            })
+
+    async def network_quiet(self, quiet_ms: int, deadline: float) -> bool:
+        """True quando nenhum fetch/xhr ficou pendente por quiet_ms; False se passou do deadline."""
+        while time.perf_counter() < deadline:
+            if self.inflight == 0 and (time.perf_counter() - self.last_net) * 1000 >= quiet_ms:
+                return True
+            await asyncio.sleep(0.03)
+        return False
 
-    def on_console(msg):
+    def on_console(self, msg):
         if msg.type == "error":
-            console_errors.append(msg.text[:300])
+            self.console_errors.append(msg.text[:300])
 
-    def on_page_error(err):
-        page_js_errors.append(str(err)[:300])
+    def on_page_error(self, err):
+        self.page_js_errors.append(str(err)[:300])
 
-    def on_response(resp):
+    def on_response(self, resp):
         try:
+            if TRPC_PATH in resp.url:
+                length = int(resp.headers.get("content-length") or 0)
+                self._status[resp.request] = (resp.status, length)
             if resp.status >= 400:
                 u = resp.url
                 # ignora assets estáticos
-                if any(u.endswith(ext) for ext in (".js", ".css", ".map", ".png", ".ico", ".woff2")):
+                if u.endswith(STATIC_EXTS):
                     return
                 if "/assets/" in u or "/_next/static" in u or "/static/" in u:
                     return
-                net_errors.append({"status": resp.status, "url": u[:200]})
+                self.net_errors.append({"status": resp.status, "url": u[:200]})
         except Exception:
             pass
 
-    page.on("console", on_console)
-    page.on("pageerror", on_page_error)
-    page.on("response", on_response)
 
+# Raiz React montada (Vite/CRA: #root, Next: #__next) com algum filho renderizado
+HYDRATED_JS = """() => {
+  const r = document.querySelector("#root, #__next, [data-reactroot]");
+  return !r || r.childElementCount > 0;
+}"""
+
+
+async def wait_ready(page: Page, ev: NavEvents, cfg: RunConfig, t0: float) -> bool:
+    """
+    Pronto = raiz hidratada (ou cfg.ready_selector visível) + rede quieta.
+    Cada etapa divide o mesmo teto (ready_timeout_ms) contado desde o goto.
+    """
+    deadline = t0 + cfg.ready_timeout_ms / 1000
+    left = lambda: max(1, int((deadline - time.perf_counter()) * 1000))
+    try:
+        if cfg.ready_selector:
+            await page.wait_for_selector(cfg.ready_selector, state="visible", timeout=left())
+        else:
+            await page.wait_for_function(HYDRATED_JS, timeout=left())
+    except PWTimeout:
+        return False
+    return await ev.network_quiet(cfg.quiet_ms, deadline)
+
+
+# ------------------------------------------------------------------ #
+# Métricas de performance por página
+# ------------------------------------------------------------------ #
+# Instalado no contexto: observa LCP e CLS desde o início de cada documento
+PERF_INIT_JS = """(() => {
+  const a = window.__navAudit = { lcp: 0, cls: 0 };
+  try {
+    new PerformanceObserver(l => { for (const e of l.getEntries()) a.lcp = e.startTime; })
+      .observe({ type: "largest-contentful-paint", buffered: true });
+    new PerformanceObserver(l => { for (const e of l.getEntries()) if (!e.hadRecentInput) a.cls += e.value; })
+      .observe({ type: "layout-shift", buffered: true });
+  } catch (e) {}
+})();"""
+
+TRPC_SIZES_JS = """() => performance.getEntriesByType("resource")
+  .filter(r => r.name.includes("/api/trpc/"))
+  .map(r => ({ url: r.name, bytes: r.decodedBodySize || r.encodedBodySize || 0 }))"""
+
+PERF_JS = """() => {
+  const nav = performance.getEntriesByType("navigation")[0] || {};
+  const a = window.__navAudit || {};
+  const bytes = performance.getEntriesByType("resource")
+    .reduce((n, r) => n + (r.transferSize || 0), nav.transferSize || 0);
+  return {
+    ttfb_ms: nav.responseStart || 0,
+    dcl_ms: nav.domContentLoadedEventEnd || 0,
+    load_ms: nav.loadEventEnd || 0,
+    lcp_ms: a.lcp || 0,
+    cls: a.cls || 0,
+    bytes: bytes,
+    heap_mb: performance.memory ? performance.memory.usedJSHeapSize / 1048576 : 0,
+  };
+}"""
+
+# Métricas conhecidas (nome → unidade) — também as chaves válidas de --budget
+PERF_METRICS = {
+    "ready_ms": "ms", "ttfb_ms": "ms", "dcl_ms": "ms", "load_ms": "ms", "lcp_ms": "ms",
+    "cls": "", "bytes": "B", "heap_mb": "MB", "trpc_calls": "", "trpc_ms": "ms",
+    "trpc_max_ms": "ms",
+}
+
+# Orçamentos padrão (p75 por rota); --budget sobrescreve, --budget métrica=0 desliga
+DEFAULT_BUDGETS = {"lcp_ms": 2500, "cls": 0.1, "ttfb_ms": 800, "trpc_calls": 20}
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{8}-[0-9a-f-]{27,}|[A-Za-z0-9_-]*\d[A-Za-z0-9_-]{11,})$")
+
+
+def route_key(url: str) -> str:
+    """Path com ids trocados por :id — /courses/42 e /courses/57 viram a mesma rota."""
+    segs = [":id" if _ID_SEGMENT.match(seg) else seg
+            for seg in urlsplit(url).path.split("/") if seg]
+    return "/" + "/".join(segs)
+
+
+async def collect_metrics(page: Page, ev: NavEvents, visit: PageVisit) -> None:
+    try:
+        m = await page.evaluate(PERF_JS)
+        sizes = await page.evaluate(TRPC_SIZES_JS) if ev.trpc else []
+    except Exception:
+        m, sizes = {}, []
+    # tamanho decodificado do Resource Timing (vale também sem content-length / gzip)
+    by_url: Dict[str, List[int]] = {}
+    for e in sizes:
+        by_url.setdefault(e["url"], []).append(int(e["bytes"]))
+    for c in ev.trpc:
+        got = by_url.get(c["url"])
+        if got:
+            c["bytes"] = got.pop(0) or c["bytes"]
+    m = {k: round(float(v), 4 if k == "cls" else 1) for k, v in m.items()}
+    m["ready_ms"] = visit.ready_ms
+    m["trpc_calls"] = len(ev.trpc)
+    m["trpc_ms"] = round(sum(c["ms"] for c in ev.trpc), 1)
+    m["trpc_max_ms"] = max((c["ms"] for c in ev.trpc), default=0.0)
+    visit.metrics = m
+    visit.trpc = list(ev.trpc)
+
+
+def parse_budgets(items: List[str]) -> Dict[Tuple[str, str], float]:
+    """
+    "métrica=valor" (todas as rotas) ou "/rota:métrica=valor" → {(rota|"*", métrica): valor}.
+    Ex.: --budget lcp_ms=2000 --budget /admin/dashboard:trpc_calls=30
+    """
+    budgets: Dict[Tuple[str, str], float] = {("*", k): v for k, v in DEFAULT_BUDGETS.items()}
+    for item in items:
+        key, _, value = item.partition("=")
+        route, _, metric = key.rpartition(":")
+        if metric not in PERF_METRICS or not value:
+            raise ValueError(f"orçamento inválido: {item!r} (métricas: {', '.join(PERF_METRICS)})")
+        budgets[(route or "*", metric)] = float(value)
+    return {k: v for k, v in budgets.items() if v > 0}
+
+
+def route_stats(visits: List[PageVisit]) -> List[dict]:
+    """p50/p75/p95 de cada métrica por (modo, rota), na ordem em que as rotas apareceram."""
+    groups: Dict[Tuple[str, str], List[PageVisit]] = {}
+    for v in visits:
+        if v.metrics:
+            groups.setdefault((v.mode, v.route), []).append(v)
+    out = []
+    for (mode, route), vs in groups.items():
+        stats = {}
+        for metric in PERF_METRICS:
+            xs = [v.metrics[metric] for v in vs if metric in v.metrics]
+            if xs:
+                stats[metric] = {p: round(percentile(xs, q), 4 if metric == "cls" else 1)
+                                 for p, q in (("p50", 50), ("p75", 75), ("p95", 95))}
+        out.append({"mode": mode, "route": route, "samples": len(vs), "metrics": stats})
+    return out
+
+
+def budget_findings(stats: List[dict], budgets: Dict[Tuple[str, str], float],
+                    base: str) -> List[Finding]:
+    findings: List[Finding] = []
+    for st in stats:
+        for metric, m in st["metrics"].items():
+            limit = budgets.get((st["route"], metric), budgets.get(("*", metric)))
+            if limit is None or m["p75"] <= limit:
+                continue
+            unit = PERF_METRICS[metric]
+            findings.append(Finding(
+                "warn", "perf_budget", st["mode"], base + st["route"],
+                f"{metric} p75 = {m['p75']}{unit} acima do orçamento de {limit:g}{unit}",
+                "Compare com a execução anterior: regressão de carregamento nesta rota.",
+                {"metric": metric, "budget": limit, "samples": st["samples"], **m}))
+    return findings
+
+
+# ------------------------------------------------------------------ #
+# tRPC: waterfall, N+1 e respostas grandes
+# ------------------------------------------------------------------ #
+def trpc_chain(calls: List[dict], slack_ms: float = 5.0) -> List[dict]:
+    """
+    Maior cadeia de chamadas em série: cada uma só começa depois que a anterior
+    terminou (query que depende do resultado de outra). Chamadas em paralelo ou no
+    mesmo lote não aumentam a cadeia.
+    """
+    calls = sorted(calls, key=lambda c: c["start"])
+    best: List[List[dict]] = []
+    for i, c in enumerate(calls):
+        prev = [best[j] for j in range(i)
+                if calls[j]["start"] + calls[j]["ms"] <= c["start"] + slack_ms]
+        best.append(max(prev, key=len, default=[]) + [c])
+    return max(best, key=len, default=[])
+
+
+def trpc_summary(calls: List[dict]) -> dict:
+    counts: Dict[str, int] = {}
+    for c in calls:
+        for proc in c["procs"]:
+            counts[proc] = counts.get(proc, 0) + 1
+    chain = trpc_chain(calls)
+    t0 = min((c["start"] for c in calls), default=0)
+    biggest = max(calls, key=lambda c: c["bytes"], default=None)
+    return {
+        "calls": len(calls),
+        "procedures": sum(counts.values()),
+        "batched_calls": sum(1 for c in calls if c["batched"]),
+        "repeated": {p: n for p, n in sorted(counts.items(), key=lambda kv: -kv[1]) if n > 1},
+        "chain_depth": len(chain),
+        "chain": [{"procs": c["procs"], "start_ms": round(c["start"] - t0, 1), "ms": c["ms"]}
+                  for c in chain],
+        "max_bytes": biggest["bytes"] if biggest else 0,
+        "max_bytes_procs": biggest["procs"] if biggest else [],
+    }
+
+
+def trpc_findings(visit: PageVisit, cfg: RunConfig) -> List[Finding]:
+    if not visit.trpc:
+        return []
+    sm = trpc_summary(visit.trpc)
+    out: List[Finding] = []
+    hot = {p: n for p, n in sm["repeated"].items() if n >= cfg.trpc_repeat}
+    if hot:
+        out.append(Finding("warn", "trpc_n_plus_1", visit.mode, visit.url,
+                           "Procedure(s) tRPC chamadas repetidamente: "
+                           + ", ".join(f"{p} ×{n}" for p, n in hot.items()),
+                           "Padrão N+1: troque chamadas por item por uma query em lote (inArray/join) ou useQueries com batch.",
+                           {"repeated": hot, "calls": sm["calls"]}))
+    if sm["chain_depth"] >= cfg.trpc_waterfall:
+        out.append(Finding("warn", "trpc_waterfall", visit.mode, visit.url,
+                           f"Cascata de {sm['chain_depth']} chamadas tRPC em série",
+                           "Queries dependentes em sequência: dispare em paralelo, use `enabled` só onde precisa, ou junte no servidor.",
+                           {"chain": sm["chain"]}))
+    big = [c for c in visit.trpc if c["bytes"] >= cfg.trpc_max_kb * 1024]
+    if big:
+        out.append(Finding("warn", "trpc_oversized", visit.mode, visit.url,
+                           f"{len(big)} resposta(s) tRPC acima de {cfg.trpc_max_kb:g} KB",
+                           "Pagine a lista ou selecione só as colunas usadas pela tela.",
+                           {"responses": [{"procs": c["procs"], "kb": round(c["bytes"] / 1024, 1)}
+                                          for c in sorted(big, key=lambda c: -c["bytes"])[:5]]}))
+    return out
+
+
+async def audit_page(page: Page, cfg: RunConfig, url: str, mode: str) -> PageVisit:
+    with NavEvents(page) as ev:
+        return await inspect_page(page, ev, cfg, url, mode)
+
+
+async def inspect_page(page: Page, ev: NavEvents, cfg: RunConfig, url: str,
+                       mode: str) -> PageVisit:
+    visit = PageVisit(mode, url)
+    findings = visit.findings
+
+    t0 = time.perf_counter()
     try:
         # domcontentloaded é muito mais leve que networkidle
-        page.goto(url, wait_until="domcontentloaded", timeout=18000)
-        # espera leve extra para React/Next hidratar
-        page.wait_for_timeout(800)
+        await page.goto(url, wait_until="domcontentloaded", timeout=18000)
     except PWTimeout:
         findings.append(Finding("error", "timeout", mode, url,
                                 "Timeout ao carregar a página",
                                 "Verifique se a rota existe e o servidor está estável."))
-        return findings, []
+        return visit
     except Exception as e:
         findings.append(Finding("error", "navigation_failed", mode, url,
                                 "Falha ao navegar para a página",
                                 "Cheque rota e redirects infinitos.",
                                 {"exception": str(e)[:200]}))
-        return findings, []
+        return visit
+
+    # espera por eventos (hidratação + rede quieta) em vez de um sleep fixo
+    visit.ready = await wait_ready(page, ev, cfg, t0)
+    visit.ready_ms = round((time.perf_counter() - t0) * 1000, 1)
+    visit.url = page.url
+    visit.route = route_key(page.url)
+    await collect_metrics(page, ev, visit)
+    findings.extend(trpc_findings(visit, cfg))
 
     current_url = page.url
 
+    if not visit.ready:
+        findings.append(Finding("warn", "slow_ready", mode, current_url,
+                                f"Página não ficou pronta em {cfg.ready_timeout_ms} ms "
+                                "(React não hidratou ou a rede não aquietou)",
+                                "Cheque loading infinito, polling contínuo ou API lenta.",
+                                {"ready_ms": visit.ready_ms}))
+
     # --- JS errors ---
-    if page_js_errors:
+    if ev.page_js_errors:
         findings.append(Finding("error", "pageerror", mode, current_url,
                                 "Erro de execução JavaScript detectado",
                                 "Corrija exceptions (undefined, hooks, render crash).",
-                                {"errors": page_js_errors[:5]}))
+                                {"errors": ev.page_js_errors[:5]}))
 
-    if console_errors:
+    if ev.console_errors:
         # filtra ruídos comuns
-        real = [e for e in console_errors if not any(x in e for x in [
+        real = [e for e in ev.console_errors if not any(x in e for x in [
             "favicon", "DevTools", "Warning:", "React DevTools",
-            "Download the React", "net::ERR_ABORTED"
+            "Download the React", "net::ERR_ABORTED", "net::ERR_BLOCKED_BY_CLIENT"
         ])]
         if real:
             findings.append(Finding("error", "console_error", mode, current_url,
@@ -229,73 +680,328 @@ def audit_page(page: Page, base: str, url: str, mode: str) -> Tuple[List[Finding
                                     "Verifique imports faltando, API calls e componentes quebrados.",
                                     {"errors": real[:8]}))
 
-    if net_errors:
+    if ev.net_errors:
         findings.append(Finding("warn", "http_errors", mode, current_url,
-                                f"{len(net_errors)} requisição(ões) HTTP com erro (≥400)",
+                                f"{len(ev.net_errors)} requisição(ões) HTTP com erro (≥400)",
                                 "Cheque auth (401/403), endpoints e CORS.",
-                                {"errors": net_errors[:10]}))
+                                {"errors": ev.net_errors[:10]}))
 
     # --- UX checks ---
     if "/admin" in current_url:
-        if not has_home_link(page):
+        if not await has_home_link(page):
             findings.append(Finding("warn", "admin_no_home_link", mode, current_url,
                                     "Painel admin sem link visível para voltar ao site",
                                     "Adicione no header/sidebar do admin um link para '/'."))
-        if not text_visible(page, ["Logout", "Sair", "Sign out"]):
+        if not await text_visible(page, ["Logout", "Sair", "Sign out"]):
             findings.append(Finding("warn", "admin_no_logout", mode, current_url,
                                     "Painel admin sem botão de logout visível",
                                     "Adicione botão de logout no header do admin."))
     else:
-        if not has_home_link(page):
+        if not await has_home_link(page):
             findings.append(Finding("warn", "missing_home_link", mode, current_url,
                                     "Página sem link para Home (href='/', texto ou logo linkado)",
                                     "Verifique se o Header/Navbar está montado nesta rota."))
-        if not has_auth_link(page):
+        if not await has_auth_link(page):
             findings.append(Finding("warn", "missing_auth_link", mode, current_url,
                                     "Sem link de login/logout visível",
                                     "O Header deve exibir Login (visitante) ou Logout (autenticado)."))
 
-    if not page_has_content(page):
+    if not await page_has_content(page):
         findings.append(Finding("warn", "empty_page", mode, current_url,
                                 "Página parece vazia (sem <main>, <h1>, <h2> ou .content)",
                                 "Pode ser loading infinito, rota não protegida ou componente não renderizado."))
 
-    links = collect_links(page, base)
-    return findings, links
+    visit.links = await collect_links(page, cfg.base, cfg.link_limit)
+    return visit
+
+
+# ------------------------------------------------------------------ #
+# Frontier compartilhada + merge determinístico
+# ------------------------------------------------------------------ #
+class Frontier:
+    """
+    Fronteira BFS compartilhada pelos workers de um modo, nível a nível.
+
+    `level` é uma deque com o nível atual e `seen` (URLs limpas) garante que cada
+    página entra uma vez só. O nível seguinte é montado quando o atual termina, com
+    os links de cada página na ordem em que ela foi reservada: o conjunto visitado
+    (inclusive com --max cortando o crawl) e a ordem do relatório são os mesmos do
+    crawl sequencial, para qualquer --concurrency.
+    """
+
+    def __init__(self, base: str, seeds: List[str], max_pages: int, expand: bool = True,
+                 routes: Optional[RouteTable] = None):
+        self.base = base
+        self.max_pages = max_pages
+        self.expand = expand                # False = só as seeds (replay de uma run gravada)
+        self.routes = routes                # com tabela: uma URL por rota declarada
+        self.claimed: Set[str] = set()      # padrões de rota já reservados
+        self.level: Deque[Tuple[str, str]] = deque()
+        self.seen: Set[str] = set()
+        self.order: List[str] = []          # páginas reservadas, em ordem BFS
+        self.links_of: Dict[str, List[str]] = {}
+        self._level_start = 0
+        self._inflight = 0
+        self._cond = asyncio.Condition()
+        for u in seeds:
+            self._push(u)
+
+    def _push(self, u: str) -> None:
+        c = clean_url(u, self.base)
+        if c in self.seen:
+            return
+        self.seen.add(c)
+        if self.routes is not None:
+            # /courses/a e /courses/b são a mesma rota: a segunda não paga outro page load;
+            # link fora da tabela já aparece como não declarado na cobertura
+            pattern = self.routes.match(url_path(c))
+            if pattern is None or pattern in self.claimed:
+                return
+            self.claimed.add(pattern)
+        self.level.append((c, u))
+
+    def _advance(self) -> bool:
+        if not self.expand:
+            return False
+        start, self._level_start = self._level_start, len(self.order)
+        for c in self.order[start:]:
+            for u in self.links_of.get(c, ()):
+                self._push(u)
+        return bool(self.level)
+
+    async def next(self) -> Optional[Tuple[int, str, str]]:
+        """(nº da visita, url limpa, url) da próxima página; None quando o crawl acabou."""
+        async with self._cond:
+            while len(self.order) < self.max_pages:
+                if self.level:
+                    c, u = self.level.popleft()
+                    self.order.append(c)
+                    self._inflight += 1
+                    return len(self.order), c, u
+                if self._inflight == 0:
+                    if not self._advance():
+                        break
+                    continue
+                await self._cond.wait()   # nível acabando em outras abas
+            return None
+
+    async def done(self, clean: str, links: List[str]) -> None:
+        async with self._cond:
+            self.links_of[clean] = links
+            self._inflight -= 1
+            self._cond.notify_all()
 
 
 # ------------------------------------------------------------------ #
 # Modo de execução (visitor / user / admin)
 # ------------------------------------------------------------------ #
-def run_mode(playwright_instance, base: str, seeds: List[str],
-             mode: str, email: str, password: str,
-             max_pages: int, headless: bool) -> List[Finding]:
+JS_HEAP = "() => (performance.memory && performance.memory.usedJSHeapSize) || 0"
+
+
+async def page_heap_mb(page: Page) -> float:
+    try:
+        return (await page.evaluate(JS_HEAP)) / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+async def should_recycle(page: Page, cfg: RunConfig, visits: int) -> bool:
+    """Recicla a aba pelo heap JS medido (--recycle-heap-mb) ou, se pedido, a cada N visitas."""
+    if cfg.recycle_every and visits >= cfg.recycle_every:
+        return True
+    return bool(cfg.recycle_heap_mb) and await page_heap_mb(page) >= cfg.recycle_heap_mb
+
+
+async def crawl_worker(context, frontier: Frontier, cfg: RunConfig, mode: str,
+                       results: Dict[str, PageVisit], stats: Dict[str, int]) -> None:
+    page = await context.new_page()
+    visits = 0
+    try:
+        while True:
+            item = await frontier.next()
+            if item is None:
+                return
+            n, clean, url = item
+            print(f"  [{n:02d}/{frontier.max_pages}] {url}")
+            try:
+                visit = await audit_page(page, cfg, url, mode)
+            except Exception as e:   # aba morta/crash: registra e segue com as demais
+                visit = PageVisit(mode, url, ready=False, findings=[
+                    Finding("error", "navigation_failed", mode, url,
+                            "Falha inesperada ao auditar a página",
+                            "A aba pode ter travado; rode de novo com --concurrency 1.",
+                            {"exception": str(e)[:200]})])
+            visit.requested = url
+            results[clean] = visit
+            await frontier.done(clean, visit.links)
+
+            visits += 1
+            if await should_recycle(page, cfg, visits):
+                await page.close()
+                page = await context.new_page()
+                stats["recycled"] += 1
+                visits = 0
+    finally:
+        await page.close()
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil por interpolação linear (p em 0..100)."""
+    xs = sorted(values)
+    if not xs:
+        return 0.0
+    k = (len(xs) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+
+# ------------------------------------------------------------------ #
+# Perfil leve: bloqueio de recursos + cache HTTP compartilhado
+# ------------------------------------------------------------------ #
+LITE_BLOCK_TYPES = {"image", "media", "font"}
+
+# Analytics / embeds de terceiros que não dizem nada sobre o comportamento do app
+LITE_BLOCK_HOSTS = re.compile(
+    r"(^|\.)(umami\.is|googletagmanager\.com|google-analytics\.com|plausible\.io|"
+    r"hotjar\.com|clarity\.ms|connect\.facebook\.net|cloudflarestream\.com|"
+    r"videodelivery\.net|fonts\.googleapis\.com|fonts\.gstatic\.com)$"
+)
+LITE_BLOCK_PATHS = re.compile(r"/umami(\.js)?$")   # Umami self-hosted (%VITE_ANALYTICS_ENDPOINT%/umami)
+
+CACHEABLE_TYPES = {"script", "stylesheet"}
+
+
+class RequestGate:
+    """
+    Handler único de context.route para o crawl.
+
+    Com `lite`, aborta imagem/mídia/fonte e analytics. Com `cache`, guarda em memória
+    JS/CSS (GET 200 sem no-store) e responde os pedidos seguintes com fulfill — o
+    próprio Playwright desliga o cache HTTP do browser quando há route, então o cache
+    aqui é o que evita rebaixar o bundle a cada página. Uma instância é compartilhada
+    entre todas as abas e modos da execução.
+    """
+
+    def __init__(self, lite: bool, cache: bool):
+        self.lite = lite
+        self.cache_on = cache
+        self.cache: Dict[str, Tuple[int, Dict[str, str], bytes]] = {}
+        self.stats: Dict[str, int] = {"blocked": 0, "cache_hits": 0, "cache_misses": 0,
+                                      "cached_bytes_served": 0, "errors": 0}
+
+    @property
+    def active(self) -> bool:
+        return self.lite or self.cache_on
+
+    def blocks(self, url: str, resource_type: str) -> bool:
+        if resource_type in LITE_BLOCK_TYPES:
+            return True
+        parts = urlsplit(url)
+        return bool(LITE_BLOCK_HOSTS.search(parts.hostname or "") or LITE_BLOCK_PATHS.search(parts.path))
+
+    async def handle(self, route, request) -> None:
+        try:
+            rtype = request.resource_type
+            if self.lite and self.blocks(request.url, rtype):
+                self.stats["blocked"] += 1
+                # ERR_BLOCKED_BY_CLIENT: o console_error filtra, ao contrário de ERR_FAILED
+                await route.abort("blockedbyclient")
+                return
+            if not (self.cache_on and request.method == "GET" and rtype in CACHEABLE_TYPES):
+                await route.continue_()
+                return
+            hit = self.cache.get(request.url)
+            if hit:
+                status, headers, body = hit
+                self.stats["cache_hits"] += 1
+                self.stats["cached_bytes_served"] += len(body)
+                await route.fulfill(status=status, headers=headers, body=body)
+                return
+            self.stats["cache_misses"] += 1
+            resp = await route.fetch()
+            body = await resp.body()
+            headers = resp.headers
+            if resp.status == 200 and "no-store" not in headers.get("cache-control", ""):
+                self.cache[request.url] = (resp.status, headers, body)
+            await route.fulfill(response=resp, body=body)
+        except Exception as e:
+            # página fechada no meio do pedido (reciclagem/fim do crawl): nada a fazer
+            if self._closed(request, e):
+                return
+            # falha real (conexão resetada, servidor reiniciando...): devolve o pedido
+            # à rede em vez de deixá-lo pendurado até a aba fechar (viraria slow_ready)
+            self.stats["errors"] += 1
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _closed(request, exc: Exception) -> bool:
+        if "has been closed" in str(exc):
+            return True
+        try:
+            return request.frame.page.is_closed()
+        except Exception:
+            return False
+
+    def summary(self) -> str:
+        st = self.stats
+        out = []
+        if self.lite:
+            out.append(f"{st['blocked']} pedido(s) bloqueado(s)")
+        if self.cache_on:
+            out.append(f"cache {st['cache_hits']} hit / {st['cache_misses']} miss "
+                       f"({st['cached_bytes_served'] / 1048576:.1f} MB servidos da memória)")
+        if st["errors"]:
+            out.append(f"{st['errors']} pedido(s) com falha no handler (seguiram direto para a rede)")
+        return " | ".join(out)
+
+
+def browser_args() -> List[str]:
+    return ["--disable-dev-shm-usage", "--no-sandbox",
+            "--disable-gpu", "--js-flags=--max-old-space-size=512"]
 
+
+async def run_mode(browser, cfg: RunConfig, mode: str, email: str, password: str,
+                   gate: Optional[RequestGate] = None) -> Tuple[List[Finding], List[PageVisit]]:
+    base = cfg.base
     print(f"\n{'='*50}")
-    print(f"  Modo: {mode.upper()}")
+    print(f"  Modo: {mode.upper()}  ({cfg.concurrency} aba(s))")
     print(f"{'='*50}")
 
     findings: List[Finding] = []
 
-    # Cada modo usa um browser separado — evita acúmulo de memória
-    browser = playwright_instance.chromium.launch(
-        headless=headless,
-        args=["--disable-dev-shm-usage", "--no-sandbox",
-              "--disable-gpu", "--js-flags=--max-old-space-size=512"]
-    )
-    context = browser.new_context(
+    login = mode in ("user", "admin") and bool(email and password)
+    state_path = auth_state_path(cfg, mode, email) if login else ""
+    state = cached_auth_state(cfg, state_path) if login else None
+
+    # Contexto isolado por modo: cookies/localStorage não vazam entre visitor/user/admin
+    context = await browser.new_context(
         viewport={"width": 1280, "height": 800},
         java_script_enabled=True,
+        storage_state=state,
+        # service workers interceptariam os pedidos antes do route
+        service_workers="block" if gate and gate.active else "allow",
     )
-    page = context.new_page()
+    if gate and gate.active:
+        await context.route("**/*", gate.handle)
+    await context.add_init_script(PERF_INIT_JS)
 
-    # Login
+    # Login (os cookies do contexto valem para todas as abas)
     if mode in ("user", "admin"):
-        if email and password:
+        if login and state:
+            print(f"  🔑 Sessão de {mode} reaproveitada de {state}")
+        elif login:
             print(f"  🔑 Tentando login como {mode}...")
-            ok, reason = try_login(page, base, email, password)
+            page = await context.new_page()
+            ok, reason = await try_login(page, base, email, password)
+            await page.close()
             if ok:
                 print(f"  ✅ Login OK")
+                if cfg.auth_dir:
+                    await save_auth_state(context, state_path)
             else:
                 print(f"  ⚠️  Login falhou: {reason}")
                 findings.append(Finding("warn", "login_failed", mode, base + "/login",
@@ -307,47 +1013,173 @@ def run_mode(playwright_instance, base: str, seeds: List[str],
                                     f"Login não executado (variáveis de ambiente não definidas)",
                                     f"Defina AUDIT_{mode.upper()}_EMAIL e AUDIT_{mode.upper()}_PASS."))
 
-    queue = list(seeds)
-    visited: Set[str] = set()
+    seeds = cfg.seeds_by_mode.get(mode, []) if cfg.seeds_by_mode else cfg.seeds
+    # replay: mesmas páginas, mesma ordem, sem seguir links novos
+    frontier = Frontier(base, seeds, cfg.max_pages if cfg.follow_links else len(seeds),
+                        expand=cfg.follow_links, routes=cfg.routes)
+    results: Dict[str, PageVisit] = {}
+    stats = {"recycled": 0}
+    try:
+        await asyncio.gather(*(crawl_worker(context, frontier, cfg, mode, results, stats)
+                               for _ in range(max(1, cfg.concurrency))))
+    finally:
+        await context.close()
 
-    while queue and len(visited) < max_pages:
-        url = queue.pop(0)
-        clean = url.split("?")[0].split("#")[0].rstrip("/") or base + "/"
-        if clean in visited:
-            continue
-        visited.add(clean)
+    # Merge na ordem BFS do crawl — o relatório não depende do timing das abas
+    visits = [results[c] for c in frontier.order if c in results]
+    for v in visits:
+        findings.extend(v.findings)
+    # Orçamentos de performance, avaliados no p75 de cada rota deste modo
+    findings.extend(budget_findings(route_stats(visits), cfg.budgets, base))
 
-        print(f"  [{len(visited):02d}/{max_pages}] {url}")
+    ready = [v.ready_ms for v in visits if v.ready_ms]
+    print(f"\n  Resultado: {len(results)} páginas | {len([f for f in findings if f.severity=='error'])} erros | {len([f for f in findings if f.severity=='warn'])} avisos | {stats['recycled']} aba(s) reciclada(s)")
+    if ready:
+        print(f"  Pronto em: p50 {percentile(ready, 50):.0f} ms | p95 {percentile(ready, 95):.0f} ms | máx {max(ready):.0f} ms")
+    return findings, visits
 
-        f, links = audit_page(page, base, url, mode)
-        findings.extend(f)
 
-        for u in links:
-            uc = u.split("?")[0].split("#")[0].rstrip("/") or base + "/"
-            if uc not in visited and u not in queue:
-                queue.append(u)
+# ------------------------------------------------------------------ #
+# HTML Report
+# ------------------------------------------------------------------ #
+PERF_COLUMNS = [("ready_ms", "Pronto"), ("ttfb_ms", "TTFB"), ("lcp_ms", "LCP"), ("cls", "CLS"),
+                ("bytes", "Bytes"), ("heap_mb", "Heap"), ("trpc_calls", "tRPC"), ("trpc_ms", "tRPC ms")]
 
-        # Fecha e reabre a página a cada 15 visitas para liberar memória
-        if len(visited) % 15 == 0:
-            page.close()
-            page = context.new_page()
 
-    page.close()
-    browser.close()   # fecha o browser inteiro — libera toda memória do Node.js
+def fmt_metric(metric: str, value: float) -> str:
+    if metric == "bytes":
+        return f"{value / 1024:.0f} KB"
+    if metric == "cls":
+        return f"{value:.3f}"
+    return f"{value:.0f}"
 
-    ok_pages = len(visited) - sum(1 for f in findings if f.kind in ("timeout", "navigation_failed"))
-    print(f"\n  Resultado: {len(visited)} páginas | {len([f for f in findings if f.severity=='error'])} erros | {len([f for f in findings if f.severity=='warn'])} avisos")
-    return findings
 
+def perf_rows(stats: List[dict], budgets: Dict[Tuple[str, str], float]) -> str:
+    """Uma linha por (modo, rota): p50 / p95 de cada métrica, vermelho se o p75 estoura o orçamento."""
+    rows = ""
+    for st in stats:
+        cells = ""
+        for metric, _ in PERF_COLUMNS:
+            m = st["metrics"].get(metric)
+            if not m:
+                cells += "<td>–</td>"
+                continue
+            limit = budgets.get((st["route"], metric), budgets.get(("*", metric)))
+            over = limit is not None and m["p75"] > limit
+            style = ' style="color:var(--red)"' if over else ""
+            cells += f'<td class="ttr"{style}>{fmt_metric(metric, m["p50"])} / {fmt_metric(metric, m["p95"])}</td>'
+        rows += f"""
+        <tr>
+          <td><span class="mode-tag mode-{st['mode']}">{st['mode']}</span></td>
+          <td><code class="url">{st['route']}</code></td>
+          <td>{st['samples']}</td>{cells}
+        </tr>"""
+    return rows
 
-# ------------------------------------------------------------------ #
-# HTML Report
-# ------------------------------------------------------------------ #
-def generate_html(findings: List[Finding], base: str, duration: float) -> str:
+
+def trpc_rows(visits: List[PageVisit], base: str) -> str:
+    """Uma linha por página com tRPC: chamadas, % em lote, profundidade da cascata, repetições."""
+    rows = ""
+    pages = [(v, trpc_summary(v.trpc)) for v in visits if v.trpc]
+    for v, sm in sorted(pages, key=lambda p: (-p[1]["chain_depth"], -p[1]["procedures"])):
+        batched = sm["batched_calls"] / sm["calls"] * 100
+        top = next(iter(sm["repeated"].items()), None)
+        rows += f"""
+        <tr>
+          <td><span class="mode-tag mode-{v.mode}">{v.mode}</span></td>
+          <td><code class="url">{v.url.replace(base,'') or '/'}</code></td>
+          <td>{sm['calls']} / {sm['procedures']}</td>
+          <td>{batched:.0f}%</td>
+          <td>{sm['chain_depth']}</td>
+          <td>{f"<code>{top[0]}</code> ×{top[1]}" if top else "–"}</td>
+          <td class="ttr">{fmt_metric("bytes", sm['max_bytes']) if sm['max_bytes'] else "–"}</td>
+        </tr>"""
+    return rows
+
+
+def ready_rows(visits: List[PageVisit], base: str) -> str:
+    """Linhas da tabela de tempo até pronto, mais lentas primeiro."""
+    worst = max((v.ready_ms for v in visits), default=0) or 1
+    rows = ""
+    for v in sorted(visits, key=lambda v: -v.ready_ms):
+        color = "var(--green)" if v.ready else "var(--yellow)"
+        rows += f"""
+        <tr>
+          <td><span class="mode-tag mode-{v.mode}">{v.mode}</span></td>
+          <td><code class="url">{v.url.replace(base,'') or '/'}</code></td>
+          <td class="ttr"><span class="bar" style="width:{v.ready_ms / worst * 100:.0f}%;background:{color}"></span>{v.ready_ms:.0f} ms</td>
+          <td>{'pronta' if v.ready else 'não ficou pronta'}</td>
+        </tr>"""
+    return rows
+
+
+def diff_rows(diff: dict, base: str) -> str:
+    """Linhas da comparação com a run anterior: novos, mais lentos, inalcançáveis, corrigidos."""
+    items = (
+        [("🆕 novo", f["mode"], f["url"].replace(base, "") or "/", f"{f['kind']}: {f['message']}")
+         for f in diff["new"]]
+        + [("🐢 mais lenta", s["mode"], s["route"],
+            f"{s['metric']} p50 {s['before']:.0f} → {s['after']:.0f} ms"
+            + (f" (+{s['pct']:.0f}%)" if s["pct"] is not None else ""))
+           for s in diff["slower"]]
+        + [("🚫 inalcançável", u["mode"], u["route"], u["reason"]) for u in diff["unreachable"]]
+        + [("✅ corrigido", f["mode"], f["url"].replace(base, "") or "/", f"{f['kind']}: {f['message']}")
+           for f in diff["fixed"]]
+    )
+    rows = ""
+    for label, mode, page, detail in items:
+        rows += f"""
+        <tr>
+          <td>{label}</td>
+          <td><span class="mode-tag mode-{mode}">{mode}</span></td>
+          <td><code class="url">{page}</code></td>
+          <td class="msg-cell"><div class="msg">{detail}</div></td>
+        </tr>"""
+    return rows
+
+
+def generate_html(findings: List[Finding], base: str, duration: float,
+                  visits: Optional[List[PageVisit]] = None,
+                  budgets: Optional[Dict[Tuple[str, str], float]] = None,
+                  diff: Optional[dict] = None, coverage: Optional[dict] = None) -> str:
     errors = [f for f in findings if f.severity == "error"]
     warns  = [f for f in findings if f.severity == "warn"]
     infos  = [f for f in findings if f.severity == "info"]
     now = datetime.datetime.now().strftime("%d/%m/%Y %H:%M")
+    visits = visits or []
+    ready = [v.ready_ms for v in visits if v.ready_ms]
+    ttr_p50 = f"{percentile(ready, 50):.0f}" if ready else "–"
+
+    cov_card = cov_html = ""
+    if coverage:
+        cov_card = (f'\n  <div class="sc"><div class="sn" style="color:var(--purple)">{coverage["pct"]:.0f}%</div>'
+                    f'<div class="sl">Rotas cobertas</div></div>')
+        missing = "".join(f"""
+        <tr>
+          <td><code class="url">{r['path']}</code></td>
+          <td>{r['zone']}</td>
+          <td>{r['reason']}</td>
+        </tr>""" for r in coverage["uncovered"])
+        by_mode = " · ".join(f"{m} {p:.0f}%" for m, p in coverage["by_mode"].items())
+        cov_html = f"""
+<div class="table-wrap">
+  <div class="section-label">// Rotas declaradas sem visita ({coverage['covered']}/{coverage['declared']} cobertas · {by_mode} · {len(coverage['undeclared_links'])} links fora da tabela)</div>
+  <table>
+    <thead><tr><th>Rota</th><th>Zona</th><th>Motivo</th></tr></thead>
+    <tbody>{missing}</tbody>
+  </table>
+</div>"""
+
+    diff_html = ""
+    if diff:
+        diff_html = f"""
+<div class="table-wrap">
+  <div class="section-label">// Regressões vs run {diff['baseline']} ({len(diff['new'])} novos · {len(diff['fixed'])} corrigidos · {len(diff['slower'])} mais lentas · {len(diff['unreachable'])} inalcançáveis)</div>
+  <table>
+    <thead><tr><th>Mudança</th><th>Modo</th><th>Página</th><th>Detalhe</th></tr></thead>
+    <tbody>{diff_rows(diff, base)}</tbody>
+  </table>
+</div>"""
 
     rows = ""
     for f in findings:
@@ -405,6 +1237,8 @@ td{{padding:12px 14px;vertical-align:top}}
 .hint{{font-size:12px;color:var(--muted);margin-top:4px}}
 .details{{font-size:11px;font-family:'DM Mono',monospace;background:var(--s1);border:1px solid var(--border);border-radius:6px;padding:8px;margin-top:8px;overflow:auto;max-height:120px;color:#8b9ab0;white-space:pre-wrap}}
 .msg-cell{{max-width:520px}}
+.ttr{{font-family:'DM Mono',monospace;font-size:12px;white-space:nowrap;min-width:220px}}
+.bar{{display:inline-block;height:8px;border-radius:4px;margin-right:8px;vertical-align:middle;max-width:160px}}
 @media(max-width:768px){{header,.stats,.table-wrap{{padding-left:20px;padding-right:20px}}.stats{{grid-template-columns:repeat(2,1fr)}}}}
 </style>
 </head>
@@ -419,7 +1253,8 @@ td{{padding:12px 14px;vertical-align:top}}
   <div class="sc"><div class="sn" style="color:var(--red)">{len(errors)}</div><div class="sl">Erros</div></div>
   <div class="sc"><div class="sn" style="color:var(--yellow)">{len(warns)}</div><div class="sl">Avisos</div></div>
   <div class="sc"><div class="sn" style="color:var(--blue)">{len(infos)}</div><div class="sl">Info</div></div>
-</div>
+  <div class="sc"><div class="sn" style="color:var(--green)">{ttr_p50}</div><div class="sl">Pronto p50 (ms)</div></div>{cov_card}
+</div>{diff_html}
 <div class="table-wrap">
   <div class="section-label">// Detalhamento</div>
   <table>
@@ -427,25 +1262,634 @@ td{{padding:12px 14px;vertical-align:top}}
     <tbody>{rows}</tbody>
   </table>
 </div>
+<div class="table-wrap">
+  <div class="section-label">// Performance por rota (p50 / p95)</div>
+  <table>
+    <thead><tr><th>Modo</th><th>Rota</th><th>N</th>{"".join(f"<th>{label}</th>" for _, label in PERF_COLUMNS)}</tr></thead>
+    <tbody>{perf_rows(route_stats(visits), budgets or {})}</tbody>
+  </table>
+</div>
+<div class="table-wrap">
+  <div class="section-label">// tRPC por página (waterfall / N+1)</div>
+  <table>
+    <thead><tr><th>Modo</th><th>Página</th><th>Chamadas / procs</th><th>Em lote</th><th>Cascata</th><th>Mais repetida</th><th>Maior resposta</th></tr></thead>
+    <tbody>{trpc_rows(visits, base)}</tbody>
+  </table>
+</div>
+<div class="table-wrap">
+  <div class="section-label">// Tempo até pronto (goto → hidratação + rede quieta)</div>
+  <table>
+    <thead><tr><th>Modo</th><th>Página</th><th>Tempo</th><th>Status</th></tr></thead>
+    <tbody>{ready_rows(visits, base)}</tbody>
+  </table>
+</div>{cov_html}
 </body>
 </html>"""
 
 
+def build_report(findings: List[Finding], visits: List[PageVisit], cfg: RunConfig,
+                 duration: float, run_id: str = "", diff: Optional[dict] = None,
+                 coverage: Optional[dict] = None) -> dict:
+    return {
+        "run_id": run_id,
+        "base": cfg.base,
+        "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "duration_s": round(duration, 1),
+        "budgets": [{"route": r, "metric": m, "p75_max": v} for (r, m), v in cfg.budgets.items()],
+        "routes": route_stats(visits),
+        "pages": [{"mode": v.mode, "url": v.url, "route": v.route, "ready": v.ready,
+                   "metrics": v.metrics, "trpc": v.trpc,
+                   "trpc_summary": trpc_summary(v.trpc) if v.trpc else None} for v in visits],
+        "findings": [asdict(f) for f in findings],
+        "compare": diff,
+        "coverage": coverage,
+    }
+
+
+# ------------------------------------------------------------------ #
+# Rotas declaradas (shadia_doctor) → seeds + cobertura
+# ------------------------------------------------------------------ #
+UNREACHABLE_KINDS = {"timeout", "navigation_failed"}
+ZONE_MODES = {"PUBLIC": ("visitor", "user", "admin"), "AUTH": ("user", "admin"), "ADMIN": ("admin",)}
+_PARAM = re.compile(r":(\w+)")
+
+
+def load_declared_routes(src: str) -> List[dict]:
+    """
+    Rotas do front: `shadia_audit.json` gerado pelo shadia_doctor ou, se `src` for a
+    raiz do projeto, scan_routes direto nos fontes. Uma entrada por path.
+    """
+    p = Path(src)
+    if p.is_dir():
+        import shadia_doctor as sd
+        found = [{"path": r.path, "zone": r.zone}
+                 for r in sd.scan_routes(sd.Corpus(p).files(sd.FRONTEND_GLOBS))]
+    else:
+        found = json.loads(p.read_text(encoding="utf-8")).get("routes", [])
+    routes, seen = [], set()
+    for r in found:
+        if r["path"] not in seen:
+            seen.add(r["path"])
+            routes.append({"path": r["path"], "zone": r.get("zone") or "PUBLIC"})
+    return routes
+
+
+def history_samples(db, table: RouteTable) -> Dict[str, str]:
+    """Para cada rota com :param, o path de uma página que casou com ela em runs anteriores."""
+    samples: Dict[str, str] = {}
+    for (url,) in db.execute("SELECT url FROM pages WHERE reachable = 1 ORDER BY rowid DESC LIMIT 5000"):
+        path = url_path(url)
+        pattern = table.match(path)
+        if pattern and ":" in pattern and pattern not in samples:
+            samples[pattern] = path
+    return samples
+
+
+def expand_route(path: str, params: Dict[str, str]) -> Optional[str]:
+    """/courses/:slug + {slug: intro} → /courses/intro; None se falta valor de exemplo."""
+    if "*" in path:
+        return None
+    missing = [name for name in _PARAM.findall(path) if name not in params]
+    return None if missing else _PARAM.sub(lambda m: params[m.group(1)], path)
+
+
+def route_seeds(base: str, routes: List[dict], modes: List[str], params: Dict[str, str],
+                samples: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Seeds por modo a partir das rotas declaradas: estáticas direto, dinâmicas com o
+    valor de --route-param ou com uma página já vista no histórico. Cada modo só recebe
+    as zonas que pode abrir (visitor: públicas; user: + AUTH; admin: todas) — rota com
+    :param sem exemplo fica para ser achada pelos links.
+    """
+    seeds: Dict[str, List[str]] = {m: [] for m in modes}
+    for r in routes:
+        path = expand_route(r["path"], params) or samples.get(r["path"])
+        if not path:
+            continue
+        for mode in ZONE_MODES.get(r["zone"], ZONE_MODES["PUBLIC"]):
+            if mode in seeds:
+                seeds[mode].append(base + path)
+    return seeds
+
+
+def route_coverage(routes: List[dict], table: RouteTable, visits: List[PageVisit]) -> dict:
+    """% das rotas declaradas abertas sem erro de navegação, por modo e no total.
+
+    Só conta a rota se a URL final (depois dos redirects) ainda cai nela: uma
+    rota protegida que mandou para /login não foi coberta.
+    """
+    covered: Dict[str, Set[str]] = {}
+    redirected: Dict[str, str] = {}
+    undeclared: Set[str] = set()
+    for v in visits:
+        pattern = table.match(url_path(v.requested or v.url))
+        if pattern and not any(f.kind in UNREACHABLE_KINDS for f in v.findings):
+            if table.match(url_path(v.url)) == pattern:
+                covered.setdefault(v.mode, set()).add(pattern)
+            else:
+                redirected.setdefault(pattern, url_path(v.url))
+        undeclared.update(url_path(u) for u in v.links if table.match(url_path(u)) is None)
+    declared = [r["path"] for r in routes]
+    union = set().union(*covered.values()) if covered else set()
+    pct = lambda got: round(len(got & set(declared)) / len(declared) * 100, 1) if declared else 0.0
+
+    def reason(path: str) -> str:
+        if path in redirected:
+            return f"redirecionou para {redirected[path]}"
+        return "sem valor de exemplo (--route-param)" if ":" in path else "não abriu em nenhum modo"
+
+    return {
+        "declared": len(declared),
+        "covered": len(union & set(declared)),
+        "pct": pct(union),
+        "by_mode": {m: pct(got) for m, got in covered.items()},
+        "uncovered": [dict(r, reason=reason(r["path"])) for r in routes if r["path"] not in union],
+        "undeclared_links": sorted(undeclared),
+    }
+
+
+# ------------------------------------------------------------------ #
+# Histórico de runs (SQLite) + comparação entre runs
+# ------------------------------------------------------------------ #
+RUNS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY, started_at TEXT, base TEXT, modes TEXT, duration_s REAL, config TEXT);
+CREATE TABLE IF NOT EXISTS pages (
+    run_id TEXT, mode TEXT, ord INTEGER, url TEXT, route TEXT, reachable INTEGER,
+    ready INTEGER, ready_ms REAL, metrics TEXT, links TEXT);
+CREATE TABLE IF NOT EXISTS routes (
+    run_id TEXT, mode TEXT, route TEXT, samples INTEGER, metrics TEXT);
+CREATE TABLE IF NOT EXISTS requests (
+    run_id TEXT, mode TEXT, page TEXT, method TEXT, url TEXT, procs TEXT);
+CREATE TABLE IF NOT EXISTS findings (
+    run_id TEXT, fp TEXT, severity TEXT, kind TEXT, mode TEXT, url TEXT,
+    message TEXT, hint TEXT, details TEXT);
+CREATE INDEX IF NOT EXISTS pages_run ON pages(run_id);
+CREATE INDEX IF NOT EXISTS routes_run ON routes(run_id);
+CREATE INDEX IF NOT EXISTS findings_run ON findings(run_id);
+CREATE INDEX IF NOT EXISTS requests_run ON requests(run_id);
+"""
+
+COMPARE_METRICS = ("ready_ms", "ttfb_ms", "lcp_ms")   # métricas em ms comparadas no p50
+SLOWER_MIN_MS = 50.0                                  # abaixo disto a diferença é ruído
+
+
+def finding_fp(kind: str, mode: str, url: str, message: str) -> str:
+    """
+    Identidade estável de um finding entre runs: tipo + modo + rota + mensagem com
+    números trocados por # ("3 erro(s) no console" e "5 erro(s)..." são o mesmo problema).
+    """
+    key = "|".join((kind, mode, route_key(url), re.sub(r"\d+(\.\d+)?", "#", message)))
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def open_store(path: str):
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    db.executescript(RUNS_SCHEMA)
+    return db
+
+
+def save_run(db, findings: List[Finding], visits: List[PageVisit], cfg: RunConfig,
+             modes: List[str], duration: float) -> str:
+    """Grava grafo visitado, timings e findings; devolve o id da run (AAAAMMDD-HHMMSS)."""
+    now = datetime.datetime.now()
+    run_id = now.strftime("%Y%m%d-%H%M%S")
+    n = 1
+    while db.execute("SELECT 1 FROM runs WHERE id = ?", (run_id,)).fetchone():
+        n += 1
+        run_id = f"{now:%Y%m%d-%H%M%S}-{n}"
+    config = {"max_pages": cfg.max_pages, "lite": cfg.lite, "concurrency": cfg.concurrency,
+              "replay": not cfg.follow_links, "routes": cfg.routes is not None}
+    with db:
+        db.execute("INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                   (run_id, now.isoformat(timespec="seconds"), cfg.base, ",".join(modes),
+                    round(duration, 1), json.dumps(config)))
+        db.executemany("INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            (run_id, v.mode, i, v.url, v.route or route_key(v.url),
+             int(not any(f.kind in UNREACHABLE_KINDS for f in v.findings)),
+             int(v.ready), v.ready_ms, json.dumps(v.metrics), json.dumps(v.links))
+            for i, v in enumerate(visits)])
+        db.executemany("INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?)", [
+            (run_id, v.mode, v.url, c["method"], c["url"], ",".join(c["procs"]))
+            for v in visits for c in v.trpc if c.get("url")])
+        db.executemany("INSERT INTO routes VALUES (?, ?, ?, ?, ?)", [
+            (run_id, st["mode"], st["route"], st["samples"], json.dumps(st["metrics"]))
+            for st in route_stats(visits)])
+        db.executemany("INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            (run_id, finding_fp(f.kind, f.mode, f.url, f.message), f.severity, f.kind,
+             f.mode, f.url, f.message, f.hint, json.dumps(f.details, ensure_ascii=False))
+            for f in findings])
+    return run_id
+
+
+def resolve_run(db, ref: str) -> str:
+    """'last' = run gravada mais recente; senão o id como veio."""
+    if ref == "last":
+        row = db.execute("SELECT id FROM runs ORDER BY started_at DESC, id DESC LIMIT 1").fetchone()
+    else:
+        row = db.execute("SELECT id FROM runs WHERE id = ?", (ref,)).fetchone()
+    if not row:
+        raise KeyError(f"run não encontrada no histórico: {ref}")
+    return row["id"]
+
+
+def load_run(db, run_id: str) -> dict:
+    q = lambda sql: [dict(r) for r in db.execute(sql, (run_id,))]
+    return {
+        "id": run_id,
+        "base": q("SELECT base FROM runs WHERE id = ?")[0]["base"],
+        "pages": q("SELECT mode, url, route, reachable, ready_ms FROM pages WHERE run_id = ? ORDER BY ord"),
+        "requests": q("SELECT mode, page, method, url, procs FROM requests WHERE run_id = ? ORDER BY rowid"),
+        "routes": [{**r, "metrics": json.loads(r["metrics"])}
+                   for r in q("SELECT mode, route, samples, metrics FROM routes WHERE run_id = ?")],
+        "findings": [{**r, "details": json.loads(r["details"])}
+                     for r in q("SELECT fp, severity, kind, mode, url, message, hint, details "
+                                "FROM findings WHERE run_id = ?")],
+    }
+
+
+def list_runs(db, limit: int = 20) -> List[dict]:
+    return [dict(r) for r in db.execute(
+        "SELECT r.id, r.base, r.modes, r.duration_s, "
+        "(SELECT COUNT(*) FROM pages p WHERE p.run_id = r.id) AS pages, "
+        "(SELECT COUNT(*) FROM findings f WHERE f.run_id = r.id) AS findings "
+        "FROM runs r ORDER BY r.id DESC LIMIT ?", (limit,))]
+
+
+def replay_seeds(run: dict) -> Dict[str, List[str]]:
+    """URLs visitadas por modo na run gravada, na ordem do crawl."""
+    out: Dict[str, List[str]] = {}
+    for p in run["pages"]:
+        out.setdefault(p["mode"], []).append(p["url"])
+    return out
+
+
+def compare_runs(old: dict, new: dict, slower_pct: float) -> dict:
+    """
+    Diferença entre duas runs: findings novos e corrigidos (por fingerprint), rotas
+    cujo p50 piorou mais que `slower_pct`% (e mais que SLOWER_MIN_MS) e páginas que
+    abriam na run antiga e agora falham ou sumiram do crawl.
+    """
+    old_fps = {f["fp"] for f in old["findings"]}
+    new_fps = {f["fp"] for f in new["findings"]}
+
+    slower = []
+    before = {(r["mode"], r["route"]): r["metrics"] for r in old["routes"]}
+    for r in new["routes"]:
+        prev = before.get((r["mode"], r["route"]))
+        if not prev:
+            continue
+        for metric in COMPARE_METRICS:
+            if metric not in prev or metric not in r["metrics"]:
+                continue
+            a, b = prev[metric]["p50"], r["metrics"][metric]["p50"]
+            if b - a >= SLOWER_MIN_MS and b > a * (1 + slower_pct / 100):
+                slower.append({"mode": r["mode"], "route": r["route"], "metric": metric,
+                               "before": a, "after": b,
+                               "pct": round((b - a) / a * 100, 1) if a else None})
+
+    now_ok = {(p["mode"], p["route"]) for p in new["pages"] if p["reachable"]}
+    now_failed = {(p["mode"], p["route"]) for p in new["pages"] if not p["reachable"]}
+    unreachable, seen = [], set()
+    for p in old["pages"]:
+        key = (p["mode"], p["route"])
+        if not p["reachable"] or key in now_ok or key in seen:
+            continue
+        seen.add(key)
+        unreachable.append({"mode": p["mode"], "route": p["route"], "url": p["url"],
+                            "reason": "falha ao abrir" if key in now_failed else "não alcançada no crawl"})
+
+    return {
+        "baseline": old["id"],
+        "current": new["id"],
+        "new": [f for f in new["findings"] if f["fp"] not in old_fps],
+        "fixed": [f for f in old["findings"] if f["fp"] not in new_fps],
+        "slower": slower,
+        "unreachable": unreachable,
+    }
+
+
+def has_regressions(diff: dict) -> bool:
+    return bool(diff["slower"] or diff["unreachable"]
+                or any(f["severity"] != "info" for f in diff["new"]))
+
+
+def print_diff(diff: dict, base: str) -> None:
+    print(f"\n  Comparação {diff['baseline']} → {diff['current']}")
+    print(f"  Novos: {len(diff['new'])} | Corrigidos: {len(diff['fixed'])} | "
+          f"Mais lentas: {len(diff['slower'])} | Inalcançáveis: {len(diff['unreachable'])}")
+    print("-"*60)
+    for f in diff["new"][:30]:
+        print(f"  🆕 {SEVERITY_ICON.get(f['severity'],'?')} [{f['mode']}] {f['kind']}  "
+              f"{f['url'].replace(base,'') or '/'}")
+        print(f"     {f['message']}")
+    for s in diff["slower"]:
+        pct = f"+{s['pct']:.0f}%" if s["pct"] is not None else "novo"
+        print(f"  🐢 [{s['mode']}] {s['route']}  {s['metric']} p50 {s['before']:.0f} → {s['after']:.0f} ms ({pct})")
+    for u in diff["unreachable"]:
+        print(f"  🚫 [{u['mode']}] {u['route']}  {u['reason']}")
+    for f in diff["fixed"][:15]:
+        print(f"  ✅ [{f['mode']}] {f['kind']}  {f['url'].replace(base,'') or '/'}")
+
+
+# ------------------------------------------------------------------ #
+# Modo carga: replay das páginas + queries tRPC gravadas
+# ------------------------------------------------------------------ #
+@dataclass
+class LoadTarget:
+    kind: str           # page | trpc
+    key: str            # rota (/courses/:id) ou procedures ("course.get,auth.me")
+    mode: str
+    url: str
+
+
+def load_targets(run: dict, base: str, modes: List[str]) -> List[LoadTarget]:
+    """
+    Páginas e queries tRPC de uma run gravada, sem repetição, reapontadas para `base`
+    (a run pode ter sido gravada em outra origem). Só GET: mutations não são repetidas.
+    """
+    def rebase(u: str) -> str:
+        parts = urlsplit(u)
+        return base + parts.path + (f"?{parts.query}" if parts.query else "")
+
+    out: List[LoadTarget] = []
+    seen: Set[Tuple[str, str]] = set()
+    for p in run["pages"]:
+        if p["mode"] in modes and p["reachable"] and (p["mode"], p["url"]) not in seen:
+            seen.add((p["mode"], p["url"]))
+            out.append(LoadTarget("page", p["route"], p["mode"], rebase(p["url"])))
+    for r in run["requests"]:
+        if r["mode"] in modes and r["method"] == "GET" and (r["mode"], r["url"]) not in seen:
+            seen.add((r["mode"], r["url"]))
+            out.append(LoadTarget("trpc", r["procs"], r["mode"], rebase(r["url"])))
+    return out
+
+
+def session_cookie_header(cfg: RunConfig, mode: str, email: str) -> str:
+    """Cookies da sessão em cache do modo (--auth-cache) como header Cookie; '' sem sessão."""
+    path = cached_auth_state(cfg, auth_state_path(cfg, mode, email)) if email else None
+    if not path:
+        return ""
+    with open(path, encoding="utf-8") as fh:
+        cookies = json.load(fh).get("cookies", [])
+    return "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+
+
+async def run_load(targets: List[LoadTarget], cookies: Dict[str, str], concurrency: int,
+                   duration_s: float, timeout_s: float) -> dict:
+    """
+    `concurrency` workers percorrem os alvos em rodízio até `duration_s`, cada modo com
+    um AsyncClient próprio (keep-alive, pool do tamanho da concorrência) para as sessões
+    não se misturarem. Erro = exceção ou status ≥ 400.
+    """
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("❌ Modo carga precisa do httpx: pip install httpx")
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    clients = {mode: httpx.AsyncClient(limits=limits, timeout=timeout_s, follow_redirects=False,
+                                       headers={"Cookie": cookie} if cookie else {})
+               for mode, cookie in cookies.items()}
+    samples: Dict[Tuple[str, str], List[float]] = {}
+    errors: Dict[Tuple[str, str], Dict[str, int]] = {}
+    deadline = time.perf_counter() + duration_s
+
+    async def worker(offset: int) -> None:
+        i = offset
+        while time.perf_counter() < deadline:
+            t = targets[i % len(targets)]
+            i += concurrency
+            key = (t.kind, t.key)
+            t0 = time.perf_counter()
+            try:
+                resp = await clients[t.mode].get(t.url)
+                status = str(resp.status_code) if resp.status_code >= 400 else ""
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            samples.setdefault(key, []).append((time.perf_counter() - t0) * 1000)
+            if status:
+                bucket = errors.setdefault(key, {})
+                bucket[status] = bucket.get(status, 0) + 1
+
+    t_start = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(k) for k in range(concurrency)))
+    finally:
+        for c in clients.values():
+            await c.aclose()
+    elapsed = time.perf_counter() - t_start
+
+    rows = []
+    for (kind, key), xs in sorted(samples.items(), key=lambda kv: -percentile(kv[1], 95)):
+        errs = errors.get((kind, key), {})
+        rows.append({"kind": kind, "key": key, "requests": len(xs),
+                     "rps": round(len(xs) / elapsed, 1),
+                     "error_rate": round(sum(errs.values()) / len(xs) * 100, 2), "errors": errs,
+                     **{f"p{q}": round(percentile(xs, q), 1) for q in (50, 95, 99)}})
+    total = sum(r["requests"] for r in rows)
+    failed = sum(sum(r["errors"].values()) for r in rows)
+    every = [x for xs in samples.values() for x in xs]
+    return {
+        "targets": len(targets), "concurrency": concurrency, "duration_s": round(elapsed, 1),
+        "requests": total, "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(failed / total * 100, 2) if total else 0.0,
+        **{f"p{q}": round(percentile(every, q), 1) for q in (50, 95, 99)},
+        "rows": rows,
+    }
+
+
+def print_load(report: dict) -> None:
+    print(f"\n  {report['requests']} requisições em {report['duration_s']}s | "
+          f"{report['rps']} req/s | erros {report['error_rate']}% | "
+          f"p50 {report['p50']:.0f} · p95 {report['p95']:.0f} · p99 {report['p99']:.0f} ms")
+    print("-"*60)
+    print(f"  {'tipo':<5} {'rota / procedure':<40} {'req':>6} {'req/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'erro%':>6}")
+    for r in report["rows"]:
+        print(f"  {r['kind']:<5} {r['key'][:40]:<40} {r['requests']:>6} {r['rps']:>7} "
+              f"{r['p50']:>7.0f} {r['p95']:>7.0f} {r['p99']:>7.0f} {r['error_rate']:>6}")
+
+
 # ------------------------------------------------------------------ #
 # CLI
 # ------------------------------------------------------------------ #
+async def run_modes(modes: List[str], creds: Dict[str, Tuple[str, str]],
+                    cfg: RunConfig) -> Tuple[List[Finding], List[PageVisit]]:
+    per_mode: List[Tuple[List[Finding], List[PageVisit]]] = []
+    gate = RequestGate(cfg.lite, cfg.http_cache)
+    async with async_playwright() as pw:
+        if cfg.parallel_modes:
+            # Um browser só, um contexto isolado por modo, todos ao mesmo tempo
+            browser = await pw.chromium.launch(headless=cfg.headless, args=browser_args())
+            try:
+                per_mode = list(await asyncio.gather(*(
+                    run_mode(browser, cfg, mode, *creds.get(mode, ("", "")), gate=gate)
+                    for mode in modes)))
+            finally:
+                await browser.close()
+        else:
+            for mode in modes:
+                # Cada modo usa um browser separado — evita acúmulo de memória
+                browser = await pw.chromium.launch(headless=cfg.headless, args=browser_args())
+                try:
+                    per_mode.append(await run_mode(browser, cfg, mode, *creds.get(mode, ("", "")),
+                                                   gate=gate))
+                finally:
+                    await browser.close()   # fecha o browser inteiro — libera toda memória do Node.js
+    if gate.active:
+        print(f"\n  Perfil leve: {gate.summary()}")
+    return ([f for findings, _ in per_mode for f in findings],
+            [v for _, visits in per_mode for v in visits])
+
+
+def run_load_mode(args, db, base: str, modes: List[str]) -> int:
+    run = load_run(db, resolve_run(db, args.load))
+    targets = load_targets(run, base, modes)
+    if not targets:
+        print(f"  ⚠️  Run {run['id']} não tem páginas/queries GET para os modos {','.join(modes)}")
+        return 1
+    # sessão em cache do login feito contra a origem gravada na run
+    auth = RunConfig(base=run["base"], seeds=[], auth_dir=args.auth_cache,
+                     auth_max_age_h=args.auth_max_age, fresh_login=args.fresh_login)
+    cookies = {m: session_cookie_header(auth, m, os.getenv(f"AUDIT_{m.upper()}_EMAIL", ""))
+               for m in {t.mode for t in targets}}
+    print(f"  🔁 Carga: {len(targets)} alvos da run {run['id']} → {base} | "
+          f"{args.load_concurrency} simultâneas por {args.load_duration:g}s | "
+          f"sessão: {', '.join(m for m, c in cookies.items() if c) or 'nenhuma'}")
+    report = asyncio.run(run_load(targets, cookies, max(1, args.load_concurrency),
+                                  args.load_duration, args.load_timeout))
+    report.update(run_id=run["id"], base=base)
+    print_load(report)
+    json_out = os.path.splitext(args.out)[0] + ".load.json"
+    with open(json_out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, ensure_ascii=False, indent=2)
+    print(f"  🧾 Relatório de carga → {os.path.abspath(json_out)}")
+    return 0
+
+
 def main():
     ap = argparse.ArgumentParser(description="Auditor E2E leve – Shadia Platform")
     ap.add_argument("--base", default="http://localhost:3001")
-    ap.add_argument("--max", type=int, default=25, help="Páginas por modo (padrão: 25)")
+    ap.add_argument("--max", type=int, default=None,
+                    help="Páginas por modo (padrão: 25; com --routes, o nº de rotas declaradas)")
     ap.add_argument("--out", default="audit_e2e_report.html")
     ap.add_argument("--headless", action="store_true")
+    ap.add_argument("--concurrency", type=int, default=4,
+                    help="Abas simultâneas por modo, mesma sessão (padrão: 4; 1 = sequencial)")
     ap.add_argument("--modes", default="visitor,user,admin",
                     help="Modos separados por vírgula: visitor,user,admin")
+    ap.add_argument("--parallel-modes", action="store_true",
+                    help="Um browser só, com um contexto isolado por modo, rodando os modos em paralelo")
+    ap.add_argument("--auth-cache", default=".nav_audit_auth",
+                    help="Pasta do storage_state salvo após o login ('' desliga; contém cookies — não versionar)")
+    ap.add_argument("--auth-max-age", type=float, default=12.0,
+                    help="Horas até a sessão em cache ser descartada (padrão: 12)")
+    ap.add_argument("--fresh-login", action="store_true", help="Ignora a sessão em cache e refaz o login")
+    ap.add_argument("--recycle-heap-mb", type=float, default=256.0,
+                    help="Recicla a aba quando o heap JS medido passa disto (padrão: 256; 0 desliga)")
+    ap.add_argument("--recycle-every", type=int, default=0,
+                    help="Recicla a aba a cada N visitas, além do critério de heap (padrão: 0 = desligado)")
+    ap.add_argument("--ready-timeout", type=int, default=5000,
+                    help="Teto (ms) para a página ficar pronta: hidratação + rede quieta (padrão: 5000)")
+    ap.add_argument("--quiet-ms", type=int, default=150,
+                    help="Janela (ms) sem fetch/xhr pendente que conta como rede quieta (padrão: 150)")
+    ap.add_argument("--ready-selector", default="",
+                    help="Seletor CSS que define 'página pronta' no lugar da hidratação do #root")
+    ap.add_argument("--budget", action="append", default=[], metavar="[/ROTA:]MÉTRICA=VALOR",
+                    help="Orçamento de performance no p75 por rota (repetível). Ex.: lcp_ms=2000, "
+                         "/admin/dashboard:trpc_calls=30; métrica=0 desliga. Padrões: "
+                         + ", ".join(f"{k}={v:g}" for k, v in DEFAULT_BUDGETS.items()))
+    ap.add_argument("--trpc-repeat", type=int, default=3,
+                    help="Procedure tRPC repetida N+ vezes na mesma página vira finding N+1 (padrão: 3)")
+    ap.add_argument("--trpc-waterfall", type=int, default=3,
+                    help="Cadeia de N+ chamadas tRPC em série vira finding de waterfall (padrão: 3)")
+    ap.add_argument("--trpc-max-kb", type=float, default=256.0,
+                    help="Resposta tRPC acima disto (KB) vira finding (padrão: 256)")
+    ap.add_argument("--lite", action="store_true",
+                    help="Perfil leve: aborta imagens, mídia, fontes e analytics/embeds (Umami, GTM, Cloudflare Stream)")
+    ap.add_argument("--http-cache", action="store_true",
+                    help="Cache em memória de JS/CSS compartilhado entre abas e modos")
+    ap.add_argument("--routes", metavar="ARQUIVO|PASTA",
+                    help="Semeia o crawl com as rotas declaradas: shadia_audit.json do shadia_doctor ou a raiz "
+                         "do projeto (scan_routes). Uma visita por rota e cobertura no relatório")
+    ap.add_argument("--route-param", action="append", default=[], metavar="NOME=VALOR",
+                    help="Valor de exemplo para :NOME nas rotas dinâmicas (repetível). Ex.: slug=intro, id=1")
+    ap.add_argument("--store", default=".nav_audit_runs.sqlite",
+                    help="Histórico SQLite das runs: grafo visitado, timings e findings ('' desliga)")
+    ap.add_argument("--runs", action="store_true", help="Lista as últimas runs gravadas e sai")
+    ap.add_argument("--compare", metavar="RUN_ID",
+                    help="Compara com uma run gravada ('last' = a anterior): só findings novos/corrigidos, "
+                         "rotas mais lentas e páginas que deixaram de abrir")
+    ap.add_argument("--against", metavar="RUN_ID",
+                    help="Com --compare: compara duas runs gravadas sem rodar o crawl")
+    ap.add_argument("--replay", metavar="RUN_ID",
+                    help="Revisita exatamente as páginas de uma run gravada, na mesma ordem, sem seguir links")
+    ap.add_argument("--slower-pct", type=float, default=20.0,
+                    help="Rota conta como mais lenta quando o p50 piora mais que isto em %% (padrão: 20)")
+    ap.add_argument("--load", metavar="RUN_ID",
+                    help="Teste de carga: repete as páginas e queries tRPC (GET) de uma run gravada "
+                         "('last' = a mais recente) contra --base, sem abrir browser")
+    ap.add_argument("--load-concurrency", type=int, default=20,
+                    help="Requisições simultâneas no modo carga (padrão: 20)")
+    ap.add_argument("--load-duration", type=float, default=30.0,
+                    help="Duração do teste de carga em segundos (padrão: 30)")
+    ap.add_argument("--load-timeout", type=float, default=10.0,
+                    help="Timeout por requisição no modo carga, em segundos (padrão: 10)")
+    ap.add_argument("--fail-on-regression", action="store_true",
+                    help="Sai com código 1 se --compare encontrar regressões (para o crawl noturno)")
     args = ap.parse_args()
 
     base = args.base.rstrip("/")
     modes = [m.strip() for m in args.modes.split(",")]
+    try:
+        budgets = parse_budgets(args.budget)
+    except ValueError as e:
+        ap.error(str(e))
+
+    if (args.runs or args.compare or args.replay or args.load) and not args.store:
+        ap.error("--runs/--compare/--replay/--load precisam do histórico (--store)")
+    if args.against and not args.compare:
+        ap.error("--against só faz sentido junto com --compare")
+    if args.routes and args.replay:
+        ap.error("--routes e --replay escolhem as páginas de jeitos diferentes; use um só")
+    params = dict(kv.split("=", 1) for kv in args.route_param if "=" in kv)
+    if len(params) != len(args.route_param):
+        ap.error("--route-param espera NOME=VALOR")
+    db = open_store(args.store) if args.store else None
+
+    if args.runs:
+        for r in list_runs(db):
+            print(f"  {r['id']}  {r['modes']:<20} {r['pages']:>4} páginas  {r['findings']:>4} findings"
+                  f"  {r['duration_s']:.0f}s  {r['base']}")
+        return 0
+
+    try:
+        if args.against:
+            diff = compare_runs(load_run(db, resolve_run(db, args.compare)),
+                                load_run(db, resolve_run(db, args.against)), args.slower_pct)
+            print_diff(diff, base)
+            return 1 if args.fail_on_regression and has_regressions(diff) else 0
+        if args.load:
+            return run_load_mode(args, db, base, modes)
+        replay = replay_seeds(load_run(db, resolve_run(db, args.replay))) if args.replay else {}
+        baseline = resolve_run(db, args.compare) if args.compare else ""
+    except KeyError as e:
+        ap.error(e.args[0])
+
+    declared: List[dict] = []
+    table: Optional[RouteTable] = None
+    route_seed: Dict[str, List[str]] = {}
+    if args.routes:
+        try:
+            declared = load_declared_routes(args.routes)
+        except (OSError, ValueError) as e:
+            ap.error(f"não consegui ler as rotas de {args.routes}: {e}")
+        table = RouteTable(r["path"] for r in declared)
+        samples = history_samples(db, table) if db else {}
+        route_seed = route_seeds(base, declared, modes, params, samples)
+        print(f"  🧭 {len(declared)} rotas declaradas → "
+              + ", ".join(f"{m}: {len(u)} seeds" for m, u in route_seed.items()))
 
     seeds = [
         base + "/",
@@ -477,16 +1921,26 @@ def main():
     }
 
     t0 = time.time()
-    all_findings: List[Finding] = []
-
-    with sync_playwright() as pw:
-        for mode in modes:
-            email, password = creds.get(mode, ("", ""))
-            findings = run_mode(pw, base, seeds, mode, email, password,
-                                max_pages=args.max, headless=args.headless)
-            all_findings.extend(findings)
+    cfg = RunConfig(
+        base=base, seeds=seeds, headless=args.headless,
+        max_pages=args.max or (len(declared) if declared else 25),
+        concurrency=args.concurrency, parallel_modes=args.parallel_modes,
+        auth_dir=args.auth_cache, auth_max_age_h=args.auth_max_age,
+        fresh_login=args.fresh_login, recycle_heap_mb=args.recycle_heap_mb,
+        recycle_every=args.recycle_every, ready_timeout_ms=args.ready_timeout,
+        quiet_ms=args.quiet_ms, ready_selector=args.ready_selector,
+        lite=args.lite, http_cache=args.http_cache, budgets=budgets,
+        trpc_repeat=args.trpc_repeat, trpc_waterfall=args.trpc_waterfall,
+        trpc_max_kb=args.trpc_max_kb,
+        seeds_by_mode=replay or route_seed, follow_links=not replay,
+        routes=table, link_limit=0 if declared else 20,
+    )
+    if replay:
+        modes = [m for m in modes if m in replay]
+    all_findings, visits = asyncio.run(run_modes(modes, creds, cfg))
 
     duration = time.time() - t0
+    coverage = route_coverage(declared, table, visits) if table else None
 
     # --- Terminal summary ---
     errors = [f for f in all_findings if f.severity == "error"]
@@ -497,6 +1951,13 @@ def main():
     print("="*60)
     print(f"  Findings: {len(all_findings)} | Erros: {len(errors)} | Avisos: {len(warns)}")
     print(f"  Duração:  {duration:.1f}s")
+    ready = [v.ready_ms for v in visits if v.ready_ms]
+    if ready:
+        print(f"  Pronto:   p50 {percentile(ready, 50):.0f} ms | p95 {percentile(ready, 95):.0f} ms"
+              f" | {sum(1 for v in visits if not v.ready)} página(s) sem ficar pronta")
+    if coverage:
+        print(f"  Rotas:    {coverage['covered']}/{coverage['declared']} cobertas ({coverage['pct']:.0f}%) | "
+              + " | ".join(f"{m} {p:.0f}%" for m, p in coverage["by_mode"].items()))
     print("-"*60)
     for f in (errors + warns)[:30]:
         print(f"  {SEVERITY_ICON.get(f.severity,'?')} [{f.mode}] {f.kind}")
@@ -506,13 +1967,31 @@ def main():
             print(f"     💡 {f.hint}")
         print()
 
+    # --- Histórico + comparação ---
+    run_id, diff = "", None
+    if db:
+        run_id = save_run(db, all_findings, visits, cfg, modes, duration)
+        print(f"  🗄️  Run gravada: {run_id} ({args.store})")
+        if baseline:
+            diff = compare_runs(load_run(db, baseline), load_run(db, run_id), args.slower_pct)
+            print_diff(diff, base)
+        db.close()
+
+    # --- JSON report (métricas por página e por rota) ---
+    json_out = os.path.splitext(args.out)[0] + ".json"
+    with open(json_out, "w", encoding="utf-8") as fh:
+        json.dump(build_report(all_findings, visits, cfg, duration, run_id, diff, coverage), fh,
+                  ensure_ascii=False, indent=2)
+    print(f"  🧾 Relatório JSON → {os.path.abspath(json_out)}")
+
     # --- HTML report ---
-    html = generate_html(all_findings, base, duration)
+    html = generate_html(all_findings, base, duration, visits, cfg.budgets, diff, coverage)
     with open(args.out, "w", encoding="utf-8") as fh:
         fh.write(html)
     print(f"  📄 Relatório HTML → {os.path.abspath(args.out)}")
     print("="*60)
+    return 1 if args.fail_on_regression and diff and has_regressions(diff) else 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -2,6 +2,8 @@ import os
 import re
 from pathlib import Path
 
+from common import walk_files
+
 ROOT = Path(".")
 REPORT = []
 
@@ -16,10 +18,10 @@ print("\n🔎 Escaneando projeto...\n")
 # =========================
 all_files = []
 
-for root, dirs, files in os.walk(ROOT):
-    for file in files:
-        path = os.path.join(root, file)
-        all_files.append(path)
+# scandir com poda: node_modules/.git/dist & cia ficam de fora. O .gitignore NÃO é
+# respeitado: .env e afins costumam estar nele e são justamente o que se inspeciona aqui
+for rel, _ in walk_files(ROOT, gitignore=False):
+    all_files.append(os.path.join(ROOT, rel))
 
 add(f"📂 Total de arquivos encontrados: {len(all_files)}")
 
@@ -17,8 +17,8 @@ from pathlib import Path
 from typing import Dict, List, Set, Tuple
 
 from common import (
-    Finding, ensure_reports_dir, findings_summary, hr, log, now_iso,
-    safe_rel, write_json, write_text, exit_for_strict,
+    FileWalk, Finding, ensure_reports_dir, findings_summary, hr, log, now_iso,
+    safe_rel, write_json, write_text, exit_for_strict, LineIndex,
 )
 
 ROOT = Path(".").resolve()
@@ -34,13 +34,9 @@ TEXT_EXT = {".js",".ts",".tsx",".jsx",".json",".mjs",".cjs",".env",".md",".yml",
 RE_LOCALHOST = re.compile(r"\b(localhost|127\.0\.0\.1)\b", re.IGNORECASE)
 RE_PORT_HARDCODE = re.compile(r"\b(3000|3001|5173|8080)\b")
 
-def iter_files(root: Path, ignore_dirs: Set[str]) -> List[Path]:
+def iter_files(root: Path, ignore_dirs: Set[str], gitignore: bool = True) -> List[Path]:
     out: List[Path] = []
-    for p in root.rglob("*"):
-        if p.is_dir():
-            continue
-        if any(part in ignore_dirs for part in p.parts):
-            continue
+    for p in FileWalk(root, skip_dirs=ignore_dirs, gitignore=gitignore).all():
         if p.suffix.lower() in IGNORE_FILES_SUFFIX:
             continue
         if p.suffix.lower() not in TEXT_EXT and p.name not in {"package.json","pnpm-lock.yaml","yarn.lock","package-lock.json"}:
@@ -69,11 +65,12 @@ def scan_patterns(files: List[Path]) -> Dict[str, List[Dict]]:
             txt = fp.read_text(encoding="utf-8", errors="ignore")
         except Exception:
             continue
+        lines = LineIndex(txt)
         for m in RE_LOCALHOST.finditer(txt):
-            line = txt.count("\n", 0, m.start()) + 1
+            line = lines.line(m.start())
             hits["localhost"].append({"file": safe_rel(fp), "line": line, "match": m.group(0)})
         for m in RE_PORT_HARDCODE.finditer(txt):
-            line = txt.count("\n", 0, m.start()) + 1
+            line = lines.line(m.start())
             hits["hardcoded_ports"].append({"file": safe_rel(fp), "line": line, "match": m.group(0)})
     return hits
 
@@ -83,6 +80,7 @@ def main() -> None:
     ap.add_argument("--strict", action="store_true", help="Exit non-zero if critical fails are found.")
     ap.add_argument("--json", action="store_true", help="Also print JSON to stdout.")
     ap.add_argument("--ignore-dir", action="append", default=[], help="Additional dir names to ignore (repeatable).")
+    ap.add_argument("--no-gitignore", action="store_true", help="Also scan paths listed in .gitignore.")
     args = ap.parse_args()
 
     ignore_dirs = set(DEFAULT_IGNORE_DIRS) | set(args.ignore_dir)
@@ -94,7 +92,7 @@ def main() -> None:
     else:
         log("ok", "package.json encontrado.")
 
-    files = iter_files(ROOT, ignore_dirs)
+    files = iter_files(ROOT, ignore_dirs, not args.no_gitignore)
     log("info", f"Arquivos de texto analisados: {len(files)}")
 
     log("step", "Passo 2: procurar padrões perigosos (localhost/portas hardcoded)")
@@ -21,6 +21,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Iterable, List, Optional, Tuple
 
+from common import FileWalk, ImportGraph
+
 TEXT_EXTS = {".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".json", ".md", ".css", ".env", ".yml", ".yaml"}
 CODE_EXTS = {".ts", ".tsx", ".js", ".jsx"}
 
@@ -29,12 +31,9 @@ DEFAULT_IGNORES = {
     ".vite", ".output", "coverage", ".pnpm-store"
 }
 
-IMPORT_RE = re.compile(
-    r"""(?mx)
-    ^\s*import\s+(?:type\s+)?(?:[\w*\s{},]+from\s+)?["']([^"']+)["']\s*;?\s*$
-    |^\s*export\s+[^"']*from\s+["']([^"']+)["']\s*;?\s*$
-    """
-)
+# Pontos de entrada do client: módulos fora do alcance deles são órfãos
+CLIENT_ENTRIES = ["client/src/main.tsx", "client/src/main.ts", "client/src/index.tsx"]
+NOT_ORPHAN_RE = re.compile(r"(\.test\.|\.spec\.|/__tests__/|\.stories\.|/vite-env\.d\.ts$)")
 
 @dataclass
 class Finding:
@@ -51,14 +50,9 @@ def read_text(p: Path) -> str:
 def write_text(p: Path, s: str) -> None:
     p.write_text(s, encoding="utf-8", newline="\n")
 
-def is_ignored(path: Path, ignores: set[str]) -> bool:
-    parts = set(path.parts)
-    return any(x in parts for x in ignores)
-
 def iter_files(root: Path, ignores: set[str]) -> Iterable[Path]:
-    for p in root.rglob("*"):
-        if p.is_file() and not is_ignored(p, ignores):
-            yield p
+    # scandir com poda: node_modules & cia nem são abertos
+    return FileWalk(root, skip_dirs=ignores).all()
 
 def detect_repo_root(start: Path) -> Optional[Path]:
     cur = start.resolve()
@@ -149,120 +143,46 @@ def apply_safe_fixes(root: Path, findings: List[Finding], backup_dir: Path) -> i
 
     return modified
 
-def parse_tsconfig_paths(root: Path) -> dict:
+def build_import_graph(root: Path) -> ImportGraph:
     """
-    Lê tsconfig.json e tenta extrair paths (alias) se existir.
+    Grafo de imports locais do repo inteiro (resolver com tsconfig paths + cache de diretórios).
+    Imports quebrados, módulos órfãos e --depends-on saem todos deste grafo.
     """
-    ts = root / "tsconfig.json"
-    if not ts.exists():
-        return {}
-    try:
-        data = json.loads(read_text(ts))
-        return data.get("compilerOptions", {}).get("paths", {}) or {}
-    except Exception:
-        return {}
-
-def resolve_import_to_paths(import_path: str, importer: Path, root: Path, alias_paths: dict) -> Optional[Path]:
-    """
-    Resolve import local para um path do filesystem (best-effort).
-    - suporta relativo ./ ../
-    - suporta alias @/ se tsconfig paths ou padrão client/src
-    """
-    # ignore packages (react, express, etc.)
-    if import_path.startswith(("react", "wouter", "three", "@react-", "drizzle-", "zod")):
-        return None
-    if not (import_path.startswith((".", "/", "@/")) or import_path.startswith("@/")):
-        # Pode ser package. Não sabemos resolver sem node.
-        return None
-
-    # Relativo
-    if import_path.startswith("."):
-        base = importer.parent
-        cand = (base / import_path).resolve()
-        return cand
-
-    # Alias "@/"
-    if import_path.startswith("@/"):
-        # tentamos resolver via tsconfig paths (se houver)
-        # e fallback para client/src
-        suffix = import_path[2:]  # remove "@/"
-        # 1) tsconfig paths (ex: "@/*": ["client/src/*"])
-        for k, v in alias_paths.items():
-            if not isinstance(v, list):
-                continue
-            # padrões tipo "@/*"
-            if k.endswith("/*") and k.startswith("@/"):
-                prefix = k[:-1]  # "@/"" com "*"
-                if import_path.startswith(prefix):
-                    tail = import_path[len(prefix):]
-                    for target in v:
-                        # target: "client/src/*"
-                        target_prefix = target[:-1] if target.endswith("*") else target
-                        cand = (root / target_prefix / tail).resolve()
-                        return cand
-
-        # 2) fallback padrão do seu projeto (comum): client/src
-        fallback = (root / "client" / "src" / suffix).resolve()
-        return fallback
-
-    return None
-
-def exists_with_ts_ext(p: Path) -> bool:
-    """
-    Checa se arquivo existe com extensões comuns ou index.* dentro do diretório.
-    """
-    # se já tem extensão e existe
-    if p.exists():
-        return True
-
-    # tentar extensões
-    for ext in (".ts", ".tsx", ".js", ".jsx"):
-        if p.with_suffix(ext).exists():
-            return True
-
-    # tentar index.*
-    if p.is_dir():
-        for ext in (".ts", ".tsx", ".js", ".jsx"):
-            if (p / f"index{ext}").exists():
-                return True
-
-    # se path aponta para algo sem extensão, checar diretório
-    if p.suffix == "":
-        for ext in (".ts", ".tsx", ".js", ".jsx"):
-            if (Path(str(p) + ext)).exists():
-                return True
-        for ext in (".ts", ".tsx", ".js", ".jsx"):
-            if (p / f"index{ext}").exists():
-                return True
-
-    return False
-
-def scan_imports(root: Path, findings: List[Finding]) -> None:
-    alias_paths = parse_tsconfig_paths(root)
-
+    graph = ImportGraph(root)
     for p in iter_files(root, DEFAULT_IGNORES):
-        if p.suffix.lower() not in CODE_EXTS:
+        if p.suffix.lower() in CODE_EXTS:
+            graph.add_file(p, read_text(p))
+    return graph
+
+def scan_imports(root: Path, findings: List[Finding]) -> ImportGraph:
+    graph = build_import_graph(root)
+
+    for e in graph.broken():
+        findings.append(Finding(
+            "ERROR",
+            e.importer,
+            f"Import parece quebrado: '{e.spec}' (linha {e.line}, não encontrei arquivo alvo em disco)."
+        ))
+
+    for m in graph.orphans(CLIENT_ENTRIES, "client/src/"):
+        if NOT_ORPHAN_RE.search(m):
             continue
-
-        txt = read_text(p)
-        for m in IMPORT_RE.finditer(txt):
-            imp = m.group(1) or m.group(2)
-            if not imp:
-                continue
-            # ignora coisas tipo "node:fs"
-            if imp.startswith("node:"):
-                continue
-
-            resolved = resolve_import_to_paths(imp, p, root, alias_paths)
-            if resolved is None:
-                continue
-
-            if not exists_with_ts_ext(resolved):
-                findings.append(Finding(
-                    "ERROR",
-                    str(p.relative_to(root)),
-                    f"Import parece quebrado: '{imp}' (não encontrei arquivo alvo em disco)."
-                ))
+        findings.append(Finding(
+            "WARN",
+            m,
+            "Módulo órfão: não é alcançável a partir de client/src/main.tsx (ninguém importa, nem via import())."
+        ))
+    return graph
+
+def print_dependents(graph: ImportGraph, target: str) -> None:
+    target = target.replace("\\", "/")
+    if target.startswith("./"):
+        target = target[2:]
+    direct = graph.dependents(target)
+    chain = graph.dependents(target, transitive=True)
+    print(f"[repo_doctor] Quem depende de {target}: {len(direct)} direto(s), {len(chain)} no total")
+    for m in chain:
+        print(f"   {'•' if m in direct else '·'} {m}")
 
 def check_env(root: Path, findings: List[Finding]) -> None:
     """
@@ -357,6 +277,8 @@ def main() -> int:
     ap.add_argument("--fix", action="store_true", help="Aplicar correções seguras automaticamente")
     ap.add_argument("--run", action="store_true", help="Rodar pnpm install/lint/typecheck/build/test e anexar logs")
     ap.add_argument("--skip-install", action="store_true", help="Quando usar --run, não roda pnpm install")
+    ap.add_argument("--depends-on", action="append", default=[], metavar="ARQUIVO",
+                    help="Listar quem importa ARQUIVO (direto e transitivo), ex: client/src/pages/Home.tsx")
     args = ap.parse_args()
 
     start = Path(args.root)
@@ -375,8 +297,12 @@ def main() -> int:
         modified = apply_safe_fixes(root, findings, backup_dir)
         findings.append(Finding("INFO", "-", f"Autofix: {modified} arquivo(s) modificado(s). Backups em {backup_dir.relative_to(root)}"))
 
-    # 2) Scan imports quebrados
-    scan_imports(root, findings)
+    # 2) Grafo de imports: quebrados + órfãos (salvo em import_graph.json)
+    graph = scan_imports(root, findings)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_text(out_dir / "import_graph.json", json.dumps(graph.as_dict(), indent=2, ensure_ascii=False))
+    for target in args.depends_on:
+        print_dependents(graph, target)
 
     # 3) Checar env / integrações esperadas
     check_env(root, findings)
@@ -7,11 +7,13 @@
 
 MODO AUDITORIA (padrão — leitura, zero escrita):
   python shadia_doctor.py --root /caminho/do/projeto
+  python shadia_doctor.py --root . --jobs 0   (scanners em paralelo, 1 processo/núcleo)
 
 MODO AUTOFIX (--apply grava alterações, cria backups):
   python shadia_doctor.py --root . --apply --fix-all
   python shadia_doctor.py --root . --apply --fix-links --fix-routes
   python shadia_doctor.py --root . --dry-run --fix-all  (mostra diff sem gravar)
+  python shadia_doctor.py --root . --show-diff client/src/App.tsx   (diff sob demanda)
 
 FLAGS DE FIX:
   --fix-all            Ativa todos os fixers abaixo
@@ -24,6 +26,11 @@ FLAGS DE FIX:
 SAÍDA:
   <out>/shadia_audit.json   — dados completos em JSON
   <out>/shadia_report.html  — relatório interativo premium
+  <out>/.cache/             — cache incremental por arquivo (--no-cache ignora)
+  --profile                 — tabela de tempo por etapa + seção "timings" no JSON
+  .shadia_backups/          — backups do --apply: blobs por hash (deduplicados entre
+                              execuções) + um manifesto por execução em runs/
+                              (--restore / --restore-from RUN desfazem; --gc limpa)
 
 Uso com Render.com:
   Adicione este script no repo e rode no CI antes do build:
@@ -32,19 +39,28 @@ Uso com Render.com:
 
 from __future__ import annotations
 
-import argparse, datetime, difflib, json, re, shutil, sys
+import argparse, datetime, difflib, json, os, re, shutil, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from common import (
+    AnchoredScan, BackupStore, Edit, EditBatch, FileWalk, LineIndex, RouteTable, ScanCache, TextChange,
+    TrpcMount, parse_trpc_routers, render_changes, tool_salt, trpc_mounted_namespace, trpc_prefixes,
+)
 
 # ═══════════════════════════════ CONFIG ═══════════════════════════════════════
 
 SKIP_DIRS: Set[str] = {
     "node_modules", "dist", "build", ".git", ".turbo", ".next",
     ".vite", ".cache", ".pnpm", ".repo_doctor", ".doctor_backups",
-    "nav_audit", "super_audit", "shadia_out", "__pycache__",
+    "nav_audit", "super_audit", "shadia_out", "__pycache__", ".shadia_backups",
 }
 
+BACKUP_DIR = ".shadia_backups"   # store de backups do --apply (ver BackupStore)
+
 PAGE_GLOBS     = ["client/src/pages/**/*.tsx", "src/pages/**/*.tsx"]
 FRONTEND_GLOBS = ["client/src/**/*.ts", "client/src/**/*.tsx",
                   "src/**/*.ts",         "src/**/*.tsx"]
@@ -118,10 +134,9 @@ R_PUSH       = re.compile(r'\.push\(\s*["\']([^"\']+)["\']\s*\)',        re.M)
 R_HREF_ASSIGN= re.compile(r'(?:location\.href|window\.location)\s*=\s*["\']([^"\']+)["\']', re.M)
 
 # ── tRPC ──
-R_TRPC_USE   = re.compile(r'trpc\.([A-Za-z_]\w*)\.([A-Za-z_]\w*)\.(?:useQuery|useMutation|useSubscription|useSuspenseQuery|useInfiniteQuery|mutate(?:Async)?|query)', re.M)
-R_TRPC_UTILS = re.compile(r'trpc\.([A-Za-z_]\w*)\.([A-Za-z_]\w*)\.(?:invalidate|refetch|setData|cancel)',                               re.M)
+R_TRPC_USE   = re.compile(r'trpc\.((?:[A-Za-z_]\w*\.)+?)([A-Za-z_]\w*)\.(?:useQuery|useMutation|useSubscription|useSuspenseQuery|useInfiniteQuery|mutate(?:Async)?|query)', re.M)
+R_TRPC_UTILS = re.compile(r'trpc\.((?:[A-Za-z_]\w*\.)+?)([A-Za-z_]\w*)\.(?:invalidate|refetch|setData|cancel)',                               re.M)
 R_TRPC_NS    = re.compile(r'([A-Za-z_]\w*)\s*:\s*(?:router|createRouter)\s*\(\s*\{',                                                    re.M)
-R_TRPC_PROC  = re.compile(r'([A-Za-z_]\w*)\s*:\s*(publicProcedure|protectedProcedure|adminProcedure|procedure)\b',                      re.M)
 
 # ── Schema ──
 R_TABLE      = re.compile(r'export\s+const\s+([A-Za-z_]\w*)\s*=\s*(?:mysqlTable|pgTable|sqliteTable|table)\s*\(\s*["\']([^"\']+)["\']', re.M)
@@ -170,14 +185,20 @@ class LinkFinding:
     line: int
     zone_guess: str
     is_broken: bool = False
+    route: Optional[str] = None   # padrão de rota que atendeu o link (RouteTable)
+    start: int = -1               # offsets do href no texto varrido (para o autofix)
+    end: int = -1
 
 @dataclass
 class TrpcProc:
-    namespace: str
+    namespace: str       # caminho completo: "auth", "videos.admin", "__root__"
     name: str
     kind: str
     file: str
     line: int
+    end_line: int = 0
+    has_input: bool = False
+    router: Optional[str] = None   # variável do router de topo (ex.: profileRouter)
 
 @dataclass
 class TrpcUsage:
@@ -201,36 +222,65 @@ class Fix:
     after: str
     note: str
 
-# ═══════════════════════════════ HELPERS ══════════════════════════════════════
+@dataclass
+class SourceFile:
+    """Arquivo lido UMA vez por auditoria — texto + offsets de quebra de linha."""
+    path: Path
+    rel: str
+    text: str
+    lines: LineIndex = field(init=False, repr=False)
+    memo: Dict[str, Any] = field(init=False, repr=False, default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.lines = LineIndex(self.text)
 
-def now_tag() -> str:
-    return datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    def lineno(self, idx: int) -> int:
+        return self.lines.line(idx)
+
+# ═══════════════════════════════ HELPERS ══════════════════════════════════════
 
 def iter_files(root: Path, globs: List[str]) -> List[Path]:
-    seen: Set[Path] = set()
-    for gp in globs:
-        for p in root.glob(gp):
-            if p.is_file() and not any(d in SKIP_DIRS for d in p.parts):
-                seen.add(p)
-    return sorted(seen)
+    return FileWalk(root, {"": globs}, SKIP_DIRS).files("")
+
+def walk_groups(root: Path) -> FileWalk:
+    """Uma única travessia (scandir, com poda de SKIP_DIRS/.gitignore) para todos os grupos de globs."""
+    return FileWalk(root, {"fe": FRONTEND_GLOBS, "be": BACKEND_GLOBS,
+                           "pg": PAGE_GLOBS, "sc": SCHEMA_GLOBS}, SKIP_DIRS)
 
 def read(p: Path) -> str:
     return p.read_text(encoding="utf-8", errors="ignore")
 
-def write(p: Path, s: str) -> None:
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(s, encoding="utf-8", newline="\n")
-
-def backup(p: Path, bdir: Path) -> None:
-    bdir.mkdir(parents=True, exist_ok=True)
-    dst = bdir / p.as_posix().replace("/", "__")
-    shutil.copy2(p, dst)
-
 def relp(p: Path, root: Path) -> str:
     return str(p.relative_to(root)).replace("\\", "/")
 
-def lineno(text: str, idx: int) -> int:
-    return text.count("\n", 0, idx) + 1
+class Corpus:
+    """
+    Cache dos arquivos do projeto para uma execução.
+    Cada arquivo é lido do disco uma única vez e o mesmo SourceFile é
+    entregue a todos os scanners (rotas, links, tRPC, segurança, qualidade).
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._files: Dict[Path, SourceFile] = {}
+        self.bytes_read = 0
+
+    def get(self, p: Path) -> SourceFile:
+        sf = self._files.get(p)
+        if sf is None:
+            sf = SourceFile(p, relp(p, self.root), read(p))
+            self._files[p] = sf
+            self.bytes_read += p.stat().st_size
+        return sf
+
+    def files(self, globs: List[str]) -> List[SourceFile]:
+        return [self.get(p) for p in iter_files(self.root, globs)]
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+def flatten(chunks: Iterable[List[Any]]) -> List[Any]:
+    return [x for chunk in chunks for x in chunk]
 
 def norm_path(p: str) -> str:
     if not p:
@@ -254,21 +304,12 @@ def classify_zone(path: str) -> str:
         return "AUTH"
     return "PUBLIC"
 
-def path_matches(href: str, routes: Set[str]) -> bool:
-    norm = norm_path(href)
-    if not norm or norm == "/":
-        return True
-    if norm in routes:
-        return True
-    for r in routes:
-        if ":" in r or "*" in r:
-            rp, hp = r.split("/"), norm.split("/")
-            if len(rp) == len(hp) and all(
-                rpart.startswith(":") or rpart == hpart
-                for rpart, hpart in zip(rp, hp)
-            ):
-                return True
-    return False
+def match_route(href: str, routes: RouteTable) -> Optional[str]:
+    """Padrão de rota que atende o href (None = link quebrado)."""
+    return routes.match(norm_path(href))
+
+def path_matches(href: str, routes: RouteTable) -> bool:
+    return match_route(href, routes) is not None
 
 def kebab(s: str) -> str:
     s = re.sub(r"([a-z0-9])([A-Z])", r"\1-\2", s).replace("_", "-")
@@ -309,9 +350,9 @@ def _extract_path(block: str) -> Optional[str]:
     return None
 
 
-def scan_routes(files: List[Path], root: Path) -> List[RouteFinding]:
+def file_routes(sf: SourceFile) -> List[RouteFinding]:
     """
-    Detector de rotas robusto.
+    Detector de rotas robusto (um arquivo).
     Suporta todas as variantes do App.tsx:
       <Route path={"/"} component={Home} />          ← JSX expression (era ignorado!)
       <Route path="/x" component={Home} />            ← aspas diretas
@@ -335,182 +376,229 @@ def scan_routes(files: List[Path], root: Path) -> List[RouteFinding]:
         seen.add(key)
         routes.append(RouteFinding(fr, path, comp or None, classify_zone(path), src))
 
-    for f in files:
-        txt = read(f)
-        fr  = relp(f, root)
+    txt, fr = sf.text, sf.rel
 
-        # ── Estratégia principal: blocos <Route> e <ProtectedRoute> ──
-        # Usamos R_ROUTE_OPEN que captura até o '>' de fechamento da tag de abertura
-        for m in R_ROUTE_OPEN.finditer(txt):
-            block = m.group(1)
+    # ── Estratégia principal: blocos <Route> e <ProtectedRoute> ──
+    # Usamos R_ROUTE_OPEN que captura até o '>' de fechamento da tag de abertura
+    for m in R_ROUTE_OPEN.finditer(txt):
+        block = m.group(1)
 
-            p_val = _extract_path(block)
-            if not p_val:
-                continue
+        p_val = _extract_path(block)
+        if not p_val:
+            continue
 
-            # Extrair componente (component={X} ou element={<X />})
-            comp_val: Optional[str] = None
-            cm = R_COMP_ATTR.search(block)
-            if cm:
-                comp_val = cm.group(1)
+        # Extrair componente (component={X} ou element={<X />})
+        comp_val: Optional[str] = None
+        cm = R_COMP_ATTR.search(block)
+        if cm:
+            comp_val = cm.group(1)
+        else:
+            em = R_ELEM_ATTR.search(block)
+            if em:
+                comp_val = em.group(1)
             else:
-                em = R_ELEM_ATTR.search(block)
-                if em:
-                    comp_val = em.group(1)
-                else:
-                    rp = re.search(r'\{[^}]*=>\s*<([A-Za-z][A-Za-z0-9_]*)', block)
-                    if rp:
-                        comp_val = rp.group(1)
+                rp = re.search(r'\{[^}]*=>\s*<([A-Za-z][A-Za-z0-9_]*)', block)
+                if rp:
+                    comp_val = rp.group(1)
 
-            add(p_val, comp_val, fr, "Route-block")
+        add(p_val, comp_val, fr, "Route-block")
 
-        # ── Estratégia 2: arrays/objetos de rotas { path: "/x" } ──
-        for m in R_ROUTE_OBJ.finditer(txt):
-            add(m.group(1), None, fr, "route-object")
+    # ── Estratégia 2: arrays/objetos de rotas { path: "/x" } ──
+    for m in R_ROUTE_OBJ.finditer(txt):
+        add(m.group(1), None, fr, "route-object")
 
-        # ── Estratégia 3: useRoute("/x") ──
-        for m in R_USE_ROUTE.finditer(txt):
-            add(m.group(1), None, fr, "useRoute")
+    # ── Estratégia 3: useRoute("/x") ──
+    for m in R_USE_ROUTE.finditer(txt):
+        add(m.group(1), None, fr, "useRoute")
 
     return routes
 
 
-def _extract_href(m: re.Match) -> Optional[str]:
-    """Extrai href de match que pode ter grupo 1 (aspas diretas) OU grupo 2 (dentro de {})."""
-    try:
-        v = m.group(1) or m.group(2)
-        return v.strip() if v else None
-    except IndexError:
-        return m.group(1).strip() if m.group(1) else None
+def merge_routes(chunks: Iterable[List[RouteFinding]]) -> List[RouteFinding]:
+    """Junta as rotas por arquivo mantendo a primeira ocorrência de (path, componente)."""
+    routes: List[RouteFinding] = []
+    seen: Set[Tuple] = set()
+    for chunk in chunks:
+        for r in chunk:
+            key = (r.path, r.component or "")
+            if key not in seen:
+                seen.add(key)
+                routes.append(r)
+    return routes
 
 
-def scan_links(files: List[Path], root: Path, routes: Set[str]
-               ) -> Tuple[List[LinkFinding], List[LinkFinding]]:
+def scan_routes(files: List[SourceFile]) -> List[RouteFinding]:
+    return merge_routes(file_routes(sf) for sf in files)
+
+
+def _href_span(m: re.Match, dual_group: bool) -> Tuple[str, int, int]:
+    """(href sem espaços, início, fim) — offsets do href dentro do texto varrido."""
+    g = 2 if dual_group and not m.group(1) else 1
+    raw = m.group(g) or ""
+    href = raw.strip()
+    start = m.start(g) + (len(raw) - len(raw.lstrip()))
+    return href, start, start + len(href)
+
+
+LINK_SKIP_PREFIXES = ("/api", "/assets", "/favicon", "/public", "/static",
+                      "/uploads", "/images", "/fonts")
+
+# R_WLINK e R_ANCHOR têm 2 grupos (aspas diretas + JSX expression)
+# R_SETLOC, R_NAVIGATE, R_PUSH, R_HREF_ASSIGN têm 1 grupo
+# Cada regex só roda se uma de suas âncoras literais aparece no arquivo;
+# arquivo sem nenhuma âncora nem chega a ser varrido.
+LINK_SCAN = AnchoredScan(
+    (R_WLINK,       ("<Link",),                           ("Link",          True)),  # True = grupo duplo
+    (R_ANCHOR,      ("<a",),                              ("<a>",           True)),
+    (R_SETLOC,      ("setLocation(",),                    ("setLocation",   False)),
+    (R_NAVIGATE,    ("navigate(",),                       ("navigate",      False)),
+    (R_PUSH,        (".push(",),                          ("push",          False)),
+    (R_HREF_ASSIGN, ("location.href", "window.location"), ("location.href", False)),
+)
+
+
+def file_links(sf: SourceFile) -> List[LinkFinding]:
+    """Links internos de um arquivo (ainda sem checar contra as rotas)."""
     internal: List[LinkFinding] = []
-    broken:   List[LinkFinding] = []
-    SKIP_PREFIXES = ("/api", "/assets", "/favicon", "/public", "/static",
-                     "/uploads", "/images", "/fonts")
-
-    # R_WLINK e R_ANCHOR têm 2 grupos (aspas diretas + JSX expression)
-    # R_SETLOC, R_NAVIGATE, R_PUSH, R_HREF_ASSIGN têm 1 grupo
-    patterns = [
-        (R_WLINK,       "Link",          True),   # True = tem grupo duplo (href={"/..."})
-        (R_ANCHOR,      "<a>",           True),
-        (R_SETLOC,      "setLocation",   False),
-        (R_NAVIGATE,    "navigate",      False),
-        (R_PUSH,        "push",          False),
-        (R_HREF_ASSIGN, "location.href", False),
-    ]
-    for f in files:
-        txt = read(f)
-        fr  = relp(f, root)
-        zg  = "ADMIN" if "/admin" in fr.lower() else "PUBLIC"
-        for rx, kind, dual_group in patterns:
-            for m in rx.finditer(txt):
-                href = (_extract_href(m) if dual_group else m.group(1).strip()) or ""
-                if not href or href.startswith(("#", "data:", "javascript:")):
-                    continue
-                ln = lineno(txt, m.start())
-                if is_external(href):
-                    continue
-                if href.startswith("/"):
-                    if any(href.startswith(p) for p in SKIP_PREFIXES):
-                        continue
-                    lf = LinkFinding(fr, href, kind, ln, zg)
-                    internal.append(lf)
-                    if not path_matches(href, routes):
-                        lf.is_broken = True
-                        broken.append(lf)
-    return internal, broken
-
-
-def scan_trpc_backend(files: List[Path], root: Path) -> List[TrpcProc]:
-    procs: List[TrpcProc] = []
-    kind_map = {
-        "publicProcedure": "public", "protectedProcedure": "protected",
-        "adminProcedure": "admin", "procedure": "unknown",
-    }
-    for f in files:
-        txt   = read(f)
-        fr    = relp(f, root)
-        lines = txt.split("\n")
-        ns_stack: List[str] = []
-        for i, line in enumerate(lines, 1):
-            nm = re.search(r'([A-Za-z_]\w*)\s*:\s*(?:router|createRouter)\s*\(', line)
-            if nm:
-                ns_stack.append(nm.group(1))
-            pm = R_TRPC_PROC.search(line)
-            if pm:
-                procs.append(TrpcProc(
-                    ns_stack[-1] if ns_stack else "__root__",
-                    pm.group(1), kind_map.get(pm.group(2), "unknown"), fr, i
-                ))
-            if line.strip() in ("}),", "})", "},") and ns_stack:
-                ns_stack.pop()
+    txt, fr = sf.text, sf.rel
+    zg  = "ADMIN" if "/admin" in fr.lower() else "PUBLIC"
+    for (kind, dual_group), m in LINK_SCAN.finditer(txt):
+        href, start, end = _href_span(m, dual_group)
+        if not href or href.startswith(("#", "data:", "javascript:")):
+            continue
+        if is_external(href):
+            continue
+        if href.startswith("/"):
+            if any(href.startswith(p) for p in LINK_SKIP_PREFIXES):
+                continue
+            internal.append(LinkFinding(fr, href, kind, sf.lineno(m.start()), zg,
+                                        start=start, end=end))
+    return internal
+
+
+def classify_links(links: List[LinkFinding], routes: RouteTable
+                   ) -> Tuple[List[LinkFinding], List[LinkFinding]]:
+    """Resolve cada link na tabela de rotas; os que não casam ficam quebrados."""
+    broken: List[LinkFinding] = []
+    for lf in links:
+        lf.route = match_route(lf.href, routes)
+        if lf.route is None:
+            lf.is_broken = True
+            broken.append(lf)
+    return links, broken
+
+
+def scan_links(files: List[SourceFile], routes: RouteTable
+               ) -> Tuple[List[LinkFinding], List[LinkFinding]]:
+    return classify_links(flatten(file_links(sf) for sf in files), routes)
+
+
+def trpc_tree(sf: SourceFile):
+    """Árvore de routers/procedures do arquivo (parser compartilhado em common.py)."""
+    if "trpc" not in sf.memo:
+        sf.memo["trpc"] = parse_trpc_routers(sf.text)
+    return sf.memo["trpc"]
+
+
+def file_trpc_procs(sf: SourceFile) -> List[TrpcProc]:
+    """Procedures do arquivo, com namespace relativo ao router de topo em que aparecem."""
+    return [TrpcProc(".".join(n.path) or "__root__", n.name, n.kind, sf.rel,
+                     n.line, n.end_line, n.has_input, n.router)
+            for n in trpc_tree(sf)[0]]
+
+
+def file_trpc_mounts(sf: SourceFile) -> List[TrpcMount]:
+    return trpc_tree(sf)[1]
+
+
+def link_trpc_procs(procs: List[TrpcProc], mounts: List[TrpcMount]) -> List[TrpcProc]:
+    """Prefixa o namespace das procedures de routers montados em outro arquivo
+    (ex.: `profile: profileRouter` → profileRouter.get vira profile.get)."""
+    prefixes = trpc_prefixes(mounts)
+    for p in procs:
+        p.namespace = trpc_mounted_namespace(p.namespace, p.router, prefixes)
     return procs
 
 
-def scan_trpc_frontend(files: List[Path], root: Path) -> List[TrpcUsage]:
+def scan_trpc_backend(files: List[SourceFile]) -> List[TrpcProc]:
+    return link_trpc_procs(flatten(file_trpc_procs(sf) for sf in files),
+                           flatten(file_trpc_mounts(sf) for sf in files))
+
+
+TRPC_USAGE_SCAN = AnchoredScan(
+    (R_TRPC_USE,   ("trpc.",), "use"),
+    (R_TRPC_UTILS, ("trpc.",), "utils"),
+)
+
+
+def file_trpc_usages(sf: SourceFile) -> List[TrpcUsage]:
     usages: List[TrpcUsage] = []
     seen: Set[Tuple] = set()
-    for f in files:
-        txt = read(f)
-        fr  = relp(f, root)
-        for rx in (R_TRPC_USE, R_TRPC_UTILS):
-            for m in rx.finditer(txt):
-                ns, name = m.group(1), m.group(2)
-                ln = lineno(txt, m.start())
-                method = m.group(0).split(".")[-1]
-                key = (ns, name, fr)
-                if key not in seen:
-                    seen.add(key)
-                    usages.append(TrpcUsage(ns, name, fr, ln, method))
+    txt, fr = sf.text, sf.rel
+    for _, m in TRPC_USAGE_SCAN.finditer(txt):
+        ns, name = m.group(1).rstrip("."), m.group(2)
+        ln = sf.lineno(m.start())
+        method = m.group(0).split(".")[-1]
+        key = (ns, name, fr)
+        if key not in seen:
+            seen.add(key)
+            usages.append(TrpcUsage(ns, name, fr, ln, method))
     return usages
 
 
-def scan_schema(files: List[Path], root: Path) -> List[DbTable]:
+def scan_trpc_frontend(files: List[SourceFile]) -> List[TrpcUsage]:
+    return flatten(file_trpc_usages(sf) for sf in files)
+
+
+def file_schema(sf: SourceFile) -> List[DbTable]:
     tables: List[DbTable] = []
-    for f in files:
-        txt = read(f)
-        fr  = relp(f, root)
-        for m in R_TABLE.finditer(txt):
-            tables.append(DbTable(m.group(1), m.group(2), fr))
+    for m in R_TABLE.finditer(sf.text):
+        tables.append(DbTable(m.group(1), m.group(2), sf.rel))
     return tables
 
 
-def scan_security(files: List[Path], root: Path) -> List[Issue]:
+def scan_schema(files: List[SourceFile]) -> List[DbTable]:
+    return flatten(file_schema(sf) for sf in files)
+
+
+# Âncoras em minúsculas nos regex re.I (comparadas contra o texto em lowercase)
+SECURITY_SCAN = AnchoredScan(
+    (R_LOCALHOST,       ("localhost", "127.0.0.1", ":3001", ":5173", ":4000", ":8080"), "localhost"),
+    (R_HARDCODE_K,      ("apikey", "api_key", "secret", "password", "token"),           "secret"),
+    (R_HARDCODE_U,      ("fetch", "axios."),                                             "api_url"),
+    (R_OPEN_REDIR,      ("redirect", "location.href"),                                   "open_redirect"),
+    (R_DIRECT_OAUTH_UI, ("/api/auth/",),                                                 "oauth_link"),
+)
+
+
+def file_security(sf: SourceFile) -> List[Issue]:
     issues: List[Issue] = []
-    for f in files:
-        txt = read(f)
-        fr  = relp(f, root)
-        for m in R_LOCALHOST.finditer(txt):
-            ln = lineno(txt, m.start())
+    txt, fr = sf.text, sf.rel
+    for tag, m in SECURITY_SCAN.finditer(txt):
+        ln = sf.lineno(m.start())
+        if tag == "localhost":
             snippet = txt[max(0,m.start()-40):m.start()+80].replace("\n"," ").strip()
             issues.append(Issue("WARNING","Security",fr,ln,
                 "Hardcoded localhost/port detectado",
                 f"`{snippet[:100]}`",
                 "Substitua por variável de ambiente: process.env.VITE_API_URL ou similar"))
-        for m in R_HARDCODE_K.finditer(txt):
-            ln = lineno(txt, m.start())
+        elif tag == "secret":
             raw = re.sub(r'["\']\S+["\']', '"***"', m.group(0))
             issues.append(Issue("CRITICAL","Security",fr,ln,
                 "Chave/segredo hardcoded no código",
                 f"`{raw}`",
                 "Mova para variável de ambiente (.env). NUNCA commite secrets no Git."))
-        for m in R_HARDCODE_U.finditer(txt):
-            ln = lineno(txt, m.start())
+        elif tag == "api_url":
             issues.append(Issue("WARNING","Security",fr,ln,
                 "URL de API externa hardcoded",
                 f"URL: `{m.group(1)[:80]}`",
                 "Use variável de ambiente: const API = import.meta.env.VITE_API_URL"))
-        for m in R_OPEN_REDIR.finditer(txt):
-            ln = lineno(txt, m.start())
+        elif tag == "open_redirect":
             issues.append(Issue("CRITICAL","Security",fr,ln,
                 "Possível Open Redirect via parâmetro `next`",
                 txt[max(0,m.start()-30):m.start()+100].replace("\n"," ").strip()[:120],
                 "Valide e sanitize o valor de `next` antes de redirecionar"))
-        for m in R_DIRECT_OAUTH_UI.finditer(txt):
-            ln = lineno(txt, m.start())
+        else:
             issues.append(Issue("WARNING","Auth",fr,ln,
                 "Link direto para /api/auth/* no frontend",
                 f"Encontrado: `{m.group(0)}`",
@@ -519,13 +607,18 @@ def scan_security(files: List[Path], root: Path) -> List[Issue]:
     return issues
 
 
-def scan_auth_config(root: Path) -> List[Issue]:
+def scan_security(files: List[SourceFile]) -> List[Issue]:
+    return flatten(file_security(sf) for sf in files)
+
+
+def scan_auth_config(corpus: Corpus) -> List[Issue]:
     """Verifica configurações específicas do OAuth/Google Login."""
     issues: List[Issue] = []
+    root = corpus.root
 
     # Checar .env.example ou .env para variáveis do Google OAuth
     env_files = list(root.glob(".env*"))
-    env_text = "\n".join(read(f) for f in env_files if f.is_file())
+    env_text = "\n".join(corpus.get(f).text for f in env_files if f.is_file())
 
     has_google_id  = bool(re.search(r'GOOGLE_CLIENT_ID\s*=\s*\S+', env_text))
     has_google_sec = bool(re.search(r'GOOGLE_CLIENT_SECRET\s*=\s*\S+', env_text))
@@ -558,14 +651,13 @@ def scan_auth_config(root: Path) -> List[Issue]:
             "Gere um secret seguro: node -e \"console.log(require('crypto').randomBytes(64).toString('hex'))\""))
 
     # Checar configuração do servidor OAuth
-    oauth_files = iter_files(root, ["server/_core/oauth.ts", "server/oauth.ts",
-                                     "server/**/*oauth*.ts", "server/**/*auth*.ts"])
-    for f in oauth_files:
-        txt = read(f)
-        fr  = relp(f, root)
+    oauth_files = corpus.files(["server/_core/oauth.ts", "server/oauth.ts",
+                                "server/**/*oauth*.ts", "server/**/*auth*.ts"])
+    for sf in oauth_files:
+        txt, fr = sf.text, sf.rel
         # Verificar se callback URL está hardcoded
         if re.search(r'localhost.*callback|callback.*localhost', txt, re.I):
-            ln = lineno(txt, txt.lower().find("localhost"))
+            ln = sf.lineno(txt.lower().find("localhost"))
             issues.append(Issue("CRITICAL","Auth",fr,ln,
                 "Callback URL do OAuth hardcoded com localhost",
                 "Em produção (Render.com) isso vai quebrar o login com Google",
@@ -581,7 +673,7 @@ def scan_auth_config(root: Path) -> List[Issue]:
     # Checar Render.com — variáveis necessárias
     render_yaml = root / "render.yaml"
     if render_yaml.exists():
-        ry = read(render_yaml)
+        ry = corpus.get(render_yaml).text
         for var in ["GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET", "DATABASE_URL", "SESSION_SECRET"]:
             if var not in ry:
                 issues.append(Issue("WARNING","Config","render.yaml",0,
@@ -593,37 +685,143 @@ def scan_auth_config(root: Path) -> List[Issue]:
     return issues
 
 
-def scan_code_quality(files: List[Path], root: Path) -> List[Issue]:
+QUALITY_SCAN = AnchoredScan(
+    (R_TODO,    ("todo", "fixme", "hack", "xxx", "bug"), "todo"),
+    (R_CONSOLE, ("console.log",),                        "console"),
+)
+
+
+def file_quality(sf: SourceFile) -> List[Issue]:
     issues: List[Issue] = []
-    for f in files:
-        txt = read(f)
-        fr  = relp(f, root)
-        for m in R_TODO.finditer(txt):
-            ln = lineno(txt, m.start())
-            snippet = txt[m.start():m.start()+80].replace("\n"," ").strip()
-            issues.append(Issue("INFO","CodeQuality",fr,ln,
-                "TODO/FIXME pendente", f"`{snippet}`", "Resolva antes do deploy em produção"))
-        count_cl = len(R_CONSOLE.findall(txt))
-        if count_cl > 3:
-            issues.append(Issue("INFO","CodeQuality",fr,0,
-                f"Muitos console.log ({count_cl})",
-                "Logs de debug no código de produção",
-                f"Remova ou substitua por logger: grep -n 'console.log' {fr}"))
+    txt, fr = sf.text, sf.rel
+    count_cl = 0
+    for tag, m in QUALITY_SCAN.finditer(txt):
+        if tag == "console":
+            count_cl += 1
+            continue
+        ln = sf.lineno(m.start())
+        snippet = txt[m.start():m.start()+80].replace("\n"," ").strip()
+        issues.append(Issue("INFO","CodeQuality",fr,ln,
+            "TODO/FIXME pendente", f"`{snippet}`", "Resolva antes do deploy em produção"))
+    if count_cl > 3:
+        issues.append(Issue("INFO","CodeQuality",fr,0,
+            f"Muitos console.log ({count_cl})",
+            "Logs de debug no código de produção",
+            f"Remova ou substitua por logger: grep -n 'console.log' {fr}"))
     return issues
 
 
+def scan_code_quality(files: List[SourceFile]) -> List[Issue]:
+    return flatten(file_quality(sf) for sf in files)
+
+
+# Scanners por arquivo: tipo → (função pura do SourceFile, dataclass do resultado).
+# São a unidade do cache incremental; a análise cruzada roda sempre sobre o merge.
+FILE_SCANNERS = {
+    "routes":   (file_routes,      RouteFinding),
+    "links":    (file_links,       LinkFinding),
+    "procs":    (file_trpc_procs,  TrpcProc),
+    "mounts":   (file_trpc_mounts, TrpcMount),
+    "usages":   (file_trpc_usages, TrpcUsage),
+    "tables":   (file_schema,      DbTable),
+    "security": (file_security,    Issue),
+    "quality":  (file_quality,     Issue),
+}
+
+
+def _scan_worker(task: Tuple[str, str, Tuple[str, ...]]) -> Dict[str, Tuple[List[Any], float]]:
+    """
+    Processo filho do --jobs: lê um arquivo e roda os scanners pedidos.
+    Devolve {tipo: (achados, segundos)}; a leitura conta para o primeiro tipo,
+    como na execução serial (kinds vem na ordem das etapas).
+    """
+    path, rel, kinds = task
+    t0 = time.perf_counter()
+    sf = SourceFile(Path(path), rel, read(Path(path)))
+    out: Dict[str, Tuple[List[Any], float]] = {}
+    for k in kinds:
+        items = FILE_SCANNERS[k][0](sf)
+        t1 = time.perf_counter()
+        out[k] = (items, t1 - t0)
+        t0 = t1
+    return out
+
+
+class FileScans:
+    """Executa os scanners por arquivo, reaproveitando o ScanCache quando houver."""
+
+    def __init__(self, corpus: Corpus, cache: Optional[ScanCache] = None, jobs: int = 1):
+        self.corpus = corpus
+        self.cache  = cache
+        self.jobs   = jobs
+        self.worker_seconds = 0.0     # tempo dos scanners nos processos filhos, já consumido
+        self._done: Dict[Tuple[Path, str], Tuple[List[Any], float]] = {}
+        self._sizes: Dict[Path, int] = {}   # bytes lidos pelos filhos, creditados no 1º uso
+
+    def _text(self, p: Path):
+        return lambda: self.corpus.get(p).text
+
+    def prefetch(self, plan: Dict[Path, Set[str]]) -> None:
+        """
+        Com --jobs > 1, distribui os scanners por arquivo num ProcessPoolExecutor.
+        O resultado fica indexado por (arquivo, tipo) e o merge segue a ordem
+        dos caminhos, então a saída é idêntica à execução serial. Tempo e bytes
+        de cada tipo são creditados quando a etapa correspondente o consome.
+        """
+        if self.jobs <= 1:
+            return
+        tasks: List[Tuple[str, str, Tuple[str, ...]]] = []
+        for p in sorted(plan):
+            rel = relp(p, self.corpus.root)
+            kinds = tuple(k for k in FILE_SCANNERS if k in plan[p] and (
+                self.cache is None or not self.cache.has(rel, p, k, self._text(p))))
+            if kinds:
+                tasks.append((str(p), rel, kinds))
+                if self.cache is None:   # com cache, has() já leu o arquivo aqui
+                    self._sizes[p] = p.stat().st_size
+        if not tasks:
+            return
+        chunk = max(1, len(tasks) // (self.jobs * 4))
+        with ProcessPoolExecutor(max_workers=self.jobs) as ex:
+            for (path, _, _), res in zip(tasks, ex.map(_scan_worker, tasks, chunksize=chunk)):
+                for kind, items in res.items():
+                    self._done[(Path(path), kind)] = items
+
+    def _compute(self, kind: str, p: Path) -> List[Any]:
+        done = self._done.pop((p, kind), None)
+        if done is not None:
+            items, seconds = done
+            self.worker_seconds += seconds
+            self.corpus.bytes_read += self._sizes.pop(p, 0)
+            return items
+        return FILE_SCANNERS[kind][0](self.corpus.get(p))
+
+    def run(self, kind: str, paths: List[Path]) -> List[List[Any]]:
+        cls = FILE_SCANNERS[kind][1]
+        if self.cache is None:
+            return [self._compute(kind, p) for p in paths]
+        out: List[List[Any]] = []
+        for p in paths:
+            raw = self.cache.fetch(
+                relp(p, self.corpus.root), p, kind, self._text(p),
+                lambda: [asdict(x) for x in self._compute(kind, p)],
+            )
+            out.append([cls(**d) for d in raw])
+        return out
+
+
 def scan_missing_routes(
-    route_paths: Set[str],
+    route_table: RouteTable,
     pages: Dict[str, str]   # {stem: relative_file}
 ) -> Tuple[List[str], List[str]]:
     """Retorna (rotas_esperadas_faltando, páginas_sem_rota)."""
     all_expected = EXPECTED_PUBLIC_ROUTES | EXPECTED_AUTH_ROUTES | EXPECTED_ADMIN_ROUTES
-    missing_routes = sorted(all_expected - route_paths - {"/"})
+    missing_routes = sorted(all_expected - route_table.patterns - {"/"})
 
     orphan_pages = []
     for stem, fpath in pages.items():
         guess = stem_to_route(stem)
-        if not path_matches(guess, route_paths):
+        if not path_matches(guess, route_table):
             orphan_pages.append(fpath)
 
     return missing_routes, orphan_pages
@@ -667,7 +865,7 @@ def analyze_trpc(
 def diagnose_root_causes(
     route_paths: Set[str],
     app_file: Optional[Path],
-    root: Path,
+    corpus: Corpus,
 ) -> List[Issue]:
     """Diagnóstico de causas raiz — especialmente por que 0 rotas foram detectadas."""
     issues: List[Issue] = []
@@ -681,8 +879,8 @@ def diagnose_root_causes(
             "O App.tsx deve ter: import { Switch, Route } from 'wouter';"))
         return issues
 
-    txt = read(app_file)
-    fr  = relp(app_file, root)
+    app = corpus.get(app_file)
+    txt, fr = app.text, app.rel
 
     has_switch   = bool(R_SWITCH.search(txt))
     has_route    = bool(re.search(r'<(?:Route|ProtectedRoute)\b', txt))
@@ -812,46 +1010,36 @@ def propose_href_fix(href: str, routes: Set[str]) -> Optional[Tuple[str, str]]:
 
 def fix_links_in_file(
     f: Path, broken: List[LinkFinding], routes: Set[str],
-    apply: bool, bdir: Path, disable_unfixable: bool
+    batch: EditBatch, disable_unfixable: bool
 ) -> List[Fix]:
-    file_broken = [b for b in broken if b.file == relp(f, f.parents[len(f.parts)-2])]
-    # Re-filter by filename match regardless of root
-    file_str = str(f).replace("\\", "/")
-    file_broken_hrefs: Dict[str, str] = {}   # old → new
+    """
+    Reescreve os links quebrados de UM arquivo (`broken` já filtrado para ele).
+    Cada correção vira um Edit nos offsets que o scanner registrou — nada de
+    replace global no texto. Links cujo offset não confere mais com o texto
+    (relatório antigo, arquivo editado depois) são ignorados.
+    """
+    txt = batch.text(f)
+    planned: List[Tuple[Edit, Fix]] = []
     for b in broken:
-        if b.file in file_str or file_str.endswith(b.file):
-            fix = propose_href_fix(b.href, routes)
-            if fix:
-                file_broken_hrefs[b.href] = fix[0]
-            elif disable_unfixable:
-                file_broken_hrefs[b.href] = "#"
-    if not file_broken_hrefs:
-        return []
-    txt = original = read(f)
-    for old, new in file_broken_hrefs.items():
-        # replace in href="..." , href='...' , navigate("...") etc.
-        for pat in (f'href="{old}"', f"href='{old}'",
-                    f'navigate("{old}")', f"navigate('{old}')",
-                    f'setLocation("{old}")', f"setLocation('{old}')"):
-            new_pat = pat.replace(old, new)
-            txt = txt.replace(pat, new_pat)
-    if txt == original:
-        return []
-    fixes = [Fix(str(f), "fix_link", old, new, f"link corrigido")
-             for old, new in file_broken_hrefs.items()]
-    if apply:
-        backup(f, bdir)
-        write(f, txt)
-    return fixes
+        fix = propose_href_fix(b.href, routes)
+        if not (fix or disable_unfixable):
+            continue
+        if b.start < 0 or txt[b.start:b.end] != b.href:
+            continue
+        new_href = fix[0] if fix else "#"
+        planned.append((Edit(b.start, b.end, new_href),
+                        Fix(b.file, "fix_link", b.href, new_href,
+                            f"L{b.line} — {fix[1] if fix else 'desabilitado'}")))
+    dropped = set(batch.edit(f, [e for e, _ in planned]))
+    return [fx for e, fx in planned if e not in dropped]
 
 
 def add_routes_to_app(
-    app_file: Path, routes_to_add: List[Tuple[str, str]],
-    apply: bool, bdir: Path
+    app_file: Path, routes_to_add: List[Tuple[str, str]], batch: EditBatch
 ) -> List[Fix]:
     if not routes_to_add:
         return []
-    txt = original = read(app_file)
+    txt = original = batch.text(app_file)
     lines_to_insert = [f'      <Route path="{p}" component={{{c}}} />'
                        for p, c in routes_to_add]
     insertion = "\n" + "\n".join(lines_to_insert) + "\n"
@@ -868,15 +1056,12 @@ def add_routes_to_app(
             txt = txt + "\n/* AUTO-ADDED ROUTES — move inside <Switch>: */\n" + insertion
     if txt == original:
         return []
-    fixes = [Fix(str(app_file), "add_route", "", str(routes_to_add), "rotas adicionadas")]
-    if apply:
-        backup(app_file, bdir)
-        write(app_file, txt)
-    return fixes
+    batch.write(app_file, txt)
+    return [Fix(str(app_file), "add_route", "", str(routes_to_add), "rotas adicionadas")]
 
 
-def create_stub_page(page_path: Path, route: str, apply: bool) -> Optional[Fix]:
-    if page_path.exists():
+def create_stub_page(page_path: Path, route: str, batch: EditBatch) -> Optional[Fix]:
+    if batch.exists(page_path):
         return None
     stem  = page_path.stem
     title = " ".join(w.capitalize() for w in re.split(r"[-_]+", stem))
@@ -901,17 +1086,16 @@ export default function {stem}() {{
   );
 }}
 """
-    if apply:
-        write(page_path, content)
+    batch.write(page_path, content)
     return Fix(str(page_path), "create_stub", "", route, "stub TSX criado")
 
 
-def fix_oauth_links(f: Path, apply: bool, bdir: Path) -> List[Fix]:
+def fix_oauth_links(f: Path, batch: EditBatch) -> List[Fix]:
     """
     Substitui links diretos /api/auth/google por chamada válida via trpc.
     Gera código TypeScript/JavaScript sintaticamente correto.
     """
-    txt = original = read(f)
+    txt = original = batch.text(f)
 
     # ── Padrão 1: href="/api/auth/google"  ou  href='/api/auth/google'
     # Substituir o atributo href por onClick com chamada tRPC
@@ -952,44 +1136,106 @@ def fix_oauth_links(f: Path, apply: bool, bdir: Path) -> List[Fix]:
 
     if txt == original:
         return []
-    if apply:
-        backup(f, bdir)
-        write(f, txt)
+    batch.write(f, txt)
     return [Fix(str(f), "fix_oauth_link", "/api/auth/google",
                 "trpc.auth.loginWithGoogle.mutate()", "OAuth link corrigido para chamada tRPC válida")]
 
 
 # ════════════════════════════ MAIN RUNNER ═════════════════════════════════════
 
-def find_app_file(root: Path) -> Optional[Path]:
+@dataclass
+class StageTiming:
+    stage: str
+    seconds: float = 0.0
+    files: int = 0
+    bytes: int = 0
+    matches: int = 0
+    worker_seconds: float = 0.0     # parte de `seconds` gasta nos processos do --jobs
+
+
+class Profile:
+    """
+    Tempo, arquivos, bytes lidos e achados de cada etapa (--profile).
+    Com --jobs, o tempo dos scanners nos processos filhos entra na etapa do
+    scanner (worker_seconds) e "prefetch" fica só com o tempo de parede do pool.
+    """
+
+    def __init__(self, corpus: Corpus, scans: Optional[FileScans] = None):
+        self.corpus = corpus
+        self.scans  = scans
+        self.stages: List[StageTiming] = []
+        self.t0 = time.perf_counter()
+
+    def _worker_seconds(self) -> float:
+        return self.scans.worker_seconds if self.scans else 0.0
+
+    @contextmanager
+    def stage(self, name: str, files: Iterable[Any] = ()) -> Iterator[StageTiming]:
+        st = StageTiming(name, files=len(list(files)))
+        b0, w0, t0 = self.corpus.bytes_read, self._worker_seconds(), time.perf_counter()
+        try:
+            yield st
+        finally:
+            worker = self._worker_seconds() - w0
+            st.seconds = round(time.perf_counter() - t0 + worker, 6)
+            st.worker_seconds = round(worker, 6)
+            st.bytes   = self.corpus.bytes_read - b0
+            self.stages.append(st)
+
+    def as_dict(self) -> Dict:
+        out = {
+            "total_seconds": round(time.perf_counter() - self.t0, 6),
+            "stages": [asdict(st) for st in sorted(self.stages, key=lambda st: -st.seconds)],
+        }
+        if self.scans and self.scans.jobs > 1:
+            out["jobs"] = self.scans.jobs
+            out["note"] = ("seconds das etapas de scanner inclui worker_seconds (tempo somado nos "
+                           "processos filhos); 'prefetch' é o tempo de parede do pool, por isso a "
+                           "soma das etapas pode passar do total")
+        return out
+
+
+def print_profile(timings: Dict) -> None:
+    total = timings["total_seconds"] or 1e-9
+    print(f"\n{'─'*64}")
+    print(f"  ⏱  PERFIL DA AUDITORIA  (total {timings['total_seconds']*1000:.1f} ms)")
+    print(f"{'─'*64}")
+    print(f"  {'etapa':<16}{'ms':>10}{'%':>7}{'arquivos':>10}{'KB lidos':>11}{'achados':>9}")
+    for st in timings["stages"]:
+        print(f"  {st['stage']:<16}{st['seconds']*1000:>10.1f}{st['seconds']/total*100:>6.1f}%"
+              f"{st['files']:>10}{st['bytes']/1024:>11.1f}{st['matches']:>9}")
+    if timings.get("note"):
+        print(f"  (--jobs {timings['jobs']}: {timings['note']})")
+
+
+def find_app_file(root: Path, corpus: Optional[Corpus] = None) -> Optional[Path]:
     """Localiza o arquivo de rotas principal — busca agressiva."""
+    load = (lambda p: corpus.get(p).text) if corpus else read
     # 1. Hints diretos — retorna mesmo sem <Route> (para diagnóstico)
     for hint in APP_HINTS:
         p = root / hint
         if p.exists():
             return p
 
+    tsx = FileWalk(root, {"client": ["client/src/**/*.tsx"], "src": ["src/**/*.tsx"]}, SKIP_DIRS)
+
     # 2. Scan por arquivo com Switch OU Route
-    for gp in ["client/src/**/*.tsx", "src/**/*.tsx"]:
-        for p in root.glob(gp):
-            if any(d in SKIP_DIRS for d in p.parts):
-                continue
-            txt = read(p)
+    for group in ("client", "src"):
+        for p in tsx.files(group):
+            txt = load(p)
             if ("<Switch" in txt and "<Route" in txt) or "useRoute(" in txt:
                 return p
 
     # 3. Qualquer arquivo que mencione path="/
-    for gp in ["client/src/**/*.tsx", "src/**/*.tsx"]:
-        for p in root.glob(gp):
-            if any(d in SKIP_DIRS for d in p.parts):
-                continue
-            txt = read(p)
+    for group in ("client", "src"):
+        for p in tsx.files(group):
+            txt = load(p)
             if 'path="/' in txt or "path='/" in txt:
                 return p
     return None
 
 
-def debug_app_file(app_file: Optional[Path], root: Path) -> Dict:
+def debug_app_file(app_file: Optional[Path], corpus: Corpus) -> Dict:
     """Debug do App.tsx — diagnóstico de por que 0 rotas foram detectadas."""
     if not app_file or not app_file.exists():
         return {
@@ -997,8 +1243,8 @@ def debug_app_file(app_file: Optional[Path], root: Path) -> Dict:
             "has_route": False, "has_wouter_import": False,
             "route_count_raw": 0, "raw_paths_found": [],
         }
-    txt = read(app_file)
-    fr  = relp(app_file, root)
+    app = corpus.get(app_file)
+    txt, fr = app.text, app.rel
 
     # Extrair todos os paths com o novo regex (suporta aspas diretas E JSX {})
     raw_paths = [m.group(1) or m.group(2) for m in R_PATH_ANY.finditer(txt)
@@ -1018,13 +1264,32 @@ def debug_app_file(app_file: Optional[Path], root: Path) -> Dict:
     }
 
 
-def run_full_audit(root: Path) -> Dict:
+def run_full_audit(root: Path, cache: Optional[ScanCache] = None, jobs: int = 1,
+                   profile: bool = False) -> Dict:
     print("🔍 Scanning arquivos...")
-    fe_files  = iter_files(root, FRONTEND_GLOBS)
-    be_files  = iter_files(root, BACKEND_GLOBS)
-    pg_files  = iter_files(root, PAGE_GLOBS)
-    sc_files  = iter_files(root, SCHEMA_GLOBS)
-    app_file  = find_app_file(root)
+    corpus    = Corpus(root)
+    scans     = FileScans(corpus, cache, jobs)
+    prof      = Profile(corpus, scans)
+    with prof.stage("walk") as st:
+        walk      = walk_groups(root)
+        fe_files  = walk.files("fe")
+        be_files  = walk.files("be")
+        pg_files  = walk.files("pg")
+        sc_files  = walk.files("sc")
+        st.files  = len(set(fe_files) | set(be_files) | set(pg_files) | set(sc_files))
+    with prof.stage("app_file") as st:
+        app_file  = find_app_file(root, corpus)
+        st.matches = int(app_file is not None)
+
+    plan: Dict[Path, Set[str]] = {}
+    for paths, kinds in ((fe_files, ("routes", "links", "usages", "security", "quality")),
+                         (be_files, ("procs", "mounts", "security", "quality")),
+                         (sc_files, ("tables",))):
+        for p in paths:
+            plan.setdefault(p, set()).update(kinds)
+    if jobs > 1:
+        with prof.stage(f"prefetch x{jobs}", plan):
+            scans.prefetch(plan)
 
     print(f"   Frontend: {len(fe_files)} arquivos | Backend: {len(be_files)} | Pages: {len(pg_files)}")
     if app_file:
@@ -1032,28 +1297,53 @@ def run_full_audit(root: Path) -> Dict:
     else:
         print(f"   ⚠️  App.tsx NÃO ENCONTRADO")
 
-    app_debug = debug_app_file(app_file, root)
+    with prof.stage("app_debug") as st:
+        app_debug = debug_app_file(app_file, corpus)
+        st.matches = app_debug["route_count_raw"]
     if app_debug["found"]:
         print(f"   App debug: Switch={app_debug['has_switch']} Route={app_debug['has_route']} "
               f"Wouter={app_debug['has_wouter_import']} paths_raw={app_debug['route_count_raw']}")
 
     # ── Scan ──
-    routes     = scan_routes(fe_files, root)
+    with prof.stage("routes", fe_files) as st:
+        routes     = merge_routes(scans.run("routes", fe_files))
+        st.matches = len(routes)
     route_paths= {r.path for r in routes}
+    route_table= RouteTable(route_paths)
     pages      = {f.stem: relp(f, root) for f in pg_files}
 
-    _, broken_links = scan_links(fe_files, root, route_paths)
-    all_links_l, _  = scan_links(fe_files, root, route_paths)
-
-    be_procs   = scan_trpc_backend(be_files, root)
-    fe_usages  = scan_trpc_frontend(fe_files, root)
-    db_tables  = scan_schema(sc_files, root)
-    sec_issues = scan_security(fe_files + be_files, root)
-    auth_issues= scan_auth_config(root)
-    qual_issues= scan_code_quality(fe_files + be_files, root)
-    root_issues= diagnose_root_causes(route_paths, app_file, root)
-    trpc_issues, ghost, dead = analyze_trpc(be_procs, fe_usages)
-    missing_routes, orphan_pages = scan_missing_routes(route_paths, pages)
+    with prof.stage("links", fe_files) as st:
+        all_links_l, broken_links = classify_links(
+            flatten(scans.run("links", fe_files)), route_table)
+        st.matches = len(all_links_l)
+    with prof.stage("trpc_procs", be_files) as st:
+        be_procs   = link_trpc_procs(flatten(scans.run("procs", be_files)),
+                                     flatten(scans.run("mounts", be_files)))
+        st.matches = len(be_procs)
+    with prof.stage("trpc_usages", fe_files) as st:
+        fe_usages  = flatten(scans.run("usages", fe_files))
+        st.matches = len(fe_usages)
+    with prof.stage("schema", sc_files) as st:
+        db_tables  = flatten(scans.run("tables", sc_files))
+        st.matches = len(db_tables)
+    with prof.stage("security", fe_files + be_files) as st:
+        sec_issues = flatten(scans.run("security", fe_files + be_files))
+        st.matches = len(sec_issues)
+    with prof.stage("auth_config") as st:
+        auth_issues= scan_auth_config(corpus)
+        st.matches = len(auth_issues)
+    with prof.stage("quality", fe_files + be_files) as st:
+        qual_issues= flatten(scans.run("quality", fe_files + be_files))
+        st.matches = len(qual_issues)
+    with prof.stage("root_causes") as st:
+        root_issues= diagnose_root_causes(route_paths, app_file, corpus)
+        st.matches = len(root_issues)
+    with prof.stage("trpc_analysis") as st:
+        trpc_issues, ghost, dead = analyze_trpc(be_procs, fe_usages)
+        st.matches = len(trpc_issues)
+    with prof.stage("missing_routes") as st:
+        missing_routes, orphan_pages = scan_missing_routes(route_table, pages)
+        st.matches = len(missing_routes) + len(orphan_pages)
 
     # Unknown route components
     comp_to_page = {stem: fp for stem, fp in pages.items()}
@@ -1098,6 +1388,12 @@ def run_full_audit(root: Path) -> Dict:
     for r in routes:
         route_zones[r.zone].append(r.path)
 
+    # Quantos links internos cada padrão de rota atende
+    links_by_route: Dict[str, int] = {}
+    for lf in all_links_l:
+        if lf.route is not None:
+            links_by_route[lf.route] = links_by_route.get(lf.route, 0) + 1
+
     counts = {
         "routes_detected":   len(routes),
         "pages_found":       len(pages),
@@ -1121,7 +1417,7 @@ def run_full_audit(root: Path) -> Dict:
     def ser(lst):
         return [asdict(x) if hasattr(x, '__dataclass_fields__') else x for x in lst]
 
-    return {
+    report = {
         "generated_at":       datetime.datetime.now().isoformat(),
         "project_root":       str(root),
         "app_file":           str(app_file) if app_file else None,
@@ -1130,6 +1426,7 @@ def run_full_audit(root: Path) -> Dict:
         "counts":             counts,
         "routes":             ser(routes),
         "route_zones":        route_zones,
+        "links_by_route":     dict(sorted(links_by_route.items())),
         "broken_links":       ser(broken_links),
         "orphan_pages":       orphan_pages,
         "missing_expected_routes": missing_routes,
@@ -1141,49 +1438,50 @@ def run_full_audit(root: Path) -> Dict:
         "unknown_route_components": unknown_comps,
         "issues":             ser(all_issues),
     }
+    if profile:
+        report["timings"] = prof.as_dict()
+    return report
 
 
-def run_autofix(root: Path, report: Dict, cfg: Dict) -> List[Fix]:
-    """Aplica todos os fixes solicitados."""
+def run_autofix(root: Path, report: Dict, cfg: Dict
+                ) -> Tuple[List[Fix], str, Dict[str, List[TextChange]]]:
+    """
+    Aplica todos os fixes solicitados.
+    Todos os fixers editam o mesmo EditBatch: cada arquivo é lido uma vez, os fixers
+    seguintes enxergam as mudanças dos anteriores e, com --apply, cada arquivo alterado
+    é gravado uma única vez no final (tudo ou nada).
+    Retorna (fixes, manifesto do backup, mudanças por arquivo); as mudanças vão para o
+    JSON como trechos alterados e o diff só é montado no --show-diff.
+    """
     apply   = cfg.get("apply", False)
-    bdir    = root / ".shadia_backups" / now_tag()
     fixes:  List[Fix] = []
+    batch   = EditBatch()
 
     route_paths = {r["path"] for r in report["routes"]}
+    route_table = RouteTable(route_paths)
     app_file_str= report.get("app_file")
     app_file    = Path(app_file_str) if app_file_str else find_app_file(root)
-    fe_files    = iter_files(root, FRONTEND_GLOBS)
-    pg_files    = iter_files(root, PAGE_GLOBS)
+    walk        = walk_groups(root)
+    fe_files    = walk.files("fe")
+    pg_files    = walk.files("pg")
 
     # 1. Fix links
     if cfg.get("fix_links"):
         broken_data = report["broken_links"]
         broken_objs = [LinkFinding(**b) for b in broken_data]
         disable_uf  = cfg.get("disable_unfixable", False)
+        by_file: Dict[str, List[LinkFinding]] = {}
+        for b in broken_objs:
+            by_file.setdefault(b.file, []).append(b)
         for f in fe_files:
-            fr = relp(f, root)
-            file_broken = [b for b in broken_objs if b.file == fr]
-            if not file_broken:
-                continue
-            for b in file_broken:
-                fix = propose_href_fix(b.href, route_paths)
-                if fix or disable_uf:
-                    new_href = fix[0] if fix else "#"
-                    txt = original = read(f)
-                    for pat in [f'href="{b.href}"', f"href='{b.href}'",
-                                f'navigate("{b.href}")', f"navigate('{b.href}')"]:
-                        txt = txt.replace(pat, pat.replace(b.href, new_href))
-                    if txt != original:
-                        if apply:
-                            backup(f, bdir)
-                            write(f, txt)
-                        fixes.append(Fix(fr, "fix_link", b.href, new_href,
-                                        f"L{b.line} — {fix[1] if fix else 'desabilitado'}"))
+            file_broken = by_file.get(relp(f, root))
+            if file_broken:
+                fixes.extend(fix_links_in_file(f, file_broken, route_paths, batch, disable_uf))
 
     # 2. Fix OAuth links
     if cfg.get("fix_oauth"):
         for f in fe_files:
-            fx = fix_oauth_links(f, apply, bdir)
+            fx = fix_oauth_links(f, batch)
             fixes.extend(fx)
 
     # 3. Create stub pages + add routes
@@ -1205,7 +1503,7 @@ def run_autofix(root: Path, report: Dict, cfg: Dict) -> List[Fix]:
                           "".join(w[:1].upper()+w[1:] for w in re.split(r"[-_]+", seg) if w))
             if not comp or comp in pages_by_stem:
                 continue
-            stub = create_stub_page(base / f"{comp}.tsx", href, apply)
+            stub = create_stub_page(base / f"{comp}.tsx", href, batch)
             if stub:
                 fixes.append(stub)
                 routes_to_add.append((href, comp))
@@ -1214,28 +1512,35 @@ def run_autofix(root: Path, report: Dict, cfg: Dict) -> List[Fix]:
         # Also add orphan pages to routes
         for stem, fp in {f.stem: f for f in pg_files}.items():
             guess = stem_to_route(stem)
-            if not path_matches(guess, route_paths) and ":" not in guess:
+            if not path_matches(guess, route_table) and ":" not in guess:
                 routes_to_add.append((guess, stem))
         seen = set()
         deduped = [(p,c) for p,c in routes_to_add
                    if not ((p,c) in seen or seen.add((p,c)))]  # type: ignore
-        fx = add_routes_to_app(app_file, deduped, apply, bdir)
+        fx = add_routes_to_app(app_file, deduped, batch)
         fixes.extend(fx)
 
     # 4. Comment console.log
     if cfg.get("fix_console"):
-        for f in fe_files + iter_files(root, BACKEND_GLOBS):
-            txt = original = read(f)
+        for f in fe_files + walk.files("be"):
+            txt = original = batch.text(f)
             txt = R_CONSOLE.sub("// console.log(", txt)
             if txt != original:
-                if apply:
-                    backup(f, bdir)
-                    write(f, txt)
+                batch.write(f, txt)
                 count = original.count("console.log(")
                 fixes.append(Fix(relp(f, root), "fix_console", "", "",
                                f"Comentados {count} console.log"))
 
-    return fixes, str(bdir) if apply else ""
+    for p, kept, dropped in batch.conflicts:
+        print(f"  ⚠️  {relp(p, root)}: edição [{dropped.start}:{dropped.end}] sobrepõe "
+              f"[{kept.start}:{kept.end}] — ignorada")
+    changes = {relp(p, root): batch.changes(p) for p in batch.changed()}
+    if not apply:
+        return fixes, "", changes
+    run = BackupStore(root / BACKUP_DIR, root).start("shadia_doctor")
+    batch.commit(backup=run)
+    manifest = run.save()
+    return fixes, str(manifest) if manifest else "", changes
 
 
 # ═══════════════════════════════ HTML REPORT ══════════════════════════════════
@@ -1277,6 +1582,7 @@ def write_html(out: Path, report: Dict, fixes: Optional[List[Fix]] = None) -> No
     fe_usgs = report["frontend_usages"]
     tables  = report["db_tables"]
     zones   = report["route_zones"]
+    by_route= report.get("links_by_route", {})
     missing_r = report.get("missing_expected_routes", [])
 
     gs = scores["global"]
@@ -1594,7 +1900,9 @@ tr:hover td{{background:#0d1830}}
         a(f'<div class="zone {zone_cls}"><h3>{zone_label} ({len(items)})</h3><ul>')
         if items:
             for p in sorted(items):
-                a(f'<li><code>{esc(p)}</code></li>')
+                nl = by_route.get(p, 0)
+                a(f'<li><code>{esc(p)}</code>'
+                  f'<span style="color:var(--muted);font-size:0.78em"> · {nl} link{"s" if nl != 1 else ""}</span></li>')
         else:
             a('<li style="color:var(--muted)">(nenhuma)</li>')
         a('</ul></div>')
@@ -2018,46 +2326,89 @@ services:
     print(f"     http://localhost:3001/api/auth/google/callback")
 
 
-def restore_from_backup(root: Path, backup_dir_str: Optional[str] = None) -> None:
-    """
-    Restaura arquivos a partir do backup mais recente em .shadia_backups/.
-    Use quando um fix estragou algum arquivo.
-    """
-    bdir_root = root / ".shadia_backups"
-    if not bdir_root.exists():
-        print("  ⚠️  Nenhum backup encontrado em .shadia_backups/")
-        return
-
-    # Usar pasta especificada ou a mais recente
-    if backup_dir_str:
-        bdir = Path(backup_dir_str)
-    else:
-        subdirs = sorted([d for d in bdir_root.iterdir() if d.is_dir()])
-        if not subdirs:
-            print("  ⚠️  Pasta .shadia_backups/ existe mas está vazia")
-            return
-        bdir = subdirs[-1]   # mais recente
-
-    print(f"\n🔄 Restaurando de: {bdir}")
+def restore_legacy_dir(root: Path, bdir: Path) -> int:
+    """Backups antigos: uma pasta por execução com paths achatados ("__" = "/")."""
     restored = 0
     for backup_file in bdir.iterdir():
         if not backup_file.is_file():
             continue
-        # Reconstruir path original: "__" vira "/"
         rel = backup_file.name.replace("__", "/")
         orig = root / rel
         orig.parent.mkdir(parents=True, exist_ok=True)
         shutil.copy2(backup_file, orig)
         print(f"  ✅ Restaurado: {rel}")
         restored += 1
+    return restored
+
 
-    if restored == 0:
+def restore_from_backup(root: Path, run: Optional[str] = None) -> None:
+    """
+    Desfaz um --apply a partir do store de backups em .shadia_backups/.
+    `run` é o id da execução (default: a mais recente); só os arquivos do manifesto
+    são lidos. Arquivos criados pela execução são removidos. Ainda aceita uma pasta
+    no formato antigo (arquivos com "__" no nome).
+    """
+    store = BackupStore(root / BACKUP_DIR, root)
+    legacy = Path(run) if run else None
+    if legacy and not legacy.is_absolute():
+        legacy = root / legacy
+    if legacy and legacy.is_dir():
+        print(f"\n🔄 Restaurando de: {legacy}")
+        restored = restore_legacy_dir(root, legacy)
+        removed = 0
+        label = legacy.name
+    else:
+        run_id = Path(run).stem if run else None   # aceita id ou caminho do manifesto
+        try:
+            manifest = store.manifest(run_id)
+        except KeyError as e:
+            print(f"  ⚠️  {e.args[0]}")
+            return
+        label = manifest["id"]
+        print(f"\n🔄 Restaurando execução {label} ({manifest['tool']}, {manifest['created'][:19]})")
+        done = store.restore(label)
+        for rel, action in done:
+            print(f"  {'✅ Restaurado' if action == 'restored' else '🗑️  Removido'}: {rel}")
+        restored = sum(1 for _, action in done if action == "restored")
+        removed = len(done) - restored
+
+    if restored + removed == 0:
         print("  ⚠️  Nenhum arquivo para restaurar")
     else:
-        print(f"\n  ✅ {restored} arquivo(s) restaurado(s) do backup {bdir.name}")
+        print(f"\n  ✅ Backup {label}: {restored} arquivo(s) restaurado(s), {removed} removido(s) "
+              f"({restored + removed} revertido(s))")
         print(f"     Execute 'pnpm build' novamente para verificar.")
 
 
+def show_diff(root: Path, report_json: Path, target: str) -> None:
+    """Diff de um arquivo montado sob demanda a partir das mudanças gravadas no JSON."""
+    try:
+        data = json.loads(report_json.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        print(f"  ⚠️  Relatório não encontrado: {report_json} (rode com --fix-* antes)")
+        return
+    try:
+        want = relp((root / target).resolve(), root)
+    except ValueError:
+        print(f"  ⚠️  Nenhuma alteração registrada para {target} (fora da raiz {root})")
+        return
+    recorded = data.get("changes", {}).get(want)
+    if not recorded:
+        print(f"  ⚠️  Nenhuma alteração registrada para {want}")
+        return
+    p = root / want
+    current = read(p) if p.exists() else None
+    sys.stdout.write(render_changes(want, current, [[TextChange(**c) for c in recorded]],
+                                    data.get("fix_mode") == "APPLY"))
+
+
+def gc_backups(root: Path, keep: int) -> None:
+    store = BackupStore(root / BACKUP_DIR, root)
+    runs, blobs = store.gc(keep)
+    print(f"🧹 Backups: {runs} execução(ões) antiga(s) removida(s), {blobs} blob(s) descartado(s), "
+          f"{len(store.runs())} mantida(s) em {store.dir}")
+
+
 def main():
     ap = argparse.ArgumentParser(
         description="Shadia Doctor v2.3 — Auditoria + Diagnóstico + Autofix",
@@ -2068,6 +2419,12 @@ def main():
     ap.add_argument("--apply",   action="store_true", help="Gravar fixes (senão dry-run)")
     ap.add_argument("--dry-run", action="store_true", help="Mostrar diff sem gravar")
     ap.add_argument("--no-html", action="store_true", help="Não gerar HTML")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Ignorar o cache incremental (<out>/.cache) e reescanear tudo")
+    ap.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                    help="Escanear arquivos em N processos (0 = todos os núcleos)")
+    ap.add_argument("--profile", action="store_true",
+                    help="Medir tempo/arquivos/bytes/achados por etapa (tabela + 'timings' no JSON)")
     ap.add_argument("--fail-on-critical", action="store_true",
                     help="Sair com código 1 se houver issues CRITICAL (para CI)")
     ap.add_argument("--gen-env", action="store_true",
@@ -2078,8 +2435,15 @@ def main():
                     help="Mostrar primeiras 80 linhas do App.tsx para diagnóstico")
     ap.add_argument("--restore", action="store_true",
                     help="Restaurar arquivos do backup mais recente (desfaz --apply)")
-    ap.add_argument("--restore-from", default=None, metavar="BACKUP_DIR",
-                    help="Restaurar de backup específico (ex: .shadia_backups/20260226_101153)")
+    ap.add_argument("--restore-from", default=None, metavar="RUN",
+                    help="Restaurar de uma execução específica (id, ex: 20260226_101153, "
+                         "ou pasta de backup no formato antigo)")
+    ap.add_argument("--show-diff", default=None, metavar="FILE",
+                    help="Mostrar o diff de FILE gravado no último shadia_audit.json (sem reauditar)")
+    ap.add_argument("--gc", action="store_true",
+                    help="Apagar backups antigos de .shadia_backups/ (mantém --keep-runs) e compactar o resto")
+    ap.add_argument("--keep-runs", type=int, default=10, metavar="N",
+                    help="Execuções mantidas pelo --gc (default: 10)")
     # Fix flags
     ap.add_argument("--fix-all",     action="store_true",
                     help="Ativar todos os fixers seguros (links, rotas, stubs, console)\n"
@@ -2093,6 +2457,8 @@ def main():
     ap.add_argument("--disable-unfixable", action="store_true",
                     help='Links não corrigíveis viram href="#"')
     args = ap.parse_args()
+    if args.keep_runs < 0:
+        ap.error("--keep-runs precisa ser >= 0")
 
     root    = Path(args.root).resolve()
     out_dir = root / args.out
@@ -2103,10 +2469,17 @@ def main():
     print(f"  Projeto: {root}")
     print(f"{'='*64}\n")
 
+    if args.show_diff:
+        show_diff(root, out_dir / "shadia_audit.json", args.show_diff)
+        return
+
     # ── Restaurar backup ──
     if args.restore or args.restore_from:
         restore_from_backup(root, args.restore_from)
         return
+    if args.gc:
+        gc_backups(root, args.keep_runs)
+        return
 
     # ── Gerar .env de produção ──
     if args.gen_env:
@@ -2116,7 +2489,15 @@ def main():
         generate_env_files(root, env_src)
         print()
 
-    report = run_full_audit(root)
+    cache = None if args.no_cache else ScanCache(
+        out_dir / ".cache" / "shadia_doctor.json", tool_salt(Path(__file__)))
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    report = run_full_audit(root, cache, jobs, args.profile)
+    if cache is not None:
+        cache.save()
+        print(f"   Cache: {cache.hits} hits / {cache.misses} misses")
+    if args.profile:
+        print_profile(report["timings"])
 
     # ── Debug App.tsx ──
     if args.debug_app:
@@ -2140,6 +2521,7 @@ def main():
     # ── Autofix ──
     fixes: List[Fix] = []
     bdir_str = ""
+    changes: Dict[str, List[TextChange]] = {}
     any_fix = any([args.fix_all, args.fix_links, args.fix_routes,
                    args.fix_oauth, args.fix_console, args.create_stubs])
     if any_fix:
@@ -2158,7 +2540,11 @@ def main():
         print(f"\n🔧 Modo fix: {mode}")
         if cfg["fix_oauth"]:
             print(f"  ⚠️  --fix-oauth ativo: revise os arquivos alterados antes do build!")
-        fixes, bdir_str = run_autofix(root, report, cfg)
+        fixes, bdir_str, changes = run_autofix(root, report, cfg)
+        if args.dry_run and not args.apply:
+            for f, cs in changes.items():
+                p = root / f
+                sys.stdout.write(render_changes(f, read(p) if p.exists() else None, [cs], False))
         print(f"   Fixes: {len(fixes)}")
         if args.apply and bdir_str:
             print(f"   Backups: {bdir_str}")
@@ -2171,6 +2557,7 @@ def main():
         "fixes": [asdict(f) for f in fixes] if fixes else [],
         "fix_mode": "APPLY" if args.apply else ("DRY_RUN" if any_fix else "AUDIT_ONLY"),
         "backup_dir": bdir_str,
+        "changes": {f: [asdict(c) for c in cs] for f, cs in changes.items()},
     }
     j_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
     print(f"✅ JSON: {j_path}")
@@ -2237,6 +2624,8 @@ def main():
     print(f"      python shadia_doctor.py --root . --apply --fix-all")
     print(f"      # Desfazer último --apply (restaurar backups):")
     print(f"      python shadia_doctor.py --root . --restore")
+    print(f"      # Limpar backups antigos (mantém as 10 últimas execuções):")
+    print(f"      python shadia_doctor.py --root . --gc")
     print(f"      # Gerar .env de desenvolvimento e produção:")
     print(f"      python shadia_doctor.py --root . --gen-env")
     print(f"      # CI/CD (falha se houver críticos):")
@@ -24,12 +24,16 @@ import difflib
 import json
 import os
 import re
-import shutil
 import sys
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple, Any
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from common import (
+    BackupStore, FixPlan, TextChange, render_changes, text_changes, LineIndex, RouteTable, ScanCache, TrpcMount, parse_trpc_routers,
+    tool_salt, trpc_mounted_namespace, trpc_prefixes,
+)
 
 # ═══════════════════════════════ CONFIG ══════════════════════════════════════
 
@@ -93,21 +97,17 @@ RX_DIRECT_OAUTH = re.compile(
 
 # ── tRPC frontend ────────────────────────────────────────────────────────────
 RX_TRPC_USE = re.compile(
-    r'trpc\.([A-Za-z_]\w*)\.([A-Za-z_]\w*)\.(?:useQuery|useMutation|useSuspenseQuery'
+    r'trpc\.((?:[A-Za-z_]\w*\.)+?)([A-Za-z_]\w*)\.(?:useQuery|useMutation|useSuspenseQuery'
     r'|useInfiniteQuery|useSubscription|mutateAsync|mutate)',
     re.MULTILINE,
 )
 RX_TRPC_UTIL = re.compile(
-    r'trpc\.([A-Za-z_]\w*)\.([A-Za-z_]\w*)\.(?:invalidate|refetch|setData|cancel)',
+    r'trpc\.((?:[A-Za-z_]\w*\.)+?)([A-Za-z_]\w*)\.(?:invalidate|refetch|setData|cancel)',
     re.MULTILINE,
 )
 
 # ── tRPC backend ─────────────────────────────────────────────────────────────
-RX_TRPC_NS    = re.compile(r'([A-Za-z_]\w*)\s*:\s*(?:router|createRouter)\s*\(', re.MULTILINE)
-RX_TRPC_PROC  = re.compile(
-    r'([A-Za-z_]\w*)\s*:\s*(publicProcedure|protectedProcedure|adminProcedure|procedure)\b',
-    re.MULTILINE,
-)
+# (procedures/namespaces: common.parse_trpc_routers)
 RX_APP_ROUTER = re.compile(
     r'(?:export\s+(?:const|default)\s+)?(?:appRouter|router)\s*=\s*(?:t\.)?(?:router|createRouter)\s*\(',
     re.MULTILINE,
@@ -179,11 +179,14 @@ class LinkInfo:
 
 @dataclass
 class TrpcProc:
-    ns: str
+    ns: str              # caminho completo: "auth", "videos.admin", "__root__"
     name: str
     kind: str
     file: str
     line: int
+    end_line: int = 0
+    has_input: bool = False
+    router: Optional[str] = None   # variável do router de topo (ex.: profileRouter)
 
 @dataclass
 class TrpcUsage:
@@ -198,7 +201,8 @@ class AppliedFix:
     kind: str
     file: str
     description: str
-    diff_preview: str = ""
+    changes: List[TextChange] = field(default_factory=list)   # diff compacto; renderizado sob demanda
+    new_file: bool = False
 
 # ═══════════════════════════════ HELPERS ══════════════════════════════════════
 
@@ -211,24 +215,12 @@ def read(p: Path) -> str:
     except Exception:
         return ""
 
-def write(p: Path, content: str, backup_dir: Optional[Path] = None) -> None:
-    if backup_dir:
-        bak = backup_dir / ts(p).replace("/", "__")
-        bak.parent.mkdir(parents=True, exist_ok=True)
-        if p.exists():
-            shutil.copy2(p, bak)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(content, encoding="utf-8", newline="\n")
-
 def rel(p: Path, root: Path) -> str:
     try:
         return ts(p.relative_to(root))
     except ValueError:
         return ts(p)
 
-def ln(text: str, idx: int) -> int:
-    return text.count("\n", 0, idx) + 1
-
 def norm_path(p: str) -> str:
     if not p:
         return ""
@@ -255,17 +247,6 @@ def zone_for_file(file_path: str) -> str:
         return "ADMIN"
     return "PUBLIC"
 
-def iter_files(root: Path, globs: List[str]) -> List[Path]:
-    seen: Set[Path] = set()
-    for g in globs:
-        for p in root.glob(g):
-            if not p.is_file():
-                continue
-            if any(part in SKIP_DIRS for part in p.parts):
-                continue
-            seen.add(p)
-    return sorted(seen)
-
 def kebab(s: str) -> str:
     s2 = re.sub(r"([a-z0-9])([A-Z])", r"\1-\2", s)
     s2 = s2.replace("_", "-")
@@ -308,33 +289,15 @@ def guess_route(stem: str) -> str:
         return "/admin"
     return "/" + kebab(stem)
 
-def make_diff(original: str, modified: str, filename: str, n: int = 3) -> str:
-    orig_lines = original.splitlines(keepends=True)
-    mod_lines  = modified.splitlines(keepends=True)
-    diff = list(difflib.unified_diff(orig_lines, mod_lines, fromfile=f"a/{filename}", tofile=f"b/{filename}", n=n))
-    return "".join(diff[:80]) + ("\n... (diff truncado)" if len(diff) > 80 else "")
-
-def path_matches(href: str, routes: Set[str]) -> bool:
-    norm = norm_path(href)
-    if not norm or norm == "/":
-        return True
-    if norm in routes:
-        return True
-    for r in routes:
-        if ":" in r or "*" in r:
-            rp = r.split("/")
-            hp = norm.split("/")
-            if len(rp) == len(hp):
-                if all(x.startswith(":") or x == y for x, y in zip(rp, hp)):
-                    return True
-    return False
+def path_matches(href: str, routes: RouteTable) -> bool:
+    return routes.match(norm_path(href)) is not None
 
 def esc(s: Any) -> str:
     return str(s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
 
 # ═══════════════════════════════ SCANNERS ═════════════════════════════════════
 
-def scan_routes(files: List[Path], root: Path) -> List[RouteInfo]:
+def scan_routes(files: List[Path], root: Path, text: Callable[[Path], str] = read) -> List[RouteInfo]:
     routes: List[RouteInfo] = []
     seen: Set[Tuple] = set()
 
@@ -350,7 +313,7 @@ def scan_routes(files: List[Path], root: Path) -> List[RouteInfo]:
         routes.append(RouteInfo(path, comp or None, zone(path), file_rel, source))
 
     for f in files:
-        txt = read(f)
+        txt = text(f)
         fr  = rel(f, root)
         # Component attribute patterns
         for m in RX_ROUTE_COMP.finditer(txt):
@@ -370,9 +333,11 @@ def scan_routes(files: List[Path], root: Path) -> List[RouteInfo]:
     return routes
 
 
-def scan_links(files: List[Path], root: Path, route_paths: Set[str]) -> Tuple[List[LinkInfo], List[LinkInfo]]:
+def scan_links(files: List[Path], root: Path, route_paths: Set[str],
+               text: Callable[[Path], str] = read) -> Tuple[List[LinkInfo], List[LinkInfo]]:
     internal: List[LinkInfo] = []
     broken:   List[LinkInfo] = []
+    table = RouteTable(route_paths)
 
     patterns = [
         (RX_LINK_HREF,   "Link"),
@@ -384,8 +349,9 @@ def scan_links(files: List[Path], root: Path, route_paths: Set[str]) -> Tuple[Li
     ]
 
     for f in files:
-        txt = read(f)
+        txt = text(f)
         fr  = rel(f, root)
+        idx = LineIndex(txt)
         zg  = zone_for_file(fr)
 
         for rx, kind in patterns:
@@ -399,10 +365,10 @@ def scan_links(files: List[Path], root: Path, route_paths: Set[str]) -> Tuple[Li
                     continue
                 if not href.startswith("/"):
                     continue
-                line = ln(txt, m.start())
+                line = idx.line(m.start())
                 lf = LinkInfo(fr, href, kind, line, zg)
                 internal.append(lf)
-                if not path_matches(href, route_paths):
+                if not path_matches(href, table):
                     lf.broken = True
                     # Try suggestion
                     lf.fix_suggestion = suggest_route_fix(href, route_paths)
@@ -426,62 +392,51 @@ def suggest_route_fix(href: str, routes: Set[str]) -> Optional[str]:
     return None
 
 
-def scan_trpc_backend(files: List[Path], root: Path) -> Tuple[List[TrpcProc], Dict[str, Set[str]]]:
-    """Returns (procedures_list, namespace_map)"""
+def scan_trpc_procs(files: List[Path], root: Path, text: Callable[[Path], str] = read) -> List[TrpcProc]:
+    """Procedures por arquivo, com namespace relativo ao router de topo em que aparecem."""
     procs: List[TrpcProc] = []
-    ns_map: Dict[str, Set[str]] = {}  # ns -> set of proc names
-
     for f in files:
-        txt   = read(f)
-        fr    = rel(f, root)
-        lines = txt.split("\n")
-        ns_stack: List[str] = []
-        current_ns = "__root__"
-
-        for i, line in enumerate(lines, 1):
-            nm = RX_TRPC_NS.search(line)
-            if nm and nm.group(1) not in {"router", "t", "createRouter", "appRouter"}:
-                current_ns = nm.group(1)
-                ns_stack.append(current_ns)
-
-            pm = RX_TRPC_PROC.search(line)
-            if pm:
-                proc_name = pm.group(1)
-                proc_type = pm.group(2)
-                kind = {
-                    "publicProcedure":    "public",
-                    "protectedProcedure": "protected",
-                    "adminProcedure":     "admin",
-                    "procedure":          "unknown",
-                }.get(proc_type, "unknown")
-
-                ns = ns_stack[-1] if ns_stack else "__root__"
-                if proc_name not in {"router", "t", "procedure", "publicProcedure",
-                                     "protectedProcedure", "adminProcedure"}:
-                    procs.append(TrpcProc(ns, proc_name, kind, fr, i))
-                    ns_map.setdefault(ns, set()).add(proc_name)
-
-            stripped = line.strip()
-            if stripped in ("}),", "})", "},", "})") and ns_stack:
-                ns_stack.pop()
-                current_ns = ns_stack[-1] if ns_stack else "__root__"
+        fr = rel(f, root)
+        for n in parse_trpc_routers(text(f))[0]:
+            procs.append(TrpcProc(".".join(n.path) or "__root__", n.name, n.kind, fr,
+                                  n.line, n.end_line, n.has_input, n.router))
+    return procs
+
+
+def scan_trpc_mounts(files: List[Path], root: Path, text: Callable[[Path], str] = read) -> List[TrpcMount]:
+    return [m for f in files for m in parse_trpc_routers(text(f))[1]]
 
+
+def link_trpc_procs(procs: List[TrpcProc], mounts: List[TrpcMount]
+                    ) -> Tuple[List[TrpcProc], Dict[str, Set[str]]]:
+    """Aplica os mounts (`profile: profileRouter`) e devolve (procs, ns -> nomes)."""
+    prefixes = trpc_prefixes(mounts)
+    ns_map: Dict[str, Set[str]] = {}
+    for p in procs:
+        p.ns = trpc_mounted_namespace(p.ns, p.router, prefixes)
+        ns_map.setdefault(p.ns, set()).add(p.name)
     return procs, ns_map
 
 
-def scan_trpc_frontend(files: List[Path], root: Path) -> List[TrpcUsage]:
+def scan_trpc_backend(files: List[Path], root: Path) -> Tuple[List[TrpcProc], Dict[str, Set[str]]]:
+    """Returns (procedures_list, namespace_map)"""
+    return link_trpc_procs(scan_trpc_procs(files, root), scan_trpc_mounts(files, root))
+
+
+def scan_trpc_frontend(files: List[Path], root: Path, text: Callable[[Path], str] = read) -> List[TrpcUsage]:
     usages: List[TrpcUsage] = []
     seen: Set[Tuple] = set()
 
     for f in files:
-        txt = read(f)
+        txt = text(f)
         fr  = rel(f, root)
+        idx = LineIndex(txt)
         for rx in (RX_TRPC_USE, RX_TRPC_UTIL):
             for m in rx.finditer(txt):
-                ns     = m.group(1)
+                ns     = m.group(1).rstrip(".")
                 name   = m.group(2)
                 method = m.group(0).split(".")[-1]
-                line   = ln(txt, m.start())
+                line   = idx.line(m.start())
                 key    = (ns, name, fr, line)
                 if key not in seen:
                     seen.add(key)
@@ -495,26 +450,27 @@ def scan_pages(page_files: List[Path], root: Path) -> Dict[str, str]:
     return {f.stem: rel(f, root) for f in page_files}
 
 
-def scan_security(files: List[Path], root: Path) -> List[Issue]:
+def scan_security(files: List[Path], root: Path, text: Callable[[Path], str] = read) -> List[Issue]:
     issues: List[Issue] = []
     for f in files:
-        txt = read(f)
+        txt = text(f)
         fr  = rel(f, root)
+        idx = LineIndex(txt)
         for m in RX_LOCALHOST.finditer(txt):
             snippet = txt[max(0, m.start()-50):m.start()+80].replace("\n", " ").strip()
-            issues.append(Issue("WARNING", "Security", fr, ln(txt, m.start()),
+            issues.append(Issue("WARNING", "Security", fr, idx.line(m.start()),
                                 "Hardcoded localhost/port",
                                 f"`{snippet[:120]}`", True))
         for m in RX_HARDCODE_KEY.finditer(txt):
             masked = re.sub(r'["\'][A-Za-z0-9_\-\.]{4,}["\']', '"***"', m.group(0))
-            issues.append(Issue("CRITICAL", "Security", fr, ln(txt, m.start()),
+            issues.append(Issue("CRITICAL", "Security", fr, idx.line(m.start()),
                                 "Chave/segredo hardcoded", f"`{masked}`", True))
         for m in RX_OPEN_REDIRECT.finditer(txt):
             snippet = txt[max(0, m.start()-30):m.start()+100].replace("\n", " ").strip()
-            issues.append(Issue("CRITICAL", "Security", fr, ln(txt, m.start()),
+            issues.append(Issue("CRITICAL", "Security", fr, idx.line(m.start()),
                                 "Possível Open Redirect via `next`", f"`{snippet[:120]}`"))
         for m in RX_DIRECT_OAUTH.finditer(txt):
-            issues.append(Issue("WARNING", "OAuth", fr, ln(txt, m.start()),
+            issues.append(Issue("WARNING", "OAuth", fr, idx.line(m.start()),
                                 f"Link OAuth direto: `{m.group(1)}`",
                                 "Deve redirecionar para /login?provider=... em vez de chamar /api/auth diretamente",
                                 True))
@@ -522,14 +478,15 @@ def scan_security(files: List[Path], root: Path) -> List[Issue]:
     return issues
 
 
-def scan_quality(files: List[Path], root: Path) -> List[Issue]:
+def scan_quality(files: List[Path], root: Path, text: Callable[[Path], str] = read) -> List[Issue]:
     issues: List[Issue] = []
     for f in files:
-        txt = read(f)
+        txt = text(f)
         fr  = rel(f, root)
+        idx = LineIndex(txt)
         for m in RX_TODO.finditer(txt):
             snippet = txt[m.start():m.start()+80].replace("\n", " ").strip()
-            issues.append(Issue("INFO", "CodeQuality", fr, ln(txt, m.start()),
+            issues.append(Issue("INFO", "CodeQuality", fr, idx.line(m.start()),
                                 "TODO/FIXME pendente", f"`{snippet}`"))
         count = len(RX_CONSOLE_LOG.findall(txt))
         if count > 3:
@@ -539,6 +496,70 @@ def scan_quality(files: List[Path], root: Path) -> List[Issue]:
     return issues
 
 
+def scan_schema(files: List[Path], root: Path, text: Callable[[Path], str] = read) -> List[Dict]:
+    tables: List[Dict] = []
+    for f in files:
+        txt = text(f)
+        fr  = rel(f, root)
+        for m in RX_DRIZZLE.finditer(txt):
+            tables.append({"var": m.group(1), "table": m.group(2), "file": fr})
+    return tables
+
+
+# ═══════════════════════════════ CACHE INCREMENTAL ════════════════════════════
+
+def per_file(files: List[Path], root: Path, kind: str, scan, cls,
+             cache: Optional[ScanCache], plan: FixPlan) -> List[List]:
+    """
+    Roda `scan([arquivo], root)` arquivo a arquivo sobre o texto do plano,
+    memoizado no plano (e no ScanCache quando houver). Guarda dicts e recria os
+    objetos a cada chamada: link_trpc_procs/classify_links alteram os objetos.
+    """
+    def scanned(f: Path) -> List[Dict]:
+        return [x if isinstance(x, dict) else asdict(x) for x in scan([f], root, plan.text)]
+
+    out: List[List] = []
+    for f in files:
+        if cache is None:
+            raw = plan.result(kind, f, lambda: scanned(f))
+        else:
+            raw = plan.result(kind, f, lambda: cache.fetch(rel(f, root), f, kind,
+                                                           lambda: plan.text(f), lambda: scanned(f)))
+        out.append([cls(**d) for d in raw])
+    return out
+
+
+def flatten(chunks: List[List]) -> List:
+    return [x for chunk in chunks for x in chunk]
+
+
+def merge_routes(chunks: List[List[RouteInfo]]) -> List[RouteInfo]:
+    routes: List[RouteInfo] = []
+    seen: Set[Tuple] = set()
+    for chunk in chunks:
+        for r in chunk:
+            key = (r.path, None) if r.source == "wouter-child" else (r.path, r.component or "")
+            if key not in seen:
+                seen.add(key)
+                routes.append(r)
+    return routes
+
+
+def _file_links(files: List[Path], root: Path, text: Callable[[Path], str] = read) -> List[LinkInfo]:
+    return scan_links(files, root, set(), text)[0]
+
+
+def classify_links(links: List[LinkInfo], route_paths: Set[str]) -> Tuple[List[LinkInfo], List[LinkInfo]]:
+    broken: List[LinkInfo] = []
+    table = RouteTable(route_paths)
+    for lf in links:
+        lf.broken = not path_matches(lf.href, table)
+        lf.fix_suggestion = suggest_route_fix(lf.href, route_paths) if lf.broken else None
+        if lf.broken:
+            broken.append(lf)
+    return links, broken
+
+
 def analyze_trpc(backend_procs: List[TrpcProc],
                  frontend_usages: List[TrpcUsage]) -> Tuple[List[Issue], Dict]:
     issues: List[Issue] = []
@@ -649,29 +670,53 @@ def score(route_count: int,
 
 # ═══════════════════════════════ AUTO-FIX ENGINE ══════════════════════════════
 
+def issue_files(report: Dict, files: List[Path], root: Path,
+                wanted: Callable[[Dict], bool]) -> List[Path]:
+    """Arquivos de `files` com algum issue da auditoria que satisfaz `wanted` (alvo dos fixers por regex)."""
+    hit = {i["file"] for i in report["issues"] if wanted(i)}
+    return [f for f in files if rel(f, root) in hit]
+
+
 class AutoFixer:
-    def __init__(self, root: Path, backup_dir: Path, dry_run: bool = True):
+    """
+    Os fixers leem e gravam pelo EditBatch do plano da auditoria: o texto já lido
+    pelos scanners é reaproveitado, e um arquivo mexido por vários fixes (links,
+    depois oauth, depois env) é gravado uma vez só em commit().
+    """
+
+    def __init__(self, root: Path, backups: BackupStore, dry_run: bool = True,
+                 plan: Optional[FixPlan] = None):
         self.root       = root
-        self.backup_dir = backup_dir
+        self.backups    = backups
         self.dry_run    = dry_run
         self.fixes: List[AppliedFix] = []
-
-    def _write(self, p: Path, content: str, description: str,
-               original: Optional[str] = None) -> AppliedFix:
-        diff_preview = ""
-        if original is not None:
-            diff_preview = make_diff(original, content, rel(p, self.root))
-
+        self.plan       = plan or make_plan(root)
+        self.batch      = self.plan.batch
+        self.manifest: Optional[Path] = None   # manifesto do backup gravado em commit()
+
+    def _read(self, p: Path) -> str:
+        """Conteúdo atual do arquivo, já com as correções anteriores desta execução."""
+        return self.plan.text(p)
+
+    def commit(self) -> List[Path]:
+        """Grava cada arquivo alterado uma única vez (tudo ou nada); nada em dry-run."""
+        if self.dry_run:
+            return []
+        run = self.backups.start("shadia_master_fix")
+        written = self.batch.commit(backup=run)
+        self.manifest = run.save()
+        return written
+
+    def _write(self, p: Path, content: str, description: str) -> AppliedFix:
         fix = AppliedFix(
             kind=description.split(":")[0].strip(),
             file=rel(p, self.root),
             description=description,
-            diff_preview=diff_preview,
+            changes=text_changes(self._read(p), content),
+            new_file=not self.batch.exists(p),
         )
         self.fixes.append(fix)
-
-        if not self.dry_run:
-            write(p, content, self.backup_dir)
+        self.batch.write(p, content)
         return fix
 
     # ─── Fix 1: Corrigir rotas orphan no App.tsx ─────────────────────────────
@@ -684,7 +729,7 @@ class AutoFixer:
             print("  ⚠️  App.tsx não encontrado — pulando fix-routes")
             return 0
 
-        txt = read(app_file)
+        txt = self._read(app_file)
         original = txt
 
         # Mapa stem -> RouteInfo já existentes
@@ -742,7 +787,7 @@ class AutoFixer:
                     txt = txt[:router_close.start()] + routes_block + "\n" + txt[router_close.start():]
 
         if txt != original:
-            self._write(app_file, txt, f"fix-routes: +{len(additions)} rotas adicionadas ao App.tsx", original)
+            self._write(app_file, txt, f"fix-routes: +{len(additions)} rotas adicionadas ao App.tsx")
 
         return len(additions)
 
@@ -750,7 +795,7 @@ class AutoFixer:
         for hint in APP_FILE_HINTS:
             p = self.root / hint
             if p.exists():
-                txt = read(p)
+                txt = self._read(p)
                 if "<Route" in txt or "Switch" in txt or "Router" in txt:
                     return p
         # Fallback: busca
@@ -759,7 +804,7 @@ class AutoFixer:
                 if any(part in SKIP_DIRS for part in p.parts):
                     continue
                 if p.stem in ("App", "app", "Router", "Routes"):
-                    txt = read(p)
+                    txt = self._read(p)
                     if "<Route" in txt or "Switch" in txt:
                         return p
         return None
@@ -786,9 +831,9 @@ class AutoFixer:
         fixed = 0
         for file_rel, links in by_file.items():
             p = self.root / file_rel
-            if not p.exists():
+            if not self.batch.exists(p):
                 continue
-            txt = read(p)
+            txt = self._read(p)
             original = txt
             for lk in links:
                 if not lk.fix_suggestion or lk.href == lk.fix_suggestion:
@@ -801,22 +846,22 @@ class AutoFixer:
                         fixed += 1
                         break
             if txt != original:
-                self._write(p, txt, f"fix-links: {len(links)} links corrigidos", original)
+                self._write(p, txt, f"fix-links: {len(links)} links corrigidos")
 
         return fixed
 
     # ─── Fix 3: OAuth gateway ─────────────────────────────────────────────────
 
-    def fix_oauth(self, all_files: List[Path]) -> int:
+    def fix_oauth(self, files: List[Path]) -> int:
+        """`files`: os arquivos com issue "OAuth" na auditoria (ver issue_files)."""
         fixed = 0
-        for f in all_files:
-            txt = read(f)
-            original = txt
+        for f in files:
+            txt = self._read(f)
             new_txt = RX_DIRECT_OAUTH.sub(
                 lambda m: f'"/login?provider={m.group(2)}"', txt
             )
             if new_txt != txt:
-                self._write(f, new_txt, f"fix-oauth: links diretos /api/auth/* substituídos por /login?provider=...", original)
+                self._write(f, new_txt, f"fix-oauth: links diretos /api/auth/* substituídos por /login?provider=...")
                 fixed += 1
         return fixed
 
@@ -846,7 +891,7 @@ class AutoFixer:
                 continue
 
             page_path = base / f"{comp}.tsx"
-            if page_path.exists():
+            if self.batch.exists(page_path):
                 continue
 
             is_admin = "/admin" in href
@@ -924,7 +969,7 @@ export default function {comp}() {{
             print("  ⚠️  router backend não encontrado — pulando fix-trpc-backend")
             return 0
 
-        txt = read(router_file)
+        txt = self._read(router_file)
         original = txt
 
         # Agrupar ghost calls por namespace
@@ -956,8 +1001,7 @@ export default function {comp}() {{
 
         if txt != original:
             self._write(router_file, txt,
-                        f"fix-trpc-backend: +{inserted} procedures criadas no backend",
-                        original)
+                        f"fix-trpc-backend: +{inserted} procedures criadas no backend")
         return inserted
 
     def _find_backend_router(self) -> Optional[Path]:
@@ -969,7 +1013,7 @@ export default function {comp}() {{
             for p in self.root.glob(g):
                 if any(part in SKIP_DIRS for part in p.parts):
                     continue
-                txt = read(p)
+                txt = self._read(p)
                 if "appRouter" in txt or "createRouter" in txt or "router(" in txt:
                     return p
         return None
@@ -1060,15 +1104,17 @@ export default function {comp}() {{
 
     # ─── Fix 6: .env e hardcoded URLs ────────────────────────────────────────
 
-    def fix_env(self, all_ts_files: List[Path]) -> int:
-        """Cria/atualiza .env.example e corrige hardcoded localhost."""
+    def fix_env(self, files: List[Path]) -> int:
+        """
+        Cria/atualiza .env.example e corrige hardcoded localhost.
+        `files`: os arquivos com "Hardcoded localhost/port" na auditoria.
+        """
         env_example = self.root / ".env.example"
         env_content = self._gen_env_example()
 
         fixed_files = 0
-        for f in all_ts_files:
-            txt = read(f)
-            original = txt
+        for f in files:
+            txt = self._read(f)
 
             # Substituir localhost:3001 por process.env.API_URL || ''
             new_txt = re.sub(
@@ -1084,8 +1130,7 @@ export default function {comp}() {{
             )
             if new_txt != txt:
                 self._write(f, new_txt,
-                            "fix-env: localhost hardcoded substituído por variáveis de ambiente",
-                            original)
+                            "fix-env: localhost hardcoded substituído por variáveis de ambiente")
                 fixed_files += 1
 
         self._write(env_example, env_content, "fix-env: .env.example criado/atualizado")
@@ -1142,13 +1187,11 @@ STRIPE_WEBHOOK_SECRET=whsec_...
         fixed = 0
         login_page = self._find_login_page(all_ts_files)
         if login_page:
-            txt = read(login_page)
-            original = txt
+            txt = self._read(login_page)
             new_txt = self._ensure_google_button(txt)
             if new_txt != txt:
                 self._write(login_page, new_txt,
-                            "fix-google-login: botão Google OAuth atualizado para uso correto",
-                            original)
+                            "fix-google-login: botão Google OAuth atualizado para uso correto")
                 fixed += 1
         return fixed
 
@@ -1181,12 +1224,12 @@ STRIPE_WEBHOOK_SECRET=whsec_...
     def fix_google_oauth_backend(self, all_back_files: List[Path]) -> int:
         """Cria arquivo de configuração Google OAuth se não existir."""
         oauth_file = self.root / "server" / "_core" / "google_oauth.ts"
-        if oauth_file.exists():
+        if self.batch.exists(oauth_file):
             return 0
 
         # Verificar se já existe configuração similar
         for f in all_back_files:
-            txt = read(f)
+            txt = self._read(f)
             if "passport" in txt.lower() or "google" in txt.lower():
                 return 0  # já tem alguma configuração
 
@@ -1347,7 +1390,7 @@ export default router;
     def fix_render_config(self) -> int:
         """Cria render.yaml para deploy no Render.com."""
         render_yaml = self.root / "render.yaml"
-        if render_yaml.exists():
+        if self.batch.exists(render_yaml):
             return 0  # Não sobrescrever se já existir
 
         content = """# render.yaml — Deploy configuration for Render.com
@@ -1417,24 +1460,37 @@ services:
 
 # ═══════════════════════════════ MAIN AUDIT ════════════════════════════════════
 
-def run_audit(root: Path) -> Dict:
-    print(f"\n🔍 Shadia Master Fix v{VERSION}")
-    print(f"   Auditando: {root}")
-    print("   " + "─" * 55)
-
-    page_files    = iter_files(root, PAGE_GLOBS)
-    front_files   = iter_files(root, FRONT_GLOBS)
-    back_files    = iter_files(root, BACK_GLOBS)
-    schema_files  = iter_files(root, SCHEMA_GLOBS)
+def make_plan(root: Path) -> FixPlan:
+    """Uma varredura da árvore para a auditoria, os fixers e a verificação."""
+    return FixPlan(root, {"pages": PAGE_GLOBS, "front": FRONT_GLOBS, "back": BACK_GLOBS,
+                          "schema": SCHEMA_GLOBS}, SKIP_DIRS, gitignore=False)
+
+
+def run_audit(root: Path, cache: Optional[ScanCache] = None, plan: Optional[FixPlan] = None,
+              verbose: bool = True) -> Dict:
+    """
+    Audita pelo plano: auditar de novo o mesmo plano (após plan.rescan()) só
+    re-varre os arquivos que os fixers alteraram.
+    """
+    say = print if verbose else (lambda *a, **k: None)
+    plan = plan or make_plan(root)
+    say(f"\n🔍 Shadia Master Fix v{VERSION}")
+    say(f"   Auditando: {root}")
+    say("   " + "─" * 55)
+
+    page_files    = plan.files("pages")
+    front_files   = plan.files("front")
+    back_files    = plan.files("back")
+    schema_files  = plan.files("schema")
     all_ts_files  = sorted(set(front_files + back_files))
 
-    print(f"   📄 Páginas (.tsx):     {len(page_files)}")
-    print(f"   🖥️  Arquivos frontend: {len(front_files)}")
-    print(f"   ⚙️  Arquivos backend:  {len(back_files)}")
-    print(f"   🗄️  Schema files:      {len(schema_files)}")
+    say(f"   📄 Páginas (.tsx):     {len(page_files)}")
+    say(f"   🖥️  Arquivos frontend: {len(front_files)}")
+    say(f"   ⚙️  Arquivos backend:  {len(back_files)}")
+    say(f"   🗄️  Schema files:      {len(schema_files)}")
 
     pages       = scan_pages(page_files, root)
-    routes      = scan_routes(front_files + back_files, root)
+    routes      = merge_routes(per_file(front_files + back_files, root, "routes", scan_routes, RouteInfo, cache, plan))
     route_paths = {r.path for r in routes if r.path}
 
     # Extra: buscar App.tsx explicitamente
@@ -1442,31 +1498,29 @@ def run_audit(root: Path) -> Dict:
         for hint in APP_FILE_HINTS:
             p = root / hint
             if p.exists():
-                extra = scan_routes([p], root)
+                extra = scan_routes([p], root, plan.text)
                 routes.extend(extra)
                 route_paths.update(r.path for r in extra if r.path)
 
-    print(f"   🗺️  Rotas detectadas:  {len(routes)}")
+    say(f"   🗺️  Rotas detectadas:  {len(routes)}")
 
-    internal_links, broken_links = scan_links(front_files, root, route_paths)
-    print(f"   🔗 Links internos:    {len(internal_links)}")
-    print(f"   🔗 Links quebrados:   {len(broken_links)}")
+    internal_links, broken_links = classify_links(
+        flatten(per_file(front_files, root, "links", _file_links, LinkInfo, cache, plan)), route_paths)
+    say(f"   🔗 Links internos:    {len(internal_links)}")
+    say(f"   🔗 Links quebrados:   {len(broken_links)}")
 
-    back_procs, back_ns_map = scan_trpc_backend(back_files, root)
-    front_usages            = scan_trpc_frontend(front_files, root)
-    print(f"   ⚙️  Procedures tRPC:   {len(back_procs)}")
-    print(f"   🖥️  Usos tRPC:         {len(front_usages)}")
+    back_procs, _ = link_trpc_procs(
+        flatten(per_file(back_files, root, "procs", scan_trpc_procs, TrpcProc, cache, plan)),
+        flatten(per_file(back_files, root, "mounts", scan_trpc_mounts, TrpcMount, cache, plan)))
+    front_usages = flatten(per_file(front_files, root, "usages", scan_trpc_frontend, TrpcUsage, cache, plan))
+    say(f"   ⚙️  Procedures tRPC:   {len(back_procs)}")
+    say(f"   🖥️  Usos tRPC:         {len(front_usages)}")
 
-    db_tables = []
-    for f in iter_files(root, SCHEMA_GLOBS):
-        txt = read(f)
-        fr  = rel(f, root)
-        for m in RX_DRIZZLE.finditer(txt):
-            db_tables.append({"var": m.group(1), "table": m.group(2), "file": fr})
-    print(f"   🗄️  Tabelas DB:        {len(db_tables)}")
+    db_tables = flatten(per_file(schema_files, root, "tables", scan_schema, dict, cache, plan))
+    say(f"   🗄️  Tabelas DB:        {len(db_tables)}")
 
-    sec_issues   = scan_security(all_ts_files, root)
-    qual_issues  = scan_quality(all_ts_files, root)
+    sec_issues   = flatten(per_file(all_ts_files, root, "security", scan_security, Issue, cache, plan))
+    qual_issues  = flatten(per_file(all_ts_files, root, "quality", scan_quality, Issue, cache, plan))
     trpc_issues, trpc_stats = analyze_trpc(back_procs, front_usages)
     orphan_pages = find_orphan_pages(pages, route_paths, routes)
 
@@ -1542,6 +1596,29 @@ def run_audit(root: Path) -> Dict:
 
 # ═══════════════════════════════ HTML REPORT ═══════════════════════════════════
 
+# Renderiza o diff de um fix só quando o <details> é aberto (o HTML carrega apenas os trechos alterados)
+FIX_DIFF_JS = """<script>
+(function(){
+  var data = JSON.parse(document.getElementById('fix-changes').textContent);
+  function lines(t){ var l = t ? t.split('\\n') : []; if (l.length && l[l.length-1] === '') l.pop(); return l; }
+  function span(cls, text){
+    var s = document.createElement('span'); s.className = cls; s.textContent = text + '\\n'; return s;
+  }
+  document.querySelectorAll('details.diff').forEach(function(d){
+    d.addEventListener('toggle', function(){
+      var pre = d.querySelector('pre');
+      if (!d.open || pre.childNodes.length) return;
+      data[+d.dataset.fix].forEach(function(c){
+        pre.appendChild(span('diff-hunk', '@@ linha ' + c[0] + ' @@'));
+        lines(c[1]).forEach(function(t){ pre.appendChild(span('diff-remove', '-' + t)); });
+        lines(c[2]).forEach(function(t){ pre.appendChild(span('diff-add', '+' + t)); });
+      });
+    });
+  });
+})();
+</script>"""
+
+
 def write_html(out_path: Path, report: Dict, applied_fixes: List[AppliedFix],
                before_scores: Optional[Dict] = None) -> None:
 
@@ -1571,7 +1648,7 @@ def write_html(out_path: Path, report: Dict, applied_fixes: List[AppliedFix],
     infos     = [i for i in issues if i["severity"] == "INFO"]
 
     has_fixes    = len(applied_fixes) > 0
-    mode_label   = "APPLY" if has_fixes and any(not f.diff_preview == "" for f in applied_fixes) else "DRY-RUN"
+    mode_label   = "APPLY" if has_fixes and any(f.changes for f in applied_fixes) else "DRY-RUN"
 
     H: List[str] = []
     a = H.append
@@ -1648,6 +1725,7 @@ tr:hover td{background:#0d1a2a}
 .fix-card .fix-title{font-weight:700;color:#bbf7d0;font-size:0.9em;margin-bottom:4px}
 .fix-card .fix-file{font-family:monospace;font-size:0.78em;color:#4ade80;margin-bottom:8px}
 .fix-card pre.diff{background:#0d1a0d;border:1px solid #166534;font-size:0.78em;color:#bbf7d0;max-height:200px}
+.fix-card details.diff summary{cursor:pointer;font-size:0.78em;color:#86efac}
 .diff-add{color:#4ade80}.diff-remove{color:#f87171}.diff-hunk{color:#7dd3fc}
 /* ── Alert Banners ── */
 .alert{border-radius:10px;padding:14px 20px;margin-bottom:12px;border:1px solid;display:flex;align-items:flex-start;gap:12px}
@@ -1759,6 +1837,7 @@ tr:hover td{background:#0d1a2a}
           f'<div><strong>ATENÇÃO</strong> — {len(warnings)} warnings detectados</div></div>')
 
     # Applied Fixes
+    fix_changes: List[List[List[Any]]] = []   # só vira HTML quando o <details> do fix é aberto
     if applied_fixes:
         a(f'<details open><summary>')
         a(f'<div class="section-header"><h2><span class="arrow">▶</span>✅ Correções Aplicadas</h2><span class="cnt">{len(applied_fixes)}</span></div>')
@@ -1767,18 +1846,16 @@ tr:hover td{background:#0d1a2a}
             a('<div class="fix-card">')
             a(f'<div class="fix-title">✅ {esc(fx.description)}</div>')
             a(f'<div class="fix-file">📄 {esc(fx.file)}</div>')
-            if fx.diff_preview:
-                diff_html = ""
-                for dline in fx.diff_preview.split("\n"):
-                    if dline.startswith("+") and not dline.startswith("+++"):
-                        diff_html += f'<span class="diff-add">{esc(dline)}</span>\n'
-                    elif dline.startswith("-") and not dline.startswith("---"):
-                        diff_html += f'<span class="diff-remove">{esc(dline)}</span>\n'
-                    elif dline.startswith("@@"):
-                        diff_html += f'<span class="diff-hunk">{esc(dline)}</span>\n'
-                    else:
-                        diff_html += esc(dline) + "\n"
-                a(f'<pre class="diff">{diff_html}</pre>')
+            if fx.new_file:
+                n_lines = sum(c.new.count("\n") for c in fx.changes)
+                a(f'<div class="fix-file">arquivo novo (+{n_lines} linhas) — '
+                  f'conteúdo: <code>--show-diff {esc(fx.file)}</code></div>')
+            elif fx.changes:
+                added = sum(c.new.count("\n") or 1 for c in fx.changes if c.new)
+                removed = sum(c.old.count("\n") or 1 for c in fx.changes if c.old)
+                a(f'<details class="diff" data-fix="{len(fix_changes)}"><summary>ver diff '
+                  f'(+{added} −{removed})</summary><pre class="diff"></pre></details>')
+                fix_changes.append([[c.line, c.old, c.new] for c in fx.changes])
             a('</div>')
         a('</div></details>')
 
@@ -1938,6 +2015,10 @@ python shadia_master_fix.py --apply --fix-google-login  # Criar google_oauth.ts
     a(f'<div style="text-align:center;padding:32px;color:#334155;font-size:0.8em">')
     a(f'Shadia Master Fix v{esc(report["version"])} &nbsp;·&nbsp; Gerado em {esc(report["generated_at"])}</div>')
 
+    if fix_changes:
+        payload = json.dumps(fix_changes, ensure_ascii=False).replace("</", "<\\/")
+        a(f'<script type="application/json" id="fix-changes">{payload}</script>')
+        a(FIX_DIFF_JS)
     a('</body></html>')
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -1946,6 +2027,29 @@ python shadia_master_fix.py --apply --fix-google-login  # Criar google_oauth.ts
 
 # ═══════════════════════════════ CLI ══════════════════════════════════════════
 
+def show_diff(root: Path, report_json: Path, target: str) -> int:
+    """Imprime o diff de um arquivo a partir das mudanças gravadas no relatório JSON."""
+    try:
+        data = json.loads(report_json.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        print(f"❌ Relatório não encontrado: {report_json} (rode o fix antes, com ou sem --apply)")
+        return 1
+    try:
+        want = ts((root / target).resolve().relative_to(root))
+    except ValueError:
+        print(f"Nenhuma alteração registrada para {target} (fora da raiz {root})")
+        return 1
+    groups = [[TextChange(**c) for c in fx.get("changes", [])]
+              for fx in data.get("applied_fixes", []) if fx["file"] == want and fx.get("changes")]
+    if not groups:
+        print(f"Nenhuma alteração registrada para {want}")
+        return 1
+    p = root / want
+    current = read(p) if p.exists() else None
+    sys.stdout.write(render_changes(want, current, groups, data.get("fix_mode") == "APPLY"))
+    return 0
+
+
 def main():
     ap = argparse.ArgumentParser(
         description="Shadia Master Fix — Auditoria + Auto-Fix 10/10",
@@ -1956,6 +2060,9 @@ Exemplos:
   python shadia_master_fix.py --apply --all            # Corrigir tudo
   python shadia_master_fix.py --apply --fix-routes --fix-trpc
   python shadia_master_fix.py --apply --fix-google-login --fix-render
+  python shadia_master_fix.py --show-diff client/src/App.tsx   # Diff de um arquivo (último relatório)
+  python shadia_master_fix.py --restore                # Desfazer o último --apply
+  python shadia_master_fix.py --gc --keep-runs 5       # Limpar backups antigos
 """
     )
     ap.add_argument("--root",              default=".", help="Raiz do projeto (padrão: .)")
@@ -1970,7 +2077,16 @@ Exemplos:
     ap.add_argument("--fix-render",        action="store_true", help="Criar render.yaml para deploy Render.com")
     ap.add_argument("--fix-google-login",  action="store_true", help="Criar server/_core/google_oauth.ts")
     ap.add_argument("--output-dir",        default=OUTPUT_DIR_NAME, help=f"Diretório de saída (padrão: {OUTPUT_DIR_NAME})")
+    ap.add_argument("--no-cache",          action="store_true", help="Ignorar o cache incremental (<output-dir>/.cache)")
+    ap.add_argument("--restore",           nargs="?", const="", default=None, metavar="RUN",
+                    help="Desfazer um --apply (id da execução; padrão: a mais recente)")
+    ap.add_argument("--show-diff",         default=None, metavar="FILE",
+                    help="Mostrar o diff de FILE a partir do último relatório (sem reauditar)")
+    ap.add_argument("--gc",                action="store_true", help="Apagar backups antigos (mantém --keep-runs) e compactar o resto")
+    ap.add_argument("--keep-runs",         type=int, default=10, metavar="N", help="Execuções mantidas pelo --gc (padrão: 10)")
     args = ap.parse_args()
+    if args.keep_runs < 0:
+        ap.error("--keep-runs precisa ser >= 0")
 
     # --all ativa tudo
     if args.all:
@@ -1985,25 +2101,48 @@ Exemplos:
 
     root       = Path(args.root).resolve()
     output_dir = root / args.output_dir
-    backup_dir = output_dir / "backups" / datetime.now().strftime("%Y%m%d_%H%M%S")
+    backups    = BackupStore(output_dir / "backups", root)
     dry_run    = not args.apply
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    if args.show_diff:
+        return show_diff(root, output_dir / "shadia_master_fix_report.json", args.show_diff)
+    if args.restore is not None:
+        try:
+            done = backups.restore(args.restore or None)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            return 1
+        for relp, action in done:
+            print(f"  {'↩️  Restaurado' if action == 'restored' else '🗑️  Removido'}: {relp}")
+        print(f"✅ {len(done)} arquivo(s) revertido(s)")
+        return 0
+    if args.gc:
+        runs, blobs = backups.gc(args.keep_runs)
+        print(f"🧹 Backups: {runs} execução(ões) removida(s), {blobs} blob(s) descartado(s)")
+        return 0
+
     print(f"\n{'─'*60}")
     print(f"🛠️  Shadia Master Fix v{VERSION}")
     print(f"{'─'*60}")
     print(f"Modo: {'DRY-RUN (apenas auditar)' if dry_run else '🔥 APPLY (corrigindo código!)'}")
     if not dry_run:
-        print(f"Backups em: {backup_dir}")
+        print(f"Backups em: {backups.dir}")
     print(f"{'─'*60}")
 
     # 1. Auditoria
-    report = run_audit(root)
+    cache = None if args.no_cache else ScanCache(
+        output_dir / ".cache" / "shadia_master_fix.json", tool_salt(Path(__file__)))
+    plan   = make_plan(root)
+    report = run_audit(root, cache, plan)
+    if cache is not None:
+        cache.save()
+        print(f"   Cache: {cache.hits} hits / {cache.misses} misses")
 
     # 2. Auto-Fix
     applied_fixes: List[AppliedFix] = []
-    fixer = AutoFixer(root, backup_dir, dry_run)
+    fixer = AutoFixer(root, backups, dry_run, plan)
 
     any_fix = any([args.fix_routes, args.fix_trpc, args.fix_links, args.fix_oauth,
                    args.fix_env, args.create_stubs, args.fix_render, args.fix_google_login])
@@ -2028,7 +2167,8 @@ Exemplos:
         print(f"  🔗 fix-links: {n} links{'  corrigidos' if not dry_run else ' (dry-run)'}")
 
     if args.fix_oauth:
-        n = fixer.fix_oauth(report["all_ts_files"])
+        n = fixer.fix_oauth(issue_files(report, report["all_ts_files"], root,
+                                        lambda i: i["category"] == "OAuth"))
         print(f"  🔐 fix-oauth: {n} arquivos{'  atualizados' if not dry_run else ' (dry-run)'}")
 
     if args.fix_google_login:
@@ -2043,7 +2183,8 @@ Exemplos:
         print(f"  ⚙️  fix-trpc: {n} procedures{'  criadas' if not dry_run else ' (dry-run)'}")
 
     if args.fix_env:
-        n = fixer.fix_env(report["all_ts_files"])
+        n = fixer.fix_env(issue_files(report, report["all_ts_files"], root,
+                                      lambda i: i["title"] == "Hardcoded localhost/port"))
         print(f"  🌍 fix-env: {n} itens{'  corrigidos' if not dry_run else ' (dry-run)'}")
 
     if args.create_stubs:
@@ -2056,9 +2197,20 @@ Exemplos:
         n = fixer.fix_render_config()
         print(f"  ☁️  fix-render: render.yaml{'  criado' if not dry_run else ' (dry-run)'}")
 
+    fixer.commit()
     applied_fixes = fixer.fixes
 
-    # 3. Relatório HTML
+    # 3. Verificação: mesma auditoria sobre o corpus corrigido; só os arquivos
+    #    alterados pelos fixers são re-varridos (em dry-run, o resultado previsto)
+    verified: Optional[Dict] = None
+    if applied_fixes:
+        rescanned = plan.rescan()
+        verified = run_audit(root, None, plan, verbose=False)
+        print(f"\n🔁 Verificação{' (prevista)' if dry_run else ''}: {len(rescanned)} arquivo(s) re-varrido(s), "
+              f"score {report['scores']['overall']} → {verified['scores']['overall']}, "
+              f"issues {report['counts']['total_issues']} → {verified['counts']['total_issues']}")
+
+    # 4. Relatório HTML
     html_path = output_dir / "shadia_master_fix_report.html"
     report_json_path = output_dir / "shadia_master_fix_report.json"
 
@@ -2066,15 +2218,27 @@ Exemplos:
     json_report = {k: v for k, v in report.items()
                    if k not in ("page_files", "front_files", "back_files", "all_ts_files",
                                 "routes_obj", "back_procs_obj", "front_usages_obj", "trpc_back_map")}
+    json_report["fix_mode"] = "DRY_RUN" if dry_run else "APPLY"
     json_report["applied_fixes"] = [asdict(f) for f in applied_fixes]
+    if verified:
+        json_report["verification"] = {
+            "predicted": dry_run,
+            "rescanned": [rel(p, root) for p in rescanned],
+            "scores":    verified["scores"],
+            "counts":    verified["counts"],
+        }
     report_json_path.write_text(
         json.dumps(json_report, indent=2, ensure_ascii=False, default=str),
         encoding="utf-8",
     )
 
-    write_html(html_path, report, applied_fixes)
+    # Com --apply o HTML mostra o estado verificado, com o score de antes ao lado
+    if verified and not dry_run:
+        write_html(html_path, verified, applied_fixes, report["scores"])
+    else:
+        write_html(html_path, report, applied_fixes)
 
-    # 4. Sumário final
+    # 5. Sumário final
     scores = report["scores"]
     counts = report["counts"]
     print(f"\n{'═'*60}")
@@ -2084,13 +2248,16 @@ Exemplos:
     print(f"  tRPC:            {scores['trpc']:>3}/100  (ghosts: {counts['trpc_ghost']}, dead: {counts['trpc_dead']})")
     print(f"  Qualidade:       {scores['quality']:>3}/100")
     print(f"  Total de issues: {counts['total_issues']}")
+    if verified:
+        print(f"  Após correções:  {verified['scores']['overall']:>3}/100  ({verified['counts']['total_issues']} issues"
+              f"{', previsto' if dry_run else ''})")
     if applied_fixes:
         print(f"  Correções:       {len(applied_fixes)} {'aplicadas' if not dry_run else '(dry-run)'}")
     print(f"{'═'*60}")
     print(f"\n📊 Relatório HTML: {html_path}")
     print(f"📋 Relatório JSON: {report_json_path}")
-    if not dry_run:
-        print(f"💾 Backups:        {backup_dir}")
+    if fixer.manifest:
+        print(f"💾 Backups:        {fixer.manifest}  (desfazer: --restore)")
 
     if dry_run and any_fix:
         print(f"\n  ➡️  Adicione --apply para aplicar as correções!")
@@ -0,0 +1,58 @@
+"""common.BackupStore.gc: pack versionado, runs pendentes e --keep-runs inválido."""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common import BackupStore  # noqa: E402
+
+
+def _backup(store: BackupStore, path: Path, text: str) -> str:
+    path.write_text(text, encoding="utf-8")
+    run = store.start("test")
+    run.add(path)
+    run.save()
+    return run.id
+
+
+def test_gc_switches_pack_through_idx(tmp_path):
+    store = BackupStore(tmp_path / ".bk", tmp_path)
+    f = tmp_path / "a.txt"
+    _backup(store, f, "one")
+    keep = _backup(store, f, "two")
+
+    assert store.gc(1) == (1, 1)
+    idx = json.loads((store.dir / "pack" / "objects.idx").read_text(encoding="utf-8"))
+    assert [p.name for p in (store.dir / "pack").glob("*.pack")] == [idx["pack"]]
+    assert not list((store.dir / "objects").glob("??/*"))
+
+    fresh = BackupStore(store.dir, tmp_path)
+    f.write_text("changed", encoding="utf-8")
+    fresh.restore(keep)
+    assert f.read_text(encoding="utf-8") == "two"
+
+
+def test_gc_keeps_blobs_of_pending_runs(tmp_path):
+    store = BackupStore(tmp_path / ".bk", tmp_path)
+    f = tmp_path / "a.txt"
+    _backup(store, f, "saved")
+    f.write_text("in flight", encoding="utf-8")
+    pending = store.start("test")
+    pending.add(f)                                # blob stored, manifest not written yet
+
+    assert store.gc(0) == (1, 0)
+    pending.save()
+    f.write_text("changed", encoding="utf-8")
+    BackupStore(store.dir, tmp_path).restore(pending.id)
+    assert f.read_text(encoding="utf-8") == "in flight"
+
+
+def test_gc_rejects_negative_keep(tmp_path):
+    store = BackupStore(tmp_path / ".bk", tmp_path)
+    run_id = _backup(store, tmp_path / "a.txt", "one")
+    with pytest.raises(ValueError):
+        store.gc(-1)
+    assert store.runs() == [run_id]
@@ -0,0 +1,49 @@
+"""common.GitIgnore: regras ancoradas, só-diretório e negação."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common import GitIgnore  # noqa: E402
+
+
+def _rules(text: str, base: str = "") -> GitIgnore:
+    gi = GitIgnore()
+    gi.add(base, text)
+    return gi
+
+
+def test_anchored_dir_only_matches_at_root_only():
+    gi = _rules("/build/\n")
+    assert gi.ignored("build", True)
+    assert not gi.ignored("client/build", True)
+    assert not gi.ignored("build", False)
+
+
+def test_unanchored_dir_only_matches_at_any_depth():
+    gi = _rules("dist/\n")
+    assert gi.ignored("dist", True)
+    assert gi.ignored("client/dist", True)
+    assert not gi.ignored("client/dist", False)
+
+
+def test_middle_slash_anchors():
+    gi = _rules("docs/*.md\nout/tmp/\n")
+    assert gi.ignored("docs/a.md", False)
+    assert not gi.ignored("src/docs/a.md", False)
+    assert gi.ignored("out/tmp", True)
+    assert not gi.ignored("x/out/tmp", True)
+
+
+def test_negation_last_rule_wins():
+    gi = _rules("*.env\n!example.env\n")
+    assert gi.ignored("server/.prod.env", False)
+    assert not gi.ignored("server/example.env", False)
+    assert not gi.ignored("example.env", False)
+
+
+def test_nested_gitignore_applies_below_its_directory():
+    gi = _rules("/cache/\n", base="client")
+    assert gi.ignored("client/cache", True)
+    assert not gi.ignored("cache", True)
+    assert not gi.ignored("client/src/cache", True)
@@ -0,0 +1,89 @@
+"""shadia_doctor: --jobs N igual à execução serial e uso de routers tRPC aninhados."""
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import shadia_doctor  # noqa: E402
+
+FIXTURE = {
+    "client/src/App.tsx": """import { Switch, Route } from "wouter";
+import Home from "@/pages/Home";
+import Courses from "@/pages/Courses";
+export default function App() {
+  return (
+    <Switch>
+      <Route path="/" component={Home} />
+      <Route path="/courses" component={Courses} />
+      <Route component={Home} />
+    </Switch>
+  );
+}
+""",
+    "client/src/pages/Home.tsx": """import { Link } from "wouter";
+import { trpc } from "@/lib/trpc";
+export default function Home() {
+  const q = trpc.courses.list.useQuery();
+  // TODO: paginação
+  return <div><Link href="/courses">Cursos</Link><Link href="/pricing">Planos</Link>
+    <a href="/api/auth/google">Google</a></div>;
+}
+""",
+    "client/src/pages/Courses.tsx": """import { trpc } from "@/lib/trpc";
+export default function Courses() {
+  const c = trpc.courses.byId.useQuery({ id: 1 });
+  const s = trpc.videos.admin.cfStatus.useQuery();
+  const api = "http://localhost:3001/api";
+  return <a href="/admin/users">Admin</a>;
+}
+""",
+    "client/src/pages/Orphan.tsx": "export default function Orphan() { return null; }\n",
+    "server/routers.ts": """import { router, publicProcedure } from "./_core/trpc";
+export const coursesRouter = router({
+  list: publicProcedure.query(() => []),
+  remove: publicProcedure.mutation(() => null),
+});
+export const videosAdminRouter = router({
+  cfStatus: publicProcedure.query(() => null),
+  purge: publicProcedure.mutation(() => null),
+});
+export const appRouter = router({
+  courses: coursesRouter,
+  videos: router({ admin: videosAdminRouter }),
+});
+""",
+    "drizzle/schema.ts": """export const users = mysqlTable("users", {});
+export const courses = mysqlTable("courses", {});
+""",
+}
+
+
+def _audit_json(root: Path, jobs: int) -> str:
+    report = shadia_doctor.run_full_audit(root, None, jobs)
+    report.pop("generated_at", None)
+    return json.dumps(report, indent=2, ensure_ascii=False)
+
+
+def _write_fixture(root: Path) -> None:
+    for rel, text in FIXTURE.items():
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+
+
+def test_jobs_output_matches_serial(tmp_path):
+    _write_fixture(tmp_path)
+    serial = _audit_json(tmp_path, 1)
+    assert json.loads(serial)["routes"]          # a fixture exercita os scanners
+    assert _audit_json(tmp_path, 2) == serial
+
+
+def test_nested_router_usage_is_not_dead(tmp_path):
+    _write_fixture(tmp_path)
+    report = shadia_doctor.run_full_audit(tmp_path, None, 1)
+    dead = {(d["ns"], d["name"]) for d in report["dead_procedures"]}
+    ghost = {(g["ns"], g["name"]) for g in report["ghost_calls"]}
+    assert ("videos.admin", "cfStatus") not in dead
+    assert ("videos.admin", "cfStatus") not in ghost
+    assert ("videos.admin", "purge") in dead